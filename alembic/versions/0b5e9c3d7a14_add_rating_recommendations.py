@@ -0,0 +1,36 @@
+"""add rating recommendations snapshot
+
+Revision ID: 0b5e9c3d7a14
+Revises: e8a2c6f4d1b9
+Create Date: 2026-10-20 02:14:09.731552
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0b5e9c3d7a14"
+down_revision: Union[str, Sequence[str], None] = "e8a2c6f4d1b9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "rating_recommendations",
+        sa.Column("user_id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("book_ids", sa.LargeBinary(), nullable=False),
+        sa.Column("scores", sa.LargeBinary(), nullable=False),
+        sa.Column("built_at", sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint("user_id"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("rating_recommendations")
@@ -0,0 +1,45 @@
+"""add rate limit windows
+
+Revision ID: 5e0f9a3b6c21
+Revises: c3a8e51f07d2
+Create Date: 2026-10-19 14:05:52.640118
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5e0f9a3b6c21"
+down_revision: Union[str, Sequence[str], None] = "c3a8e51f07d2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "rate_limit_windows",
+        sa.Column("key", sa.String(length=255), nullable=False),
+        sa.Column("window_start", sa.Integer(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.Column("expires_at", sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint("key", "window_start"),
+    )
+    op.create_index(
+        op.f("ix_rate_limit_windows_expires_at"),
+        "rate_limit_windows",
+        ["expires_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        op.f("ix_rate_limit_windows_expires_at"), table_name="rate_limit_windows"
+    )
+    op.drop_table("rate_limit_windows")
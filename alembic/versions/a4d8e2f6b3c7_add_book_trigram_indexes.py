@@ -0,0 +1,49 @@
+"""add book trigram indexes
+
+Revision ID: a4d8e2f6b3c7
+Revises: f2c7a9d4e8b1
+Create Date: 2026-10-19 21:03:52.184409
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a4d8e2f6b3c7"
+down_revision: Union[str, Sequence[str], None] = "f2c7a9d4e8b1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # pg_trgm есть только в Postgres; на SQLite поиск идёт по индексу в памяти
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        "ix_books_title_trgm",
+        "books",
+        ["title"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"title": "gin_trgm_ops"},
+    )
+    op.create_index(
+        "ix_books_author_trgm",
+        "books",
+        ["author"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"author": "gin_trgm_ops"},
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.drop_index("ix_books_author_trgm", table_name="books")
+    op.drop_index("ix_books_title_trgm", table_name="books")
@@ -0,0 +1,67 @@
+"""add admin user search indexes
+
+Revision ID: b6e1c4d8f2a9
+Revises: 9d4b7e2a1f63
+Create Date: 2026-10-19 18:05:41.602117
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b6e1c4d8f2a9"
+down_revision: Union[str, Sequence[str], None] = "9d4b7e2a1f63"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_users_admins",
+        "users",
+        ["id"],
+        unique=False,
+        postgresql_where=sa.text("is_admin"),
+    )
+    op.create_index(
+        "ix_users_banned",
+        "users",
+        ["id"],
+        unique=False,
+        postgresql_where=sa.text("is_banned"),
+    )
+    op.create_index(
+        "ix_users_inactive",
+        "users",
+        ["id"],
+        unique=False,
+        postgresql_where=sa.text("NOT is_active"),
+    )
+    op.create_index(
+        "ix_users_username_pattern",
+        "users",
+        ["username"],
+        unique=False,
+        postgresql_ops={"username": "text_pattern_ops"},
+    )
+    op.create_index(
+        "ix_users_email_pattern",
+        "users",
+        ["email"],
+        unique=False,
+        postgresql_ops={"email": "text_pattern_ops"},
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_users_email_pattern", table_name="users")
+    op.drop_index("ix_users_username_pattern", table_name="users")
+    op.drop_index("ix_users_inactive", table_name="users")
+    op.drop_index("ix_users_banned", table_name="users")
+    op.drop_index("ix_users_admins", table_name="users")
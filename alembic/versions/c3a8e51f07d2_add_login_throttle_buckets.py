@@ -0,0 +1,45 @@
+"""add login throttle buckets
+
+Revision ID: c3a8e51f07d2
+Revises: 7b1d2f9c4a10
+Create Date: 2026-10-19 12:40:03.117935
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c3a8e51f07d2"
+down_revision: Union[str, Sequence[str], None] = "7b1d2f9c4a10"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "login_throttle_buckets",
+        sa.Column("key", sa.String(length=255), nullable=False),
+        sa.Column("tokens", sa.Float(), nullable=False),
+        sa.Column("updated_at", sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint("key"),
+    )
+    op.create_index(
+        op.f("ix_login_throttle_buckets_updated_at"),
+        "login_throttle_buckets",
+        ["updated_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        op.f("ix_login_throttle_buckets_updated_at"),
+        table_name="login_throttle_buckets",
+    )
+    op.drop_table("login_throttle_buckets")
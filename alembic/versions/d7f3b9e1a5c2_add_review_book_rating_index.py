@@ -0,0 +1,29 @@
+"""add review book rating index
+
+Revision ID: d7f3b9e1a5c2
+Revises: a4d8e2f6b3c7
+Create Date: 2026-10-19 23:41:17.215093
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d7f3b9e1a5c2"
+down_revision: Union[str, Sequence[str], None] = "a4d8e2f6b3c7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_reviews_book_id_rating", "reviews", ["book_id", "rating"], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_reviews_book_id_rating", table_name="reviews")
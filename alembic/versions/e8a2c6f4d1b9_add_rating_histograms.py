@@ -0,0 +1,51 @@
+"""add rating histograms
+
+Revision ID: e8a2c6f4d1b9
+Revises: d7f3b9e1a5c2
+Create Date: 2026-10-20 00:27:44.580316
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e8a2c6f4d1b9"
+down_revision: Union[str, Sequence[str], None] = "d7f3b9e1a5c2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+RATINGS = range(1, 6)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "rating_histograms",
+        sa.Column("book_id", sa.Integer(), nullable=False),
+        *(
+            sa.Column(
+                f"rating_{rating}", sa.Integer(), server_default="0", nullable=False
+            )
+            for rating in RATINGS
+        ),
+        sa.ForeignKeyConstraint(["book_id"], ["books.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("book_id"),
+    )
+    # Счётчики для уже существующих отзывов
+    counts = ", ".join(
+        f"SUM(CASE WHEN rating = {rating} THEN 1 ELSE 0 END)" for rating in RATINGS
+    )
+    columns = ", ".join(f"rating_{rating}" for rating in RATINGS)
+    op.execute(
+        f"INSERT INTO rating_histograms (book_id, {columns}) "
+        f"SELECT book_id, {counts} FROM reviews GROUP BY book_id"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("rating_histograms")
@@ -0,0 +1,46 @@
+"""add book catalog indexes
+
+Revision ID: f2c7a9d4e8b1
+Revises: b6e1c4d8f2a9
+Create Date: 2026-10-19 19:12:08.437516
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f2c7a9d4e8b1"
+down_revision: Union[str, Sequence[str], None] = "b6e1c4d8f2a9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (имя индекса, колонки); одиночные индексы по title и created_at покрываются
+# составными, где они идут первыми
+CATALOG_INDEXES = [
+    ("ix_books_title_id", ["title", "id"]),
+    ("ix_books_rating_id", ["rating", "id"]),
+    ("ix_books_pages_id", ["pages", "id"]),
+    ("ix_books_created_at_id", ["created_at", "id"]),
+    ("ix_books_author_title_id", ["author", "title", "id"]),
+    ("ix_books_author_rating_id", ["author", "rating", "id"]),
+    ("ix_books_author_pages_id", ["author", "pages", "id"]),
+    ("ix_books_author_created_at_id", ["author", "created_at", "id"]),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, columns in CATALOG_INDEXES:
+        op.create_index(name, "books", columns, unique=False)
+    op.execute("DROP INDEX IF EXISTS ix_books_title")
+    op.execute("DROP INDEX IF EXISTS ix_books_created_at")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(op.f("ix_books_created_at"), "books", ["created_at"], unique=False)
+    op.create_index(op.f("ix_books_title"), "books", ["title"], unique=False)
+    for name, _ in reversed(CATALOG_INDEXES):
+        op.drop_index(name, table_name="books")
@@ -1,8 +1,53 @@
+import logging
+
 import uvicorn
 
 from src.shared.config import settings
 
-if __name__ == "__main__":
+logger = logging.getLogger("src")
+
+
+def run_development():
+    uvicorn.run(
+        "src.main:create_app",
+        host=settings.HOST,
+        port=settings.PORT,
+        factory=True,
+        reload=settings.DB_TYPE == "sqlite",
+    )
+
+
+def run_production():
+    if settings.DB_TYPE == "postgres":
+        pool_size, max_overflow = settings.DB_POOL_LIMITS
+        logger.info(
+            "Starting %d workers, DB pool per worker: pool_size=%d max_overflow=%d",
+            settings.WORKER_COUNT,
+            pool_size,
+            max_overflow,
+        )
+
     uvicorn.run(
-        "src.main:app", host="0.0.0.0", port=8000, reload=settings.DB_TYPE == "sqlite"
+        "src.main:create_app",
+        host=settings.HOST,
+        port=settings.PORT,
+        uds=settings.UNIX_SOCKET,
+        factory=True,
+        workers=settings.WORKER_COUNT,
+        loop=settings.UVICORN_LOOP,
+        http=settings.UVICORN_HTTP,
+        backlog=settings.BACKLOG,
+        timeout_keep_alive=settings.KEEP_ALIVE,
+        timeout_graceful_shutdown=settings.GRACEFUL_SHUTDOWN_TIMEOUT,
+        proxy_headers=True,
+        server_header=False,
     )
+
+
+if __name__ == "__main__":
+    # Логгер приложения в главном процессе: до uvicorn.run он ещё не настроен
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s:     %(message)s")
+    if settings.APP_ENV == "production":
+        run_production()
+    else:
+        run_development()
@@ -0,0 +1,158 @@
+"""
+Задержка фильтров, сортировок и фасетов каталога книг.
+
+Заполняет временную SQLite синтетическими книгами (число книг у авторов
+распределено по Ципфу), выполняет ANALYZE и замеряет страницы каталога
+для разных фильтров и сортировок, а также подсчёт фасетов без кэша.
+
+    poetry run python scripts/bench_book_catalog.py --books 1000000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+current_dir = Path(__file__).parent
+root_dir = current_dir.parent
+sys.path.append(str(root_dir))
+os.environ.setdefault("SECRET_KEY", "bench-secret-key")
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+
+from src.books.crud import book as book_crud  # noqa: E402
+from src.books.facets import BookFacetCache  # noqa: E402
+from src.books.models import BookModel  # noqa: E402
+from src.books.schemas import BookFilter, BookQuery  # noqa: E402
+from src.main import create_app  # noqa: E402
+from src.shared.database import Base  # noqa: E402
+
+CHUNK = 50_000
+START = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+QUERIES = {
+    "default order": {},
+    "sort -rating": {"sort": "-rating"},
+    "sort title, deep page": {"sort": "title", "skip": 10_000},
+    "sort -created_at": {"sort": "-created_at"},
+    "author, sort -rating": {"author": "author-1", "sort": "-rating"},
+    "author, sort pages": {"author": "author-500", "sort": "pages"},
+    "pages 200-300, sort pages": {"pages_min": 200, "pages_max": 300, "sort": "pages"},
+    "rating 4.5+, sort -rating": {"rating_min": 4.5, "sort": "-rating"},
+    "created last 30 days, sort -created_at": {
+        "created_after": START + timedelta(days=1764),
+        "sort": "-created_at",
+    },
+    "author + pages range, sort -rating": {
+        "author": "author-1",
+        "pages_min": 300,
+        "pages_max": 600,
+        "sort": "-rating",
+    },
+}
+
+FACET_FILTERS = {
+    "all books": {},
+    "one author": {"author": "author-1"},
+    "rating 4.5+": {"rating_min": 4.5},
+}
+
+
+def generate_books(args: argparse.Namespace):
+    rng = random.Random(args.seed)
+    weights = [1 / (rank + 1) for rank in range(args.authors)]
+    authors = rng.choices(range(args.authors), weights, k=args.books)
+    for i, author in enumerate(authors):
+        yield {
+            "title": f"book-{rng.getrandbits(40):010x}-{i}",
+            "author": f"author-{author}",
+            "pages": rng.randint(50, 1500),
+            "rating": round(rng.uniform(0, 5), 1),
+            "created_at": START + timedelta(seconds=i * 155_000_000 // args.books),
+        }
+
+
+async def fill(engine, args: argparse.Namespace) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    rows = []
+    for row in generate_books(args):
+        rows.append(row)
+        if len(rows) == CHUNK:
+            async with engine.begin() as conn:
+                await conn.execute(BookModel.__table__.insert(), rows)
+            rows = []
+    if rows:
+        async with engine.begin() as conn:
+            await conn.execute(BookModel.__table__.insert(), rows)
+    async with engine.begin() as conn:
+        await conn.exec_driver_sql("ANALYZE")
+
+
+async def timed(coro_factory, repeat: int) -> list[float]:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await coro_factory()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+async def main(args: argparse.Namespace):
+    # Импортирует роутеры, а вместе с ними все модели в Base.metadata
+    create_app()
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp}/bench.db")
+        session_factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+
+        started = time.perf_counter()
+        await fill(engine, args)
+        print(
+            f"books={args.books} authors={args.authors} "
+            f"(filled in {time.perf_counter() - started:.1f}s)"
+        )
+
+        async with session_factory() as db:
+            for name, params in QUERIES.items():
+                params = dict(params)
+                skip = params.pop("skip", 0)
+                query = BookQuery(**params)
+                samples = await timed(
+                    lambda query=query, skip=skip: book_crud.browse(
+                        db, query, skip, 20
+                    ),
+                    args.repeat,
+                )
+                print(
+                    f"{name:42} median={statistics.median(samples):7.2f}ms "
+                    f"max={max(samples):7.2f}ms"
+                )
+
+            for name, params in FACET_FILTERS.items():
+                facets = BookFacetCache(ttl=0, max_entries=1)
+                filters = BookFilter(**params)
+                samples = await timed(
+                    lambda facets=facets, filters=filters: facets.get(db, filters), 3
+                )
+                print(
+                    f"facets, {name:34} median={statistics.median(samples):7.2f}ms "
+                    "(uncached)"
+                )
+
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--books", type=int, default=1_000_000)
+    parser.add_argument("--authors", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,133 @@
+"""
+Задержка нечёткого поиска /books/search по триграммному индексу и его память.
+
+Строит BookTrigramIndex по синтетическим книгам (слова названий из словаря
+с частотами по Ципфу, авторы — из пула имён), замеряет время построения и
+под tracemalloc — память индекса, затем задержку поиска автора и слова
+названия с одной опечаткой и долю запросов, не уложившихся в бюджет.
+
+    poetry run python scripts/bench_book_search.py --books 1000000
+"""
+
+import argparse
+import gc
+import itertools
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+current_dir = Path(__file__).parent
+root_dir = current_dir.parent
+sys.path.append(str(root_dir))
+os.environ.setdefault("SECRET_KEY", "bench-secret-key")
+
+from src.books.fuzzy import BookTrigramIndex  # noqa: E402
+from src.shared.config import settings  # noqa: E402
+
+LETTERS = "абвгдежзийклмнопрстуфхцчшщэюя"
+
+
+def make_vocabulary(rng: random.Random, size: int) -> list[str]:
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choices(LETTERS, k=rng.randint(3, 12))))
+    return sorted(words)
+
+
+def generate_books(args: argparse.Namespace, vocabulary: list[str], authors):
+    rng = random.Random(args.seed)
+    cum_weights = list(
+        itertools.accumulate(1 / (rank + 1) for rank in range(len(vocabulary)))
+    )
+    for book_id in range(1, args.books + 1):
+        words = rng.choices(vocabulary, cum_weights=cum_weights, k=rng.randint(1, 6))
+        yield book_id, " ".join(words).capitalize(), rng.choice(authors)
+
+
+def misspell(rng: random.Random, text: str) -> str:
+    position = rng.randrange(len(text))
+    return text[:position] + rng.choice(LETTERS) + text[position + 1 :]
+
+
+def percentile(samples: list[float], share: float) -> float:
+    return sorted(samples)[int(len(samples) * share) - 1]
+
+
+def measure(index: BookTrigramIndex, queries: list[str], budget: float):
+    samples, partial = [], 0
+    for query in queries:
+        started = time.perf_counter()
+        _, complete = index.search(query, 10, settings.FUZZY_SEARCH_THRESHOLD, budget)
+        samples.append((time.perf_counter() - started) * 1000)
+        partial += not complete
+    return samples, partial
+
+
+def main(args: argparse.Namespace):
+    rng = random.Random(args.seed)
+    vocabulary = make_vocabulary(rng, args.words)
+    authors = [
+        f"{rng.choice(vocabulary).title()} {rng.choice(vocabulary).title()}"
+        for _ in range(args.authors)
+    ]
+    books = list(generate_books(args, vocabulary, authors))
+
+    started = time.perf_counter()
+    BookTrigramIndex._build(books)
+    build = time.perf_counter() - started
+
+    # Второй раз под tracemalloc: трассировка сильно замедляет построение
+    gc.collect()
+    tracemalloc.start()
+    index = BookTrigramIndex(rebuild_interval=60)
+    index._store = index._build(books)
+    index.loaded = True
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"books={args.books} trigrams={len(index._store.title_postings)} "
+        f"build={build:.1f}s memory={retained / 2**20:.1f} MiB "
+        f"({retained / args.books:.0f} B/book, peak {peak / 2**20:.1f} MiB)"
+    )
+
+    cases = {
+        "author with a typo": [
+            misspell(rng, rng.choice(authors)) for _ in range(args.queries)
+        ],
+        "author surname with a typo": [
+            misspell(rng, rng.choice(authors).split()[1]) for _ in range(args.queries)
+        ],
+        "title word with a typo": [
+            misspell(rng, rng.choice(books)[1].split()[0]) for _ in range(args.queries)
+        ],
+    }
+    budgets = {
+        "no budget": 60.0,
+        f"budget {settings.FUZZY_SEARCH_BUDGET_MS}ms": (
+            settings.FUZZY_SEARCH_BUDGET_MS / 1000
+        ),
+    }
+    for name, queries in cases.items():
+        for budget_name, budget in budgets.items():
+            samples, partial = measure(index, queries, budget)
+            print(
+                f"{name:27} {budget_name:12} "
+                f"p50={statistics.median(samples):6.2f}ms "
+                f"p99={percentile(samples, 0.99):6.2f}ms "
+                f"partial={partial / len(queries):.1%}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--books", type=int, default=1_000_000)
+    parser.add_argument("--words", type=int, default=200_000)
+    parser.add_argument("--authors", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=42)
+    main(parser.parse_args())
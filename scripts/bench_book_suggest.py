@@ -0,0 +1,128 @@
+"""
+Задержка подсказок /books/suggest и память индекса.
+
+Строит BookSuggestIndex по синтетическим книгам (слова названий из
+словаря с частотами по Ципфу, авторы — из пула имён), замеряет время
+построения и под tracemalloc — память индекса, затем задержку подсказок
+для начал слов разной длины, запросов из двух слов и добавления книги.
+
+    poetry run python scripts/bench_book_suggest.py --books 1000000
+"""
+
+import argparse
+import gc
+import itertools
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+current_dir = Path(__file__).parent
+root_dir = current_dir.parent
+sys.path.append(str(root_dir))
+os.environ.setdefault("SECRET_KEY", "bench-secret-key")
+
+from src.books.suggest import BookSuggestIndex  # noqa: E402
+
+LETTERS = "абвгдежзийклмнопрстуфхцчшщэюя"
+
+
+def make_vocabulary(rng: random.Random, size: int) -> list[str]:
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choices(LETTERS, k=rng.randint(3, 12))))
+    return sorted(words)
+
+
+def generate_books(args: argparse.Namespace, vocabulary: list[str]):
+    rng = random.Random(args.seed)
+    cum_weights = list(
+        itertools.accumulate(1 / (rank + 1) for rank in range(len(vocabulary)))
+    )
+    authors = [
+        f"{rng.choice(vocabulary).title()} {rng.choice(vocabulary).title()}"
+        for _ in range(args.authors)
+    ]
+    for book_id in range(1, args.books + 1):
+        words = rng.choices(vocabulary, cum_weights=cum_weights, k=rng.randint(1, 6))
+        yield book_id, " ".join(words).capitalize(), rng.choice(authors)
+
+
+def percentile(samples: list[float], share: float) -> float:
+    return sorted(samples)[int(len(samples) * share) - 1]
+
+
+def measure(index: BookSuggestIndex, queries: list[str]) -> list[float]:
+    samples = []
+    for query in queries:
+        started = time.perf_counter()
+        index.suggest(query, 10)
+        samples.append((time.perf_counter() - started) * 1e6)
+    return samples
+
+
+def main(args: argparse.Namespace):
+    rng = random.Random(args.seed)
+    vocabulary = make_vocabulary(rng, args.words)
+    books = list(generate_books(args, vocabulary))
+
+    started = time.perf_counter()
+    BookSuggestIndex._build(books)
+    build = time.perf_counter() - started
+
+    # Второй раз под tracemalloc: трассировка сильно замедляет построение
+    gc.collect()
+    tracemalloc.start()
+    index = BookSuggestIndex(rebuild_interval=60)
+    index._store = index._build(books)
+    index.loaded = True
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"books={args.books} words={len(index._store.words)} "
+        f"build={build:.1f}s memory={retained / 2**20:.1f} MiB "
+        f"({retained / args.books:.0f} B/book, peak {peak / 2**20:.1f} MiB)"
+    )
+
+    for length in (1, 2, 3, 5):
+        queries = [rng.choice(vocabulary)[:length] for _ in range(args.queries)]
+        samples = measure(index, queries)
+        print(
+            f"prefix of {length} chars:   p50={statistics.median(samples):6.1f}us "
+            f"p99={percentile(samples, 0.99):6.1f}us"
+        )
+
+    queries = []
+    for _ in range(args.queries):
+        _, title, author = rng.choice(books)
+        queries.append(f"{author.split()[0][:4]} {title.split()[0][:3]}")
+    samples = measure(index, queries)
+    print(
+        f"two words:            p50={statistics.median(samples):6.1f}us "
+        f"p99={percentile(samples, 0.99):6.1f}us"
+    )
+
+    samples = []
+    for book_id in range(args.books + 1, args.books + 1 + args.queries):
+        title = " ".join(rng.choices(vocabulary, k=3))
+        started = time.perf_counter()
+        index.book_saved(book_id, title, "Новый Автор")
+        samples.append((time.perf_counter() - started) * 1e6)
+    print(
+        f"add book:             p50={statistics.median(samples):6.1f}us "
+        f"p99={percentile(samples, 0.99):6.1f}us"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--books", type=int, default=1_000_000)
+    parser.add_argument("--words", type=int, default=200_000)
+    parser.add_argument("--authors", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=42)
+    main(parser.parse_args())
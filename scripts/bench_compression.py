@@ -0,0 +1,158 @@
+"""
+Экономия трафика и затраты процессора на сжатие ответов по маршрутам.
+
+Заполняет временную SQLite книгами, отзывами и избранным пользователя,
+получает несжатые ответы основных списков и для каждой кодировки (gzip,
+zstd при установленном zstandard) замеряет размер после сжатия и
+процессорное время сжатия одного ответа теми же кодировщиками, что
+и CompressionMiddleware.
+
+    poetry run python scripts/bench_compression.py --books 2000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+current_dir = Path(__file__).parent
+root_dir = current_dir.parent
+sys.path.append(str(root_dir))
+os.environ.setdefault("SECRET_KEY", "bench-secret-key")
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+# Ответы нужны несжатыми: сжатие замеряется отдельно
+os.environ["COMPRESSION_ENABLED"] = "false"
+
+from httpx import ASGITransport, AsyncClient  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+
+from src.books.models import BookModel  # noqa: E402
+from src.favorites.models import FavoriteModel  # noqa: E402
+from src.main import create_app  # noqa: E402
+from src.reviews.models import ReviewModel  # noqa: E402
+from src.shared import database  # noqa: E402
+from src.shared.compression import (  # noqa: E402
+    GzipEncoder,
+    ZstdEncoder,
+    available_encodings,
+)
+from src.shared.config import settings  # noqa: E402
+from src.shared.database import Base, get_db  # noqa: E402
+
+AUTHORS = ["Лев Толстой", "Фёдор Достоевский", "Антон Чехов", "Иван Тургенев"]
+WORDS = "война мир преступление наказание идиот бесы отцы дети вишнёвый сад".split()
+
+ROUTES = {
+    "GET /books/?limit=100": "/books/?limit=100",
+    "GET /books/?sort=-rating&limit=20": "/books/?sort=-rating&limit=20",
+    "GET /books/facets": "/books/facets?authors=100",
+    "GET /books/search?q=достаевский": "/books/search?q=достаевский&limit=50",
+    "GET /reviews/?limit=100": "/reviews/?limit=100",
+    "GET /favorites/me?limit=100": "/favorites/me?limit=100",
+    "GET /openapi.json": "/openapi.json",
+}
+
+
+async def fill(engine, args: argparse.Namespace, user_id: int) -> None:
+    rng = random.Random(args.seed)
+    books = [
+        {
+            "title": " ".join(rng.choices(WORDS, k=rng.randint(1, 4))).capitalize(),
+            "author": rng.choice(AUTHORS),
+            "pages": rng.randint(50, 1500),
+            "rating": round(rng.uniform(0, 5), 1),
+        }
+        for _ in range(args.books)
+    ]
+    async with engine.begin() as conn:
+        await conn.execute(BookModel.__table__.insert(), books)
+        await conn.execute(
+            ReviewModel.__table__.insert(),
+            [
+                {
+                    "text": " ".join(rng.choices(WORDS, k=rng.randint(5, 40))),
+                    "rating": rng.randint(1, 5),
+                    "book_id": rng.randint(1, args.books),
+                    "user_id": user_id,
+                }
+                for _ in range(args.reviews)
+            ],
+        )
+        await conn.execute(
+            FavoriteModel.__table__.insert(),
+            [
+                {"user_id": user_id, "book_id": book_id}
+                for book_id in rng.sample(range(1, args.books + 1), 100)
+            ],
+        )
+
+
+def measure(encoder_class, level: int, body: bytes, repeat: int):
+    started = time.thread_time()
+    for _ in range(repeat):
+        compressed = encoder_class(level).finish(body)
+    return len(compressed), (time.thread_time() - started) / repeat
+
+
+async def main(args: argparse.Namespace):
+    app = create_app()
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp}/bench.db")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+
+        async def override_get_db():
+            async with session_factory() as session:
+                yield session
+
+        app.dependency_overrides[get_db] = override_get_db
+        database._session_factory = session_factory
+
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://bench"
+        ) as client:
+            credentials = {"username": "reader", "password": "password"}
+            user = await client.post(
+                "/users/", json={**credentials, "email": "reader@example.com"}
+            )
+            await fill(engine, args, user.json()["id"])
+            login = await client.post("/auth/login", json=credentials)
+            headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+            encoders = {"gzip": (GzipEncoder, settings.COMPRESSION_GZIP_LEVEL)}
+            if "zstd" in available_encodings():
+                encoders["zstd"] = (ZstdEncoder, settings.COMPRESSION_ZSTD_LEVEL)
+            else:
+                print("zstandard is not installed: zstd skipped")
+
+            print(
+                f"{'route':36} {'encoding':8} {'bytes':>8} {'sent':>8} "
+                f"{'saved':>6} {'cpu':>9} {'MB/s':>6}"
+            )
+            for name, url in ROUTES.items():
+                response = await client.get(url, headers=headers)
+                response.raise_for_status()
+                body = response.content
+                for encoding, (encoder_class, level) in encoders.items():
+                    size, cpu = measure(encoder_class, level, body, args.repeat)
+                    print(
+                        f"{name:36} {encoding:8} {len(body):8} {size:8} "
+                        f"{1 - size / len(body):6.1%} {cpu * 1e6:7.0f}us "
+                        f"{len(body) / cpu / 2**20:6.0f}"
+                    )
+
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--books", type=int, default=2000)
+    parser.add_argument("--reviews", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,106 @@
+"""
+Накладные расходы Python на частые CRUD-запросы.
+
+Сравнивает запрос, собираемый заново на каждый вызов, lambda_stmt и заранее
+собранный запрос с bindparam (как в CRUDBase.get). Показывает время сборки
+запроса вместе с вычислением ключа кэша и полное время выполнения
+на in-memory SQLite.
+
+    poetry run python scripts/bench_crud_statements.py --iterations 20000
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+current_dir = Path(__file__).parent
+root_dir = current_dir.parent
+sys.path.append(str(root_dir))
+os.environ.setdefault("SECRET_KEY", "bench-secret-key")
+
+from sqlalchemy import bindparam, lambda_stmt, select  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+
+from src.main import create_app  # noqa: E402
+from src.shared.database import Base  # noqa: E402
+from src.users.models import UserModel  # noqa: E402
+
+USERNAME = "bench_user"
+
+
+def rebuilt(username: str):
+    return select(UserModel).where(
+        UserModel.username == username, UserModel.is_active
+    ), None
+
+
+def lambda_statement(username: str):
+    return lambda_stmt(
+        lambda: select(UserModel).where(
+            UserModel.username == username, UserModel.is_active
+        )
+    ), None
+
+
+prebuilt_statement = select(UserModel).where(
+    UserModel.username == bindparam("username"), UserModel.is_active
+)
+
+
+def prebuilt(username: str):
+    return prebuilt_statement, {"username": username}
+
+
+VARIANTS = {"rebuilt": rebuilt, "lambda_stmt": lambda_statement, "prebuilt": prebuilt}
+
+
+def bench_build(build, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        statement, _ = build(USERNAME)
+        statement._generate_cache_key()
+    return (time.perf_counter() - started) / iterations
+
+
+async def bench_execute(session_factory, build, iterations: int) -> float:
+    async with session_factory() as db:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            statement, params = build(USERNAME)
+            result = await db.execute(statement, params)
+            result.scalar_one()
+        return (time.perf_counter() - started) / iterations
+
+
+async def main(args: argparse.Namespace):
+    # Импортирует роутеры, а вместе с ними все модели в Base.metadata
+    create_app()
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(
+            UserModel.__table__.insert(),
+            {"username": USERNAME, "email": "bench@example.com", "password_hash": "x"},
+        )
+    session_factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+
+    for name, build in VARIANTS.items():
+        # Первый вызов компилирует запрос и кладёт его в кэш движка
+        await bench_execute(session_factory, build, 1)
+        build_time = bench_build(build, args.iterations)
+        execute_time = await bench_execute(session_factory, build, args.iterations)
+        print(
+            f"{name:<12} build+cache key={build_time * 1e6:7.1f}us "
+            f"execute={execute_time * 1e6:7.1f}us"
+        )
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=20000)
+    asyncio.run(main(parser.parse_args()))
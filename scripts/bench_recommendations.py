@@ -0,0 +1,129 @@
+"""
+Время и память перестройки персональных рекомендаций по оценкам.
+
+Заполняет временную SQLite синтетическими отзывами (популярность книг
+распределена по Ципфу), затем перестраивает RatingRecommendationIndex:
+сначала замеряет время, затем — под tracemalloc — пиковую память перестройки
+и память, которую индекс занимает после неё.
+
+    poetry run python scripts/bench_recommendations.py --ratings 1000000
+"""
+
+import argparse
+import asyncio
+import gc
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+current_dir = Path(__file__).parent
+root_dir = current_dir.parent
+sys.path.append(str(root_dir))
+os.environ.setdefault("SECRET_KEY", "bench-secret-key")
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+
+from src.main import create_app  # noqa: E402
+from src.recommendations.index import RatingRecommendationIndex  # noqa: E402
+from src.reviews.models import ReviewModel  # noqa: E402
+from src.shared.database import Base  # noqa: E402
+
+CHUNK = 50_000
+
+
+def generate_ratings(args: argparse.Namespace):
+    """(user_id, book_id, rating) без повторов пары пользователь-книга"""
+    rng = random.Random(args.seed)
+    weights = [1 / (rank + 1) ** 0.8 for rank in range(args.books)]
+    per_user = args.ratings // args.users
+    for user_id in range(1, args.users + 1):
+        books = set(rng.choices(range(1, args.books + 1), weights, k=per_user))
+        for book_id in books:
+            yield user_id, book_id, rng.randint(1, 5)
+
+
+async def fill(engine, args: argparse.Namespace) -> int:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    total = 0
+    rows = []
+    for user_id, book_id, rating in generate_ratings(args):
+        rows.append(
+            {"user_id": user_id, "book_id": book_id, "rating": rating, "text": ""}
+        )
+        if len(rows) == CHUNK:
+            async with engine.begin() as conn:
+                await conn.execute(ReviewModel.__table__.insert(), rows)
+            total += len(rows)
+            rows = []
+    if rows:
+        async with engine.begin() as conn:
+            await conn.execute(ReviewModel.__table__.insert(), rows)
+        total += len(rows)
+    return total
+
+
+async def rebuild(session_factory, args: argparse.Namespace):
+    index = RatingRecommendationIndex(
+        top_n=args.top_n, neighbours=args.neighbours, rebuild_interval=60
+    )
+    async with session_factory() as db:
+        await index.rebuild(db)
+    return index
+
+
+async def main(args: argparse.Namespace):
+    # Импортирует роутеры, а вместе с ними все модели в Base.metadata
+    create_app()
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp}/bench.db")
+        session_factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+
+        started = time.perf_counter()
+        total = await fill(engine, args)
+        print(
+            f"ratings={total} users={args.users} books={args.books} "
+            f"(filled in {time.perf_counter() - started:.1f}s)"
+        )
+
+        started = time.perf_counter()
+        index = await rebuild(session_factory, args)
+        print(f"rebuild: {time.perf_counter() - started:.2f}s")
+
+        # Объекты, созданные до перестройки, tracemalloc не видит
+        del index
+        gc.collect()
+        tracemalloc.start()
+        index = await rebuild(session_factory, args)
+        gc.collect()
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(
+            f"memory: peak={peak / 2**20:.1f} MiB "
+            f"retained={retained / 2**20:.1f} MiB "
+            f"users={len(index._by_user)}"
+        )
+
+        started = time.perf_counter()
+        for user_id in range(1, args.users + 1):
+            index.for_user(user_id, 10)
+        lookup = (time.perf_counter() - started) / args.users
+        print(f"lookup: {lookup * 1e6:.1f}us per user")
+
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--ratings", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=50_000)
+    parser.add_argument("--books", type=int, default=10_000)
+    parser.add_argument("--top-n", type=int, default=50)
+    parser.add_argument("--neighbours", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,134 @@
+"""
+Время холодного старта и первого запроса с прогревом и без него.
+
+Каждый замер выполняется в новом процессе на временной SQLite: импорт
+`src.main`, `create_app()`, lifespan (прогрев) и первые запросы к списку книг
+и к `/auth/login`.
+
+    poetry run python scripts/bench_startup.py --runs 5
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+current_dir = Path(__file__).parent
+root_dir = current_dir.parent
+sys.path.append(str(root_dir))
+
+USERNAME = "bench_user"
+PASSWORD = "bench-password"
+METRICS = ["import", "create_app", "startup", "first_list", "first_login", "second"]
+
+
+async def child():
+    started = time.perf_counter()
+    from src.main import create_app
+
+    imported = time.perf_counter()
+    app = create_app()
+    created = time.perf_counter()
+
+    from httpx import ASGITransport, AsyncClient
+
+    async with app.router.lifespan_context(app):
+        ready = time.perf_counter()
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            await client.get("/books/")
+            first_list = time.perf_counter()
+            await client.post(
+                "/auth/login", json={"username": USERNAME, "password": PASSWORD}
+            )
+            first_login = time.perf_counter()
+            await client.get("/books/")
+            second = time.perf_counter()
+
+    timings = {
+        "import": imported - started,
+        "create_app": created - imported,
+        "startup": ready - created,
+        "first_list": first_list - ready,
+        "first_login": first_login - first_list,
+        "second": second - first_login,
+    }
+    # Последняя строка вывода; SQLite-движок пишет SQL-лог в stdout
+    print(json.dumps(timings))
+
+
+async def prepare_database(path: str):
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    from src.main import create_app
+    from src.shared.database import Base
+    from src.users.crud import user as user_crud
+    from src.users.schemas import UserCreate
+
+    # Импортирует роутеры, а вместе с ними все модели в Base.metadata
+    create_app()
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with async_sessionmaker(bind=engine, expire_on_commit=False)() as db:
+        await user_crud.create(
+            db,
+            UserCreate(username=USERNAME, email="bench@example.com", password=PASSWORD),
+        )
+    await engine.dispose()
+
+
+def measure(db_path: str, warmup: bool) -> dict[str, float]:
+    env = {
+        **os.environ,
+        "DB_TYPE": "sqlite",
+        "SQLITE_DB_PATH": db_path,
+        "WARMUP_ENABLED": str(warmup).lower(),
+        "RATE_LIMIT_ENABLED": "false",
+        "LOGIN_THROTTLE_ENABLED": "false",
+        "SECRET_KEY": os.environ.get("SECRET_KEY", "bench-secret-key"),
+    }
+    output = subprocess.run(
+        [sys.executable, __file__, "--child"],
+        cwd=root_dir,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def report(name: str, runs: list[dict[str, float]]):
+    columns = " ".join(
+        f"{metric}={statistics.median(run[metric] for run in runs) * 1000:7.1f}ms"
+        for metric in METRICS
+    )
+    print(f"{name:<12} {columns}")
+
+
+def main(args: argparse.Namespace):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = f"{tmp_dir}/bench.db"
+        asyncio.run(prepare_database(db_path))
+
+        for warmup in (False, True):
+            runs = [measure(db_path, warmup) for _ in range(args.runs)]
+            report("warm-up on" if warmup else "warm-up off", runs)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        asyncio.run(child())
+    else:
+        main(args)
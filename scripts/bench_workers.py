@@ -0,0 +1,145 @@
+"""
+Сравнение пропускной способности при одном и нескольких воркерах.
+
+Для каждого числа воркеров запускает `run.py` в production-режиме на временной
+SQLite с несколькими книгами и нагружает `GET /books/` и `GET /books/{id}`.
+
+    poetry run python scripts/bench_workers.py --workers 1 4 --concurrency 64
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+current_dir = Path(__file__).parent
+root_dir = current_dir.parent
+sys.path.append(str(root_dir))
+
+from httpx import AsyncClient, HTTPError  # noqa: E402
+from sqlalchemy.ext.asyncio import create_async_engine  # noqa: E402
+
+from src.books.models import BookModel  # noqa: E402
+from src.main import create_app  # noqa: E402
+from src.shared.database import Base  # noqa: E402
+
+BOOKS = 200
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def prepare_database(path: str):
+    # Импортирует роутеры, а вместе с ними все модели в Base.metadata
+    create_app()
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(
+            BookModel.__table__.insert(),
+            [
+                {"title": f"Book {i}", "author": f"Author {i % 20}", "pages": 100 + i}
+                for i in range(BOOKS)
+            ],
+        )
+    await engine.dispose()
+
+
+async def wait_until_ready(client: AsyncClient, timeout: float = 30.0):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            await client.get("/books/", params={"limit": 1})
+            return
+        except HTTPError:
+            await asyncio.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+async def load(client: AsyncClient, stop_at: float, latencies: list[float], seed: int):
+    index = seed
+    while time.perf_counter() < stop_at:
+        index += 1
+        started = time.perf_counter()
+        if index % 2:
+            await client.get("/books/", params={"limit": 20})
+        else:
+            await client.get(f"/books/{index % BOOKS + 1}")
+        latencies.append(time.perf_counter() - started)
+
+
+async def bench(workers: int, db_path: str, args: argparse.Namespace):
+    port = free_port()
+    env = {
+        **os.environ,
+        "APP_ENV": "production",
+        "DB_TYPE": "sqlite",
+        "SQLITE_DB_PATH": db_path,
+        "HOST": "127.0.0.1",
+        "PORT": str(port),
+        "WORKERS": str(workers),
+        "RATE_LIMIT_ENABLED": "false",
+        "SECRET_KEY": os.environ.get("SECRET_KEY", "bench-secret-key"),
+    }
+    server = subprocess.Popen(
+        [sys.executable, "run.py"],
+        cwd=root_dir,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        async with AsyncClient(
+            base_url=f"http://127.0.0.1:{port}", timeout=30
+        ) as client:
+            await wait_until_ready(client)
+
+            latencies: list[float] = []
+            started = time.perf_counter()
+            stop_at = started + args.duration
+            await asyncio.gather(
+                *(load(client, stop_at, latencies, i) for i in range(args.concurrency))
+            )
+            elapsed = time.perf_counter() - started
+    finally:
+        server.terminate()
+        server.wait(timeout=args.duration + 30)
+
+    print(
+        f"workers={workers:<3} requests={len(latencies):<7} "
+        f"rps={len(latencies) / elapsed:8.1f} "
+        f"p50={statistics.median(latencies) * 1000:7.1f}ms "
+        f"p99={percentile(latencies, 0.99) * 1000:7.1f}ms"
+    )
+
+
+async def main(args: argparse.Namespace):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = f"{tmp_dir}/bench.db"
+        await prepare_database(db_path)
+        for workers in args.workers:
+            await bench(workers, db_path, args)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count()])
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10.0)
+    asyncio.run(main(parser.parse_args()))
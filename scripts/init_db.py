@@ -6,17 +6,18 @@ current_dir = Path(__file__).parent
 root_dir = current_dir.parent
 sys.path.append(str(root_dir))
 
-from src.shared.database import Base, engine
+from src.shared.database import Base, dispose_engine, get_engine
 
 
 async def init_db():
     print("🔄 Creating database tables...")
+    engine = get_engine()
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
         await conn.run_sync(Base.metadata.create_all)
 
     print("✅ Database tables created successfully!")
-    await engine.dispose()
+    await dispose_engine()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,147 @@
+"""
+Нагрузочный тест защиты /auth/login от перебора паролей.
+
+Сравнивает задержки легитимных пользователей в трёх сценариях:
+без атаки, под атакой без ограничения попыток и под атакой с ограничением.
+Приложение запускается в том же процессе через ASGITransport на временной SQLite.
+
+    poetry run python scripts/loadtest_login.py --attackers 50 --attack-rate 10
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+current_dir = Path(__file__).parent
+root_dir = current_dir.parent
+sys.path.append(str(root_dir))
+os.environ.setdefault("SECRET_KEY", "loadtest-secret-key")
+
+from httpx import ASGITransport, AsyncClient  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+
+from src.auth.throttling import login_throttle  # noqa: E402
+from src.main import create_app  # noqa: E402
+from src.shared.database import Base, get_db  # noqa: E402
+from src.users.crud import user as user_crud  # noqa: E402
+from src.users.schemas import UserCreate  # noqa: E402
+
+app = create_app()
+
+VICTIM = "victim_user"
+PASSWORD = "legit-password"
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+async def legit_user(username: str, stop_at: float, latencies: list[float]):
+    transport = ASGITransport(app=app, client=(f"192.168.0.{hash(username) % 250}", 1))
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        while time.perf_counter() < stop_at:
+            started = time.perf_counter()
+            response = await client.post(
+                "/auth/login", json={"username": username, "password": PASSWORD}
+            )
+            latencies.append(time.perf_counter() - started)
+            headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+            for _ in range(5):
+                started = time.perf_counter()
+                await client.get("/users/me", headers=headers)
+                latencies.append(time.perf_counter() - started)
+            await asyncio.sleep(0.05)
+
+
+async def attacker(index: int, stop_at: float, rate: float, statuses: dict[int, int]):
+    transport = ASGITransport(app=app, client=(f"10.0.{index // 250}.{index % 250}", 1))
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        attempt = 0
+        while time.perf_counter() < stop_at:
+            attempt += 1
+            response = await client.post(
+                "/auth/login",
+                json={"username": VICTIM, "password": f"guess-{index}-{attempt}"},
+            )
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            # Генератор нагрузки делит event loop с приложением, поэтому темп ограничен
+            await asyncio.sleep(1 / rate)
+
+
+async def run_scenario(
+    name: str, users: list[str], args: argparse.Namespace, attack: bool, throttle: bool
+):
+    await login_throttle.backend.reset()
+    login_throttle.enabled = throttle
+
+    latencies: list[float] = []
+    statuses: dict[int, int] = {}
+    stop_at = time.perf_counter() + args.duration
+    attackers = args.attackers if attack else 0
+
+    await asyncio.gather(
+        *(legit_user(username, stop_at, latencies) for username in users),
+        *(attacker(i, stop_at, args.attack_rate, statuses) for i in range(attackers)),
+    )
+
+    print(
+        f"{name:<28} requests={len(latencies):<6} "
+        f"p50={statistics.median(latencies) * 1000:7.1f}ms "
+        f"p95={percentile(latencies, 0.95) * 1000:7.1f}ms "
+        f"p99={percentile(latencies, 0.99) * 1000:7.1f}ms "
+        f"attack statuses={dict(sorted(statuses.items()))}"
+    )
+
+
+async def main(args: argparse.Namespace):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_dir}/loadtest.db")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+        session_factory = async_sessionmaker(
+            bind=engine, expire_on_commit=False, autoflush=False
+        )
+
+        async def override_get_db():
+            async with session_factory() as session:
+                yield session
+
+        app.dependency_overrides[get_db] = override_get_db
+
+        users = [f"legit_user_{i}" for i in range(args.users)]
+        async with session_factory() as db:
+            for username in [VICTIM, *users]:
+                await user_crud.create(
+                    db,
+                    UserCreate(
+                        username=username,
+                        email=f"{username}@example.com",
+                        password=PASSWORD,
+                    ),
+                )
+
+        await run_scenario("baseline (no attack)", users, args, False, True)
+        await run_scenario("attack, throttling off", users, args, True, False)
+        await run_scenario("attack, throttling on", users, args, True, True)
+
+        app.dependency_overrides.clear()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=5)
+    parser.add_argument("--attackers", type=int, default=50)
+    parser.add_argument("--attack-rate", type=float, default=10.0)
+    parser.add_argument("--duration", type=float, default=10.0)
+    asyncio.run(main(parser.parse_args()))
@@ -1,13 +1,25 @@
 from datetime import datetime, timezone
 
-from sqlalchemy import select, update
+from sqlalchemy import func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.admins.schemas import UserAdminUpdate
+from src.admins.schemas import (
+    BulkUserAction,
+    UserAdminUpdate,
+    UserCriteria,
+    UserFilter,
+    UserSearchParams,
+)
+from src.shared.counts import row_count
 from src.shared.crud_base import CRUDBase
+from src.users.crud import user_count
 from src.users.models import UserModel
 from src.users.schemas import UserCreate, UserUpdate
 
+admin_count = row_count("admins", UserModel, UserModel.is_admin, UserModel.is_active)
+banned_count = row_count("banned", UserModel, UserModel.is_banned)
+inactive_count = row_count("inactive", UserModel, ~UserModel.is_active)
+
 
 class CRUDAdmin(CRUDBase[UserModel, UserCreate, UserUpdate]):
     async def get_admins(
@@ -16,6 +28,7 @@ class CRUDAdmin(CRUDBase[UserModel, UserCreate, UserUpdate]):
         result = await db.scalars(
             select(self.model)
             .where(self.model.is_admin, self.model.is_active)
+            .order_by(self.model.id)
             .offset(skip)
             .limit(limit)
         )
@@ -27,6 +40,7 @@ class CRUDAdmin(CRUDBase[UserModel, UserCreate, UserUpdate]):
         result = await db.scalars(
             select(self.model)
             .where(self.model.is_banned)
+            .order_by(self.model.id)
             .offset(skip)
             .limit(limit)
         )
@@ -37,12 +51,61 @@ class CRUDAdmin(CRUDBase[UserModel, UserCreate, UserUpdate]):
     ) -> list[UserModel]:
         result = await db.scalars(
             select(self.model)
-            .where(not self.model.is_active)
+            .where(~self.model.is_active)
+            .order_by(self.model.id)
             .offset(skip)
             .limit(limit)
         )
         return result.all()
 
+    async def search(
+        self, db: AsyncSession, params: UserSearchParams
+    ) -> tuple[list[UserModel], int | None]:
+        """
+        Страница пользователей по фильтрам, от новых к старым, с курсором по id
+        вместо OFFSET. С `with_total` число всех подходящих пользователей
+        считается оконной функцией в том же запросе: окно вычисляется
+        до курсора и LIMIT, поэтому это полный итог, а не остаток.
+        """
+        conditions = self._filter_conditions(params)
+
+        if not params.with_total:
+            query = select(self.model).where(*conditions)
+            if params.cursor is not None:
+                query = query.where(self.model.id < params.cursor)
+            result = await db.scalars(
+                query.order_by(self.model.id.desc()).limit(params.limit)
+            )
+            return result.all(), None
+
+        matching = (
+            select(self.model.id, func.count().over().label("total"))
+            .where(*conditions)
+            .subquery()
+        )
+        query = select(self.model, matching.c.total).join(
+            matching, matching.c.id == self.model.id
+        )
+        if params.cursor is not None:
+            query = query.where(matching.c.id < params.cursor)
+        rows = (
+            await db.execute(query.order_by(matching.c.id.desc()).limit(params.limit))
+        ).all()
+        if rows:
+            return [user for user, _ in rows], rows[0].total
+        if params.cursor is None:
+            return [], 0
+        # Курсор за последней страницей: окну не из чего вернуть итог
+        total = await db.scalar(
+            select(func.count()).select_from(self.model).where(*conditions)
+        )
+        return [], total
+
+    def _flags_changed(self) -> None:
+        # Следующий запрос списка пересчитает итог по частичному индексу
+        for count in (admin_count, banned_count, inactive_count, user_count):
+            count.reset()
+
     async def _update_admin_status(
         self, db: AsyncSession, user_id: int, is_admin: bool
     ) -> UserModel | None:
@@ -50,6 +113,7 @@ class CRUDAdmin(CRUDBase[UserModel, UserCreate, UserUpdate]):
             update(self.model).where(self.model.id == user_id).values(is_admin=is_admin)
         )
         await db.commit()
+        self._flags_changed()
         return await self.get(db, user_id)
 
     async def promote_admin(self, db: AsyncSession, user_id: int) -> UserModel | None:
@@ -71,6 +135,7 @@ class CRUDAdmin(CRUDBase[UserModel, UserCreate, UserUpdate]):
             )
         )
         await db.commit()
+        self._flags_changed()
         return await self.get(db, user_id)
 
     async def unban_user(self, db: AsyncSession, user_id: int) -> UserModel | None:
@@ -80,6 +145,7 @@ class CRUDAdmin(CRUDBase[UserModel, UserCreate, UserUpdate]):
             .values(is_banned=False, banned_at=None, ban_reason=None)
         )
         await db.commit()
+        self._flags_changed()
         return await self.get(db, user_id)
 
     async def deactivate_user(self, db: AsyncSession, user_id: int) -> UserModel | None:
@@ -87,6 +153,7 @@ class CRUDAdmin(CRUDBase[UserModel, UserCreate, UserUpdate]):
             update(self.model).where(self.model.id == user_id).values(is_active=False)
         )
         await db.commit()
+        self._flags_changed()
         return await self.get(db, user_id)
 
     async def activate_user(self, db: AsyncSession, user_id: int) -> UserModel | None:
@@ -94,17 +161,133 @@ class CRUDAdmin(CRUDBase[UserModel, UserCreate, UserUpdate]):
             update(self.model).where(self.model.id == user_id).values(is_active=True)
         )
         await db.commit()
+        self._flags_changed()
         return await self.get(db, user_id)
 
+    def _bulk_changes(
+        self, action: BulkUserAction, ban_reason: str | None
+    ) -> tuple[dict, list]:
+        """
+        Новые значения и условие «строка действительно изменится» для действия:
+        так RETURNING возвращает только затронутых пользователей
+        """
+        if action == "ban":
+            values = {
+                "is_banned": True,
+                "banned_at": datetime.now(timezone.utc),
+                "ban_reason": ban_reason,
+            }
+            # Администраторов забанить нельзя
+            return values, [~self.model.is_banned, ~self.model.is_admin]
+        if action == "unban":
+            values = {"is_banned": False, "banned_at": None, "ban_reason": None}
+            return values, [self.model.is_banned]
+        if action == "activate":
+            return {"is_active": True}, [~self.model.is_active]
+        if action == "deactivate":
+            return {"is_active": False}, [self.model.is_active]
+        if action == "promote":
+            return {"is_admin": True}, [~self.model.is_admin]
+        return {"is_admin": False}, [self.model.is_admin]
+
+    def _filter_conditions(self, filters: UserCriteria) -> list:
+        conditions = []
+        if filters.created_after is not None:
+            conditions.append(self.model.created_at >= filters.created_after)
+        if filters.created_before is not None:
+            conditions.append(self.model.created_at < filters.created_before)
+        if filters.username_prefix is not None:
+            conditions.append(
+                self.model.username.startswith(filters.username_prefix, autoescape=True)
+            )
+        if filters.email_prefix is not None:
+            conditions.append(
+                self.model.email.startswith(filters.email_prefix, autoescape=True)
+            )
+        if filters.email_domain is not None:
+            conditions.append(
+                self.model.email.endswith(f"@{filters.email_domain}", autoescape=True)
+            )
+        for field in ("is_active", "is_banned", "is_admin"):
+            value = getattr(filters, field)
+            if value is not None:
+                conditions.append(getattr(self.model, field) == value)
+        return conditions
+
+    async def bulk_action(
+        self,
+        db: AsyncSession,
+        action: BulkUserAction,
+        exclude_id: int,
+        chunk_size: int,
+        user_ids: list[int] | None = None,
+        filters: UserFilter | None = None,
+        ban_reason: str | None = None,
+    ) -> list[int]:
+        """
+        Применяет действие к пользователям по списку ID или по фильтру
+        запросами UPDATE ... WHERE id IN (...) RETURNING id порциями по
+        `chunk_size`; каждая порция фиксируется отдельно, чтобы не держать
+        блокировки на всё множество. Возвращает ID изменённых пользователей.
+        """
+        values, conditions = self._bulk_changes(action, ban_reason)
+        conditions.append(self.model.id != exclude_id)
+        if filters is not None:
+            conditions.extend(self._filter_conditions(filters))
+
+        affected = []
+        async for chunk in self._id_chunks(db, conditions, chunk_size, user_ids):
+            result = await db.execute(
+                update(self.model)
+                .where(self.model.id.in_(chunk), *conditions)
+                .values(**values)
+                .returning(self.model.id)
+                .execution_options(synchronize_session=False)
+            )
+            affected.extend(result.scalars().all())
+            await db.commit()
+        if affected:
+            self._flags_changed()
+        return affected
+
+    async def _id_chunks(
+        self,
+        db: AsyncSession,
+        conditions: list,
+        chunk_size: int,
+        user_ids: list[int] | None,
+    ):
+        if user_ids is not None:
+            ids = sorted(set(user_ids))
+            for start in range(0, len(ids), chunk_size):
+                yield ids[start : start + chunk_size]
+            return
+
+        # Обход по возрастанию id: строки, изменённые предыдущей порцией,
+        # повторно не выбираются, даже если всё ещё подходят под фильтр
+        last_id = 0
+        while True:
+            result = await db.scalars(
+                select(self.model.id)
+                .where(self.model.id > last_id, *conditions)
+                .order_by(self.model.id)
+                .limit(chunk_size)
+            )
+            ids = result.all()
+            if not ids:
+                return
+            yield ids
+            last_id = ids[-1]
+
     async def update_user_admin(
         self, db: AsyncSession, user_id: int, admin_update: UserAdminUpdate
     ) -> UserModel | None:
         update_data = admin_update.model_dump(exclude_unset=True)
 
         if "password" in update_data:
-            from src.auth.utils import get_password_hash
+            from src.auth.utils import get_password_hash_async
 
-            update_data["password_hash"] = get_password_hash(
+            update_data["password_hash"] = await get_password_hash_async(
                 update_data.pop("password")
             )
 
@@ -114,6 +297,7 @@ class CRUDAdmin(CRUDBase[UserModel, UserCreate, UserUpdate]):
             )
             await db.commit()
 
+        self._flags_changed()
         return await self.get(db, user_id)
 
 
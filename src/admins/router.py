@@ -1,18 +1,70 @@
-from fastapi import APIRouter
+from typing import Annotated
+
+from fastapi import APIRouter, Depends
 
 from src.admins.crud import admin as admin_crud
-from src.admins.schemas import AdminUserResponse, UserBanRequest
+from src.admins.crud import admin_count, banned_count, inactive_count
+from src.admins.schemas import (
+    AdminUserPage,
+    AdminUserResponse,
+    BulkUserAction,
+    BulkUserActionRequest,
+    BulkUserActionResponse,
+    UserBanRequest,
+    UserSearchParams,
+)
+from src.auth.crud import session as session_crud
 from src.auth.dependencies import AdminDep
+from src.auth.revocation import revocation_filter
+from src.shared.config import settings
 from src.shared.database import DatabaseDep
 from src.shared.exceptions import NotFoundException, ValidationException
 from src.shared.pagination import PaginationDep
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
+UserSearchDep = Annotated[UserSearchParams, Depends(UserSearchParams)]
+
+
+@router.get(
+    "/users",
+    response_model=AdminUserPage,
+    summary="Search users",
+    responses={
+        200: {"description": "Page of users retrieved successfully"},
+        403: {"description": "Permission denied"},
+        422: {"description": "Invalid filter or pagination parameters"},
+        500: {"description": "Internal server error"},
+    },
+)
+async def search_users(db: DatabaseDep, current_admin: AdminDep, params: UserSearchDep):
+    """
+    ## Search users with combinable filters, newest first
+
+    **Query parameters:**
+    - **is_admin**, **is_banned**, **is_active**: filter by flag
+    - **created_after**, **created_before**: registration date range
+    - **username_prefix**, **email_prefix**, **email_domain**: text filters
+    - **limit**: Number of records to return (1-100), default: 10
+    - **cursor**: `next_cursor` from the previous page
+    - **with_total**: also return the number of all matching users
+
+    **Response:**
+    - **items**: users on this page
+    - **next_cursor**: pass it as `cursor` to get the next page; `null` on the last page
+    - **total**: number of matching users, only with `with_total=true`
+
+    <u>Note: only admins can make this request.</u>
+    """
+    users, total = await admin_crud.search(db, params)
+    next_cursor = users[-1].id if len(users) == params.limit else None
+    return {"items": users, "next_cursor": next_cursor, "total": total}
+
 
 @router.get(
     "/users/admins",
     response_model=list[AdminUserResponse],
+    dependencies=[Depends(admin_count)],
     summary="Get paginated list of admins",
     responses={
         200: {"description": "List of admins retrieved successfully"},
@@ -31,6 +83,9 @@ async def list_admins(
     - **skip**: Number of records to skip (min 0)
     - **limit**: Number of records to return (1-100), default: 10
 
+    **Response headers:**
+    - **X-Total-Count**: total number of admins
+
     <u>Note: only admins can make this request.</u>
     """
     return await admin_crud.get_admins(db, pagination.skip, pagination.limit)
@@ -39,6 +94,7 @@ async def list_admins(
 @router.get(
     "/users/banned",
     response_model=list[AdminUserResponse],
+    dependencies=[Depends(banned_count)],
     summary="Get paginated list of banned users",
     responses={
         200: {"description": "List of banned users retrieved successfully"},
@@ -57,6 +113,9 @@ async def list_banned_users(
     - **skip**: Number of records to skip (min 0)
     - **limit**: Number of records to return (1-100), default: 10
 
+    **Response headers:**
+    - **X-Total-Count**: total number of banned users
+
     <u>Note: only admins can make this request.</u>
     """
     return await admin_crud.get_banned_users(db, pagination.skip, pagination.limit)
@@ -65,6 +124,7 @@ async def list_banned_users(
 @router.get(
     "/users/inactive",
     response_model=list[AdminUserResponse],
+    dependencies=[Depends(inactive_count)],
     summary="Get paginated list of inactive users",
     responses={
         200: {"description": "List of inactive users retrieved successfully"},
@@ -83,11 +143,85 @@ async def list_inactive_users(
     - **skip**: Number of records to skip (min 0)
     - **limit**: Number of records to return (1-100), default: 10
 
+    **Response headers:**
+    - **X-Total-Count**: total number of inactive users
+
     <u>Note: only admins can make this request.</u>
     """
     return await admin_crud.get_inactive_users(db, pagination.skip, pagination.limit)
 
 
+# Действия, после которых выданные пользователю токены больше не должны работать
+SESSION_REVOKING_ACTIONS = {"ban", "deactivate", "demote"}
+
+
+# Объявлен до маршрутов /users/{user_id}/..., иначе "bulk" разбирался бы как user_id
+@router.post(
+    "/users/bulk/{action}",
+    response_model=BulkUserActionResponse,
+    summary="Apply an action to many users",
+    responses={
+        200: {"description": "Action applied"},
+        403: {"description": "Permission denied"},
+        422: {"description": "Unknown action, or neither/both of user_ids and filter"},
+        500: {"description": "Internal server error"},
+    },
+)
+async def bulk_user_action(
+    action: BulkUserAction,
+    request: BulkUserActionRequest,
+    db: DatabaseDep,
+    current_admin: AdminDep,
+):
+    """
+    ## Ban, unban, activate, deactivate, promote or demote many users at once
+
+    **Path parameters:**
+    - **action**: `ban`, `unban`, `activate`, `deactivate`, `promote` or `demote`
+
+    **Body** (exactly one of `user_ids` and `filter`):
+    - **user_ids**: up to 10 000 user IDs
+    - **filter**: `created_after`, `created_before`, `username_prefix`,
+    `email_domain`, `is_active`, `is_banned`, `is_admin`
+    - **ban_reason**: reason stored for `ban`
+
+    **Response:**
+    - **affected_ids**: users whose state actually changed; unknown IDs, users
+    already in the target state, yourself and (for `ban`) administrators are skipped
+    - **revoked_sessions**: sessions revoked after `ban`, `deactivate` and `demote`
+
+    <u>Note: users are updated in chunks of `ADMIN_BULK_CHUNK_SIZE`, each committed
+    separately, so a failure midway leaves the earlier chunks applied.</u>
+    """
+    affected = await admin_crud.bulk_action(
+        db,
+        action,
+        exclude_id=current_admin.id,
+        chunk_size=settings.ADMIN_BULK_CHUNK_SIZE,
+        user_ids=request.user_ids,
+        filters=request.filter,
+        ban_reason=request.ban_reason,
+    )
+
+    revoked = 0
+    if action in SESSION_REVOKING_ACTIONS:
+        chunk_size = settings.ADMIN_BULK_CHUNK_SIZE
+        for start in range(0, len(affected), chunk_size):
+            jtis = await session_crud.revoke_for_users(
+                db, affected[start : start + chunk_size]
+            )
+            for jti in jtis:
+                revocation_filter.add(jti)
+            revoked += len(jtis)
+
+    return {
+        "action": action,
+        "affected_ids": affected,
+        "count": len(affected),
+        "revoked_sessions": revoked,
+    }
+
+
 @router.post(
     "/users/{user_id}/promote",
     response_model=AdminUserResponse,
@@ -152,6 +286,10 @@ async def demote_admin(db: DatabaseDep, current_admin: AdminDep, user_id: int):
         raise NotFoundException(
             detail="User not found", resource_type="user", resource_id=user_id
         )
+
+    # Выданные ранее токены несут claim adm, поэтому сессии отзываются
+    for jti in await session_crud.revoke_for_users(db, [user_id]):
+        revocation_filter.add(jti)
     return user
 
 
@@ -1,6 +1,7 @@
 from datetime import datetime
+from typing import Literal
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 from src.users.schemas import User
 
@@ -24,3 +25,62 @@ class AdminUserResponse(User):
     ban_reason: str | None = Field(None, max_length=500, examples=["Плохо себя вёл"])
     is_admin: bool
     banned_at: datetime | None = None
+
+
+BulkUserAction = Literal["ban", "unban", "activate", "deactivate", "promote", "demote"]
+
+
+class UserCriteria(BaseModel):
+    created_after: datetime | None = None
+    created_before: datetime | None = None
+    username_prefix: str | None = Field(None, min_length=1, max_length=50)
+    email_prefix: str | None = Field(None, min_length=1, max_length=100)
+    email_domain: str | None = Field(None, min_length=1, max_length=100)
+    is_active: bool | None = None
+    is_banned: bool | None = None
+    is_admin: bool | None = None
+
+
+class UserFilter(UserCriteria):
+    @model_validator(mode="after")
+    def not_empty(self):
+        if not self.model_fields_set:
+            raise ValueError("Filter must set at least one field")
+        return self
+
+
+class BulkUserActionRequest(BaseModel):
+    user_ids: list[int] | None = Field(None, min_length=1, max_length=10_000)
+    filter: UserFilter | None = None
+    ban_reason: str | None = Field(None, max_length=500)
+
+    @model_validator(mode="after")
+    def ids_or_filter(self):
+        if (self.user_ids is None) == (self.filter is None):
+            raise ValueError("Provide either user_ids or filter")
+        return self
+
+
+class BulkUserActionResponse(BaseModel):
+    action: BulkUserAction
+    affected_ids: list[int]
+    count: int
+    revoked_sessions: int
+
+
+class UserSearchParams(UserCriteria):
+    limit: int = Field(
+        default=10, ge=1, le=100, description="Number of records to return (1-100)"
+    )
+    cursor: int | None = Field(
+        None, ge=1, description="`next_cursor` from the previous page"
+    )
+    with_total: bool = Field(
+        False, description="Also count all users matching the filters"
+    )
+
+
+class AdminUserPage(BaseModel):
+    items: list[AdminUserResponse]
+    next_cursor: int | None = None
+    total: int | None = None
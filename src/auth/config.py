@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -6,6 +8,26 @@ class AuthConfig(BaseSettings):
     SECRET_KEY: str = Field()
     ALGORITHM: str = Field(default="HS256")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = Field(default=30)
+    REFRESH_TOKEN_EXPIRE_DAYS: int = Field(default=30)
+
+    # Фильтр Блума отозванных сессий
+    REVOCATION_FILTER_CAPACITY: int = Field(default=100_000)
+    REVOCATION_FILTER_ERROR_RATE: float = Field(default=0.001)
+    REVOCATION_SYNC_SECONDS: float = Field(default=5.0)
+
+    # Пул потоков для bcrypt (0 — по числу ядер, но не больше 4)
+    BCRYPT_WORKERS: int = Field(default=0, ge=0)
+
+    # Ограничение попыток входа (token bucket): burst — размер корзины,
+    # per_minute — скорость её пополнения
+    LOGIN_THROTTLE_ENABLED: bool = Field(default=True)
+    LOGIN_THROTTLE_BACKEND: Literal["memory", "database"] = Field(default="memory")
+    LOGIN_THROTTLE_SHARDS: int = Field(default=16, ge=1)
+    LOGIN_THROTTLE_MAX_KEYS: int = Field(default=100_000, ge=1)
+    LOGIN_USERNAME_BURST: int = Field(default=5, ge=1)
+    LOGIN_USERNAME_PER_MINUTE: float = Field(default=5.0, gt=0)
+    LOGIN_IP_BURST: int = Field(default=20, ge=1)
+    LOGIN_IP_PER_MINUTE: float = Field(default=30.0, gt=0)
 
     model_config = SettingsConfigDict(
         env_file=".env", env_file_encoding="utf-8", extra="ignore"
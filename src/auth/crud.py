@@ -0,0 +1,92 @@
+import secrets
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.auth.config import auth_config
+from src.auth.models import SessionModel
+from src.auth.schemas import SessionCreate
+from src.shared.crud_base import CRUDBase
+
+
+class CRUDSession(CRUDBase[SessionModel, SessionCreate, SessionCreate]):
+    async def create_session(self, db: AsyncSession, user_id: int) -> SessionModel:
+        db_obj = SessionModel(
+            jti=secrets.token_hex(16),
+            user_id=user_id,
+            generation=0,
+            expires_at=datetime.now(timezone.utc)
+            + timedelta(days=auth_config.REFRESH_TOKEN_EXPIRE_DAYS),
+        )
+        db.add(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
+        return db_obj
+
+    async def get_by_jti(self, db: AsyncSession, jti: str) -> SessionModel | None:
+        result = await db.execute(select(self.model).where(self.model.jti == jti))
+        return result.scalar_one_or_none()
+
+    async def rotate(self, db: AsyncSession, jti: str, generation: int) -> bool:
+        """
+        Атомарно переводит сессию на следующее поколение.
+        Возвращает False, если сессия отозвана или токен уже был использован.
+        """
+        result = await db.execute(
+            update(self.model)
+            .where(
+                self.model.jti == jti,
+                self.model.generation == generation,
+                self.model.revoked_at.is_(None),
+            )
+            .values(generation=generation + 1)
+        )
+        await db.commit()
+        return result.rowcount > 0
+
+    async def revoke(self, db: AsyncSession, jti: str) -> bool:
+        result = await db.execute(
+            update(self.model)
+            .where(self.model.jti == jti, self.model.revoked_at.is_(None))
+            .values(revoked_at=datetime.now(timezone.utc))
+        )
+        await db.commit()
+        return result.rowcount > 0
+
+    async def revoke_for_users(
+        self, db: AsyncSession, user_ids: list[int]
+    ) -> list[str]:
+        """Отзывает все активные сессии пользователей, возвращает их JTI"""
+        result = await db.execute(
+            update(self.model)
+            .where(self.model.user_id.in_(user_ids), self.model.revoked_at.is_(None))
+            .values(revoked_at=datetime.now(timezone.utc))
+            .returning(self.model.jti)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        return result.scalars().all()
+
+    async def is_revoked(self, db: AsyncSession, jti: str) -> bool:
+        result = await db.execute(
+            select(self.model.revoked_at).where(self.model.jti == jti)
+        )
+        return result.scalar_one_or_none() is not None
+
+    async def get_revoked_since(
+        self, db: AsyncSession, since: datetime | None
+    ) -> list[tuple[str, datetime]]:
+        query = select(self.model.jti, self.model.revoked_at).where(
+            self.model.revoked_at.is_not(None)
+        )
+        if since is None:
+            query = query.where(self.model.expires_at > datetime.now(timezone.utc))
+        else:
+            query = query.where(self.model.revoked_at >= since)
+
+        result = await db.execute(query)
+        return result.all()
+
+
+session = CRUDSession(SessionModel)
@@ -1,8 +1,10 @@
+from contextvars import ContextVar
 from typing import Annotated
 
 from fastapi import Depends
 from fastapi.security import OAuth2PasswordBearer
 
+from src.auth.revocation import revocation_filter
 from src.auth.utils import verify_token
 from src.shared.database import DatabaseDep
 from src.shared.exceptions import (
@@ -14,20 +16,36 @@ from src.users.crud import user as user_crud
 from src.users.schemas import User
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
+# Для маршрутов, открытых анонимам: без заголовка Authorization токен — None
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login", auto_error=False)
+
+# (токен, пользователь), уже проверенные для POST /batch: подзапросы
+# с тем же токеном не проверяют его заново
+shared_user: ContextVar[tuple[str, User] | None] = ContextVar(
+    "shared_user", default=None
+)
 
 
 async def get_current_user(
     token: Annotated[str, Depends(oauth2_scheme)],
     db: DatabaseDep,
 ):
+    shared = shared_user.get()
+    if shared is not None and shared[0] == token:
+        return shared[1]
+
     payload = verify_token(token)
-    if not payload:
+    if not payload or payload.get("type") == "refresh":
         raise UnauthorizedException("Invalid token format")
 
     user_id: int = payload.get("sub")
     if user_id is None:
         raise UnauthorizedException("Missing user ID in token")
 
+    jti = payload.get("jti")
+    if jti is not None and await revocation_filter.is_revoked(db, jti):
+        raise UnauthorizedException("Session has been revoked")
+
     user = await user_crud.get(db, user_id)
     if user is None:
         raise UnauthorizedException("User not found")
@@ -41,6 +59,16 @@ async def get_current_user(
     return user
 
 
+async def get_optional_user(
+    token: Annotated[str | None, Depends(optional_oauth2_scheme)],
+    db: DatabaseDep,
+) -> User | None:
+    """Пользователь, если токен передан; неверный токен — та же ошибка 401"""
+    if token is None:
+        return None
+    return await get_current_user(token, db)
+
+
 async def require_admin(
     current_user: Annotated[User, Depends(get_current_user)],
 ) -> User:
@@ -58,5 +86,6 @@ async def require_ownership_or_admin(
 
 
 CurrentUserDep = Annotated[User, Depends(get_current_user)]
+OptionalUserDep = Annotated[User | None, Depends(get_optional_user)]
 AdminDep = Annotated[User, Depends(require_admin)]
 OwnershipOrAdminDep = Annotated[User, Depends(require_ownership_or_admin)]
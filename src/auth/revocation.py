@@ -0,0 +1,100 @@
+import hashlib
+import math
+import time
+from datetime import datetime
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.auth.config import auth_config
+from src.auth.crud import session as session_crud
+
+
+class BloomFilter:
+    """Фильтр Блума: возможны ложноположительные ответы, но не ложноотрицательные"""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.size = max(
+            8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        )
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(key)
+        )
+
+
+class RevocationFilter:
+    """
+    Проверка отзыва сессий по JTI.
+
+    Отозванные JTI держатся в фильтре Блума, поэтому для подавляющего большинства
+    запросов проверка не обращается к БД. При попадании в фильтр отзыв
+    подтверждается запросом к таблице sessions. Фильтр периодически
+    дозагружает JTI, отозванные другими процессами.
+    """
+
+    def __init__(self, capacity: int, error_rate: float, sync_interval: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_interval = sync_interval
+        self.reset()
+
+    def reset(self) -> None:
+        self._bloom = BloomFilter(self.capacity, self.error_rate)
+        self._watermark: datetime | None = None
+        self._next_sync = 0.0
+
+    def add(self, jti: str) -> None:
+        self._bloom.add(jti)
+
+    async def sync(self, db: AsyncSession, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now < self._next_sync:
+            return
+        self._next_sync = now + self.sync_interval
+
+        # После переполнения фильтр пересобирается только из неистёкших сессий
+        if self._bloom.count > self.capacity:
+            self._bloom = BloomFilter(self.capacity, self.error_rate)
+            self._watermark = None
+
+        for jti, revoked_at in await session_crud.get_revoked_since(
+            db, self._watermark
+        ):
+            self._bloom.add(jti)
+            if self._watermark is None or revoked_at > self._watermark:
+                self._watermark = revoked_at
+
+    def may_be_revoked(self, jti: str) -> bool:
+        """Проверка только по фильтру, без БД: False — JTI точно не отозван"""
+        return jti in self._bloom
+
+    async def is_revoked(self, db: AsyncSession, jti: str) -> bool:
+        await self.sync(db)
+        if jti not in self._bloom:
+            return False
+        return await session_crud.is_revoked(db, jti)
+
+
+revocation_filter = RevocationFilter(
+    capacity=auth_config.REVOCATION_FILTER_CAPACITY,
+    error_rate=auth_config.REVOCATION_FILTER_ERROR_RATE,
+    sync_interval=auth_config.REVOCATION_SYNC_SECONDS,
+)
@@ -1,7 +1,10 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Request, status
 
-from src.auth.schemas import LoginRequestSchema
-from src.auth.utils import create_access_token
+from src.auth.crud import session as session_crud
+from src.auth.revocation import revocation_filter
+from src.auth.schemas import LoginRequestSchema, RefreshRequestSchema
+from src.auth.throttling import login_throttle
+from src.auth.utils import create_access_token, create_refresh_token, verify_token
 from src.shared.database import DatabaseDep
 from src.shared.exceptions import UnauthorizedException
 from src.users.crud import user as user_crud
@@ -9,6 +12,30 @@ from src.users.crud import user as user_crud
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 
+def _token_response(user, jti: str, generation: int) -> dict:
+    return {
+        "access_token": create_access_token(
+            data={"sub": str(user.id), "jti": jti, "adm": user.is_admin}
+        ),
+        "refresh_token": create_refresh_token(user.id, jti, generation),
+        "token_type": "bearer",
+        "user_id": user.id,
+        "username": user.username,
+    }
+
+
+def _decode_refresh_token(token: str) -> dict:
+    payload = verify_token(token)
+    if (
+        not payload
+        or payload.get("type") != "refresh"
+        or payload.get("jti") is None
+        or payload.get("gen") is None
+    ):
+        raise UnauthorizedException("Invalid refresh token")
+    return payload
+
+
 @router.post(
     "/login",
     summary="User login",
@@ -16,11 +43,12 @@ router = APIRouter(prefix="/auth", tags=["Authentication"])
         200: {"description": "Successful login"},
         400: {"description": "Invalid credentials: incorrect username or password"},
         422: {"description": "Validation error"},
+        429: {"description": "Too many login attempts"},
     },
 )
-async def login(login_data: LoginRequestSchema, db: DatabaseDep):
+async def login(login_data: LoginRequestSchema, db: DatabaseDep, request: Request):
     """
-    ## Authenticate user and return JWT access token.
+    ## Authenticate user and return JWT access and refresh tokens.
 
     This endpoint validates user credentials and returns a JSON Web Token
     that should be included in subsequent requests in the Authorization header.
@@ -31,6 +59,7 @@ async def login(login_data: LoginRequestSchema, db: DatabaseDep):
 
     **Response:**
     - **access_token**: JWT token for authenticated requests
+    - **refresh_token**: long-lived token for `POST /auth/refresh`
     - **token_type**: Always "bearer"
     - **user_id**: ID of the authenticated user
     - **username**: Username of the authenticated user
@@ -39,16 +68,73 @@ async def login(login_data: LoginRequestSchema, db: DatabaseDep):
     - Passwords are hashed using bcrypt
     - JWT tokens expire after 30 minutes (by default)
     - Tokens must be included in Authorization header: `Bearer <token>`
+    - Attempts are rate limited per username and per client IP (429 + `Retry-After`)
     """
+    client_ip = request.client.host if request.client else None
+    await login_throttle.check(login_data.username, client_ip)
+
     user = await user_crud.authenticate(db, login_data.username, login_data.password)
     if not user:
         raise UnauthorizedException(detail="Incorrect username or password")
 
-    access_token = create_access_token(data={"sub": str(user.id)})
+    session = await session_crud.create_session(db, user.id)
+    return _token_response(user, session.jti, session.generation)
 
-    return {
-        "access_token": access_token,
-        "token_type": "bearer",
-        "user_id": user.id,
-        "username": user.username,
-    }
+
+@router.post(
+    "/refresh",
+    summary="Refresh access token",
+    responses={
+        200: {"description": "New token pair issued"},
+        401: {"description": "Refresh token is invalid, expired or revoked"},
+        422: {"description": "Validation error"},
+    },
+)
+async def refresh(refresh_data: RefreshRequestSchema, db: DatabaseDep):
+    """
+    ## Exchange a refresh token for a new access/refresh token pair
+
+    The refresh token is rotated: the presented token becomes invalid and
+    a new one is returned. Presenting an already used refresh token revokes
+    the whole session.
+
+    <u>Note: password is not checked here, so refreshing is much cheaper than login.</u>
+    """
+    payload = _decode_refresh_token(refresh_data.refresh_token)
+    jti, generation = payload["jti"], payload["gen"]
+
+    if not await session_crud.rotate(db, jti, generation):
+        # Повторное использование уже ротированного токена — отзываем сессию
+        if await session_crud.revoke(db, jti):
+            revocation_filter.add(jti)
+        raise UnauthorizedException("Refresh token has been revoked")
+
+    user = await user_crud.get(db, int(payload["sub"]))
+    if user is None or not user.is_active or user.is_banned:
+        await session_crud.revoke(db, jti)
+        revocation_filter.add(jti)
+        raise UnauthorizedException("User is not allowed to refresh tokens")
+
+    return _token_response(user, jti, generation + 1)
+
+
+@router.post(
+    "/logout",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Revoke session",
+    responses={
+        204: {"description": "Session revoked"},
+        401: {"description": "Invalid refresh token"},
+        422: {"description": "Validation error"},
+    },
+)
+async def logout(refresh_data: RefreshRequestSchema, db: DatabaseDep):
+    """
+    ## Revoke the session the refresh token belongs to
+
+    Both the refresh token and all access tokens issued for this session
+    stop working immediately.
+    """
+    payload = _decode_refresh_token(refresh_data.refresh_token)
+    await session_crud.revoke(db, payload["jti"])
+    revocation_filter.add(payload["jti"])
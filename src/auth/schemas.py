@@ -4,3 +4,11 @@ from pydantic import BaseModel
 class LoginRequestSchema(BaseModel):
     username: str
     password: str
+
+
+class RefreshRequestSchema(BaseModel):
+    refresh_token: str
+
+
+class SessionCreate(BaseModel):
+    user_id: int
@@ -0,0 +1,177 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+
+from src.auth.config import auth_config
+from src.auth.models import LoginThrottleBucketModel
+from src.shared.database import SessionFactory, new_session
+from src.shared.exceptions import TooManyRequestsException
+
+
+class ThrottleBackend(ABC):
+    """Хранилище token bucket'ов"""
+
+    @abstractmethod
+    async def consume(self, key: str, capacity: float, refill_rate: float) -> float:
+        """
+        Забирает один токен из корзины `key`.
+        Возвращает 0, если токен был, иначе — сколько секунд ждать следующего.
+        """
+
+    @abstractmethod
+    async def reset(self) -> None:
+        """Удаляет все корзины"""
+
+
+def _take_token(
+    tokens: float, updated_at: float, now: float, capacity: float, refill_rate: float
+) -> tuple[float, float]:
+    tokens = min(capacity, tokens + (now - updated_at) * refill_rate)
+    if tokens >= 1:
+        return tokens - 1, 0.0
+    return tokens, (1 - tokens) / refill_rate
+
+
+class MemoryThrottleBackend(ThrottleBackend):
+    """
+    Корзины в памяти процесса, разбитые на шарды со своими блокировками.
+    При переполнении шарда из него удаляются полностью восстановившиеся корзины:
+    их состояние эквивалентно отсутствию записи.
+    """
+
+    def __init__(self, shards: int, max_keys: int):
+        self._shard_count = shards
+        self._max_keys_per_shard = max(1, max_keys // shards)
+        self._shards: list[dict[str, list[float]]] = [{} for _ in range(shards)]
+        self._locks = [threading.Lock() for _ in range(shards)]
+
+    async def consume(self, key: str, capacity: float, refill_rate: float) -> float:
+        index = hash(key) % self._shard_count
+        shard = self._shards[index]
+        now = time.monotonic()
+
+        with self._locks[index]:
+            bucket = shard.get(key)
+            if bucket is None:
+                if len(shard) >= self._max_keys_per_shard:
+                    self._prune(shard, now, capacity, refill_rate)
+                bucket = shard[key] = [float(capacity), now]
+
+            bucket[0], retry_after = _take_token(
+                bucket[0], bucket[1], now, capacity, refill_rate
+            )
+            bucket[1] = now
+            return retry_after
+
+    @staticmethod
+    def _prune(
+        shard: dict[str, list[float]], now: float, capacity: float, refill_rate: float
+    ) -> None:
+        full = [
+            key
+            for key, (tokens, updated_at) in shard.items()
+            if tokens + (now - updated_at) * refill_rate >= capacity
+        ]
+        if not full:
+            # Восстановившихся корзин нет — жертвуем самой старой половиной
+            full = sorted(shard, key=lambda k: shard[k][1])[: len(shard) // 2]
+        for key in full:
+            del shard[key]
+
+    async def reset(self) -> None:
+        for shard, lock in zip(self._shards, self._locks, strict=True):
+            with lock:
+                shard.clear()
+
+
+class DatabaseThrottleBackend(ThrottleBackend):
+    """
+    Корзины в таблице login_throttle_buckets — общие для всех воркеров.
+    Каждая проверка выполняется в отдельной короткой транзакции с блокировкой строки.
+    """
+
+    def __init__(self, session_factory: SessionFactory):
+        self.session_factory = session_factory
+
+    async def consume(self, key: str, capacity: float, refill_rate: float) -> float:
+        for _ in range(2):
+            try:
+                return await self._consume(key, capacity, refill_rate)
+            except IntegrityError:
+                # Корзину одновременно создал другой процесс — повторяем
+                continue
+        return 0.0
+
+    async def _consume(self, key: str, capacity: float, refill_rate: float) -> float:
+        now = time.time()
+        async with self.session_factory() as db:
+            bucket = await db.get(LoginThrottleBucketModel, key, with_for_update=True)
+            if bucket is None:
+                bucket = LoginThrottleBucketModel(
+                    key=key, tokens=float(capacity), updated_at=now
+                )
+                db.add(bucket)
+
+            bucket.tokens, retry_after = _take_token(
+                bucket.tokens, bucket.updated_at, now, capacity, refill_rate
+            )
+            bucket.updated_at = now
+            await db.commit()
+            return retry_after
+
+    async def reset(self) -> None:
+        async with self.session_factory() as db:
+            await db.execute(delete(LoginThrottleBucketModel))
+            await db.commit()
+
+
+class LoginThrottle:
+    """
+    Ограничение попыток входа по имени пользователя и IP-адресу клиента.
+    Проверка выполняется до bcrypt, поэтому отклонённая попытка почти ничего не стоит.
+    """
+
+    def __init__(self, backend: ThrottleBackend, enabled: bool = True):
+        self.backend = backend
+        self.enabled = enabled
+
+    async def check(self, username: str, client_ip: str | None) -> None:
+        if not self.enabled:
+            return
+
+        if client_ip:
+            retry_after = await self.backend.consume(
+                f"ip:{client_ip}",
+                auth_config.LOGIN_IP_BURST,
+                auth_config.LOGIN_IP_PER_MINUTE / 60,
+            )
+            if retry_after:
+                raise TooManyRequestsException(
+                    "Too many login attempts from this address", retry_after
+                )
+
+        retry_after = await self.backend.consume(
+            f"user:{username.casefold()}",
+            auth_config.LOGIN_USERNAME_BURST,
+            auth_config.LOGIN_USERNAME_PER_MINUTE / 60,
+        )
+        if retry_after:
+            raise TooManyRequestsException(
+                "Too many login attempts for this user", retry_after
+            )
+
+
+def _create_backend() -> ThrottleBackend:
+    if auth_config.LOGIN_THROTTLE_BACKEND == "database":
+        return DatabaseThrottleBackend(new_session)
+    return MemoryThrottleBackend(
+        auth_config.LOGIN_THROTTLE_SHARDS, auth_config.LOGIN_THROTTLE_MAX_KEYS
+    )
+
+
+login_throttle = LoginThrottle(
+    _create_backend(), enabled=auth_config.LOGIN_THROTTLE_ENABLED
+)
@@ -1,20 +1,58 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+from functools import cache
 
 from src.auth.config import auth_config
 
-# Хеширование паролей
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+# passlib и jose импортируются при первом использовании: они заметно
+# замедляют импорт приложения, а на старте их прогревает lifespan
+@cache
+def get_pwd_context():
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
+
+
+# bcrypt выполняется в отдельном пуле потоков, чтобы не блокировать event loop
+bcrypt_executor = ThreadPoolExecutor(
+    max_workers=auth_config.BCRYPT_WORKERS or min(4, os.cpu_count() or 1),
+    thread_name_prefix="bcrypt",
+)
+_bcrypt_pending = 0
+
+
+def bcrypt_queue_depth() -> int:
+    """Количество bcrypt-задач, ожидающих выполнения или выполняемых сейчас"""
+    return _bcrypt_pending
+
+
+async def _run_bcrypt(func, *args):
+    global _bcrypt_pending
+    _bcrypt_pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(bcrypt_executor, func, *args)
+    finally:
+        _bcrypt_pending -= 1
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_bcrypt(get_password_hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_bcrypt(verify_password, plain_password, hashed_password)
 
 
 # JWT токены
@@ -23,13 +61,35 @@ def create_access_token(data: dict) -> str:
     expire = datetime.now(timezone.utc) + timedelta(
         minutes=auth_config.ACCESS_TOKEN_EXPIRE_MINUTES
     )
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "type": "access"})
+    from jose import jwt
+
+    return jwt.encode(
+        to_encode, auth_config.SECRET_KEY, algorithm=auth_config.ALGORITHM
+    )
+
+
+def create_refresh_token(user_id: int, jti: str, generation: int) -> str:
+    expire = datetime.now(timezone.utc) + timedelta(
+        days=auth_config.REFRESH_TOKEN_EXPIRE_DAYS
+    )
+    to_encode = {
+        "sub": str(user_id),
+        "jti": jti,
+        "gen": generation,
+        "type": "refresh",
+        "exp": expire,
+    }
+    from jose import jwt
+
     return jwt.encode(
         to_encode, auth_config.SECRET_KEY, algorithm=auth_config.ALGORITHM
     )
 
 
 def verify_token(token: str):
+    from jose import JWTError, jwt
+
     try:
         payload = jwt.decode(
             token, auth_config.SECRET_KEY, algorithms=[auth_config.ALGORITHM]
@@ -37,3 +97,24 @@ def verify_token(token: str):
         return payload
     except JWTError:
         return None
+
+
+def rate_limit_principal(authorization: str) -> tuple[str, str] | None:
+    """Определяет клиента для rate limiting по токену, без обращения к БД"""
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer":
+        return None
+
+    payload = verify_token(token)
+    if not payload or payload.get("type") == "refresh" or not payload.get("sub"):
+        return None
+
+    # Тариф администратора без лимита выдаётся только токену, чья сессия не
+    # отозвана: разжалованный или вышедший админ считается обычным пользователем.
+    # Фильтр Блума проверяется без БД, ложное попадание лишь понижает тариф
+    from src.auth.revocation import revocation_filter
+
+    jti = payload.get("jti")
+    if payload.get("adm") and jti and not revocation_filter.may_be_revoked(jti):
+        return "admin", payload["sub"]
+    return "user", payload["sub"]
@@ -0,0 +1,133 @@
+import asyncio
+import json
+import logging
+from urllib.parse import unquote
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.types import ASGIApp, Message, Scope
+
+from src.batch.schemas import SubRequest
+from src.shared.database import new_session, shared_session
+
+logger = logging.getLogger("src")
+
+# Заголовки запроса /batch, которые передаются подзапросам
+FORWARDED_HEADERS = {b"authorization", b"accept-language", b"user-agent"}
+# Заголовки ответа подзапроса, которые не имеют смысла внутри тела /batch
+DROPPED_HEADERS = {"content-length", "content-type", "vary"}
+
+
+class SessionLanes:
+    """
+    Сессии для подзапросов одного /batch: не больше `size` одновременно.
+    Сессия AsyncSession не допускает конкурентных запросов, поэтому
+    каждый подзапрос берёт сессию целиком, а освободив, отдаёт следующему.
+    Первая — сессия самого запроса /batch, остальные открываются по мере
+    надобности и закрываются в `close`.
+    """
+
+    def __init__(self, first: AsyncSession, size: int):
+        self._free: asyncio.Queue[AsyncSession] = asyncio.Queue()
+        self._free.put_nowait(first)
+        self._opened: list[AsyncSession] = []
+        self._size = size
+
+    async def acquire(self) -> AsyncSession:
+        if self._free.empty() and 1 + len(self._opened) < self._size:
+            session = new_session()
+            self._opened.append(session)
+            return session
+        return await self._free.get()
+
+    def release(self, session: AsyncSession) -> None:
+        self._free.put_nowait(session)
+
+    async def close(self) -> None:
+        for session in self._opened:
+            await session.close()
+
+
+def _scope(parent: Scope, sub_request: SubRequest) -> Scope:
+    path, _, query = sub_request.url.partition("?")
+    return {
+        "type": "http",
+        "asgi": parent["asgi"],
+        "http_version": parent["http_version"],
+        "method": sub_request.method,
+        "scheme": parent["scheme"],
+        "server": parent.get("server"),
+        "client": parent.get("client"),
+        "root_path": parent.get("root_path", ""),
+        "path": unquote(path),
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "headers": [
+            (name, value)
+            for name, value in parent["headers"]
+            if name in FORWARDED_HEADERS
+        ]
+        + [(b"accept", b"application/json")],
+        "state": {},
+    }
+
+
+async def dispatch(
+    app: ASGIApp, parent: Scope, sub_request: SubRequest, lanes: SessionLanes
+) -> bytes:
+    """
+    Выполняет подзапрос через ASGI-приложение (с его middleware и
+    обработчиками ошибок) и возвращает готовый JSON элемента ответа
+    """
+    status = 500
+    headers: dict[str, str] = {}
+    chunks: list[bytes] = []
+    content_type = ""
+
+    async def receive() -> Message:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: Message) -> None:
+        nonlocal status, content_type
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            for name, value in message.get("headers", []):
+                name = name.decode("latin-1").lower()
+                if name == "content-type":
+                    content_type = value.decode("latin-1")
+                elif name not in DROPPED_HEADERS:
+                    headers[name] = value.decode("latin-1")
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    session = await lanes.acquire()
+    token = shared_session.set(session)
+    failed = True
+    try:
+        await app(_scope(parent, sub_request), receive, send)
+        failed = status >= 500
+    except Exception:
+        # Ответ 500 уже отправлен обработчиком ошибок приложения
+        logger.exception("Batch sub-request %s failed", sub_request.url)
+    finally:
+        shared_session.reset(token)
+        try:
+            if failed:
+                # После ошибки БД транзакция прервана: на Postgres следующие
+                # подзапросы в этой сессии падали бы, пока её не откатить
+                await session.rollback()
+        except Exception:
+            logger.exception("Batch session rollback failed")
+        finally:
+            lanes.release(session)
+
+    body = b"".join(chunks)
+    if not body:
+        body = b"null"
+    elif not content_type.startswith("application/json"):
+        body = json.dumps(body.decode(errors="replace")).encode()
+    # Тело подзапроса уже JSON: вставляется как есть, без повторной сериализации
+    head = json.dumps(
+        {"id": sub_request.id, "status": status, "headers": headers},
+        ensure_ascii=False,
+    )
+    return b'%s, "body": %s}' % (head[:-1].encode(), body)
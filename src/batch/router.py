@@ -0,0 +1,74 @@
+import asyncio
+
+from fastapi import APIRouter, Request, Response
+from fastapi.security.utils import get_authorization_scheme_param
+
+from src.auth.dependencies import get_current_user, shared_user
+from src.batch.dispatch import SessionLanes, dispatch
+from src.batch.schemas import BatchRequest, BatchResponse
+from src.shared.config import settings
+from src.shared.database import DatabaseDep
+from src.shared.exceptions import BaseAPIException
+
+router = APIRouter(prefix="/batch", tags=["Batch"])
+
+
+@router.post(
+    "",
+    response_model=BatchResponse,
+    summary="Run several read requests in one round trip",
+    responses={
+        200: {"description": "All sub-requests completed", "model": BatchResponse},
+        422: {"description": "Invalid list of sub-requests"},
+        500: {"description": "Internal server error"},
+    },
+)
+async def run_batch(batch: BatchRequest, request: Request, db: DatabaseDep):
+    """
+    ## Execute several GET requests and return all their responses together
+
+    **Request body**:
+    - **requests**: up to `BATCH_MAX_REQUESTS` sub-requests, each with
+    a **url** path of this API (with query string), an optional **id**
+    label and **method** `GET`
+
+    **Example**:
+    ```json
+    {"requests": [
+        {"id": "book", "url": "/books/1"},
+        {"id": "rating", "url": "/reviews/1/average_rating"},
+        {"id": "favorite", "url": "/favorites/books/1/status"}
+    ]}
+    ```
+
+    **Response**:
+    - **responses**: in the order of the sub-requests, each with its **id**,
+    **status**, response **headers** and JSON **body**; a failed sub-request
+    doesn't fail the batch
+
+    <u>Note: sub-requests run concurrently (up to `BATCH_CONCURRENCY` at a time)
+    through the regular routes, rate limits included. They share the caller's
+    `Authorization` header, which is verified once, and reuse the batch's
+    database sessions.</u>
+    """
+    scheme, token = get_authorization_scheme_param(request.headers.get("Authorization"))
+    if scheme.lower() == "bearer" and token:
+        try:
+            shared_user.set((token, await get_current_user(token, db)))
+        except BaseAPIException:
+            # Подзапросы, которым нужен пользователь, сами вернут ошибку
+            pass
+
+    lanes = SessionLanes(db, settings.BATCH_CONCURRENCY)
+    try:
+        bodies = await asyncio.gather(
+            *(
+                dispatch(request.app, request.scope, sub_request, lanes)
+                for sub_request in batch.requests
+            )
+        )
+    finally:
+        await lanes.close()
+    return Response(
+        b'{"responses": [%s]}' % b", ".join(bodies), media_type="application/json"
+    )
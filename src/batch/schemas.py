@@ -0,0 +1,39 @@
+from typing import Any, Literal
+
+from pydantic import BaseModel, Field, field_validator
+
+from src.shared.config import settings
+
+
+class SubRequest(BaseModel):
+    id: str | None = Field(
+        None, max_length=100, description="Client label echoed in the response"
+    )
+    method: Literal["GET"] = "GET"
+    url: str = Field(..., min_length=1, max_length=2000, examples=["/books/1"])
+
+    @field_validator("url")
+    @classmethod
+    def url_must_be_local_path(cls, url: str) -> str:
+        if not url.startswith("/") or url.startswith("//"):
+            raise ValueError("url must be a path of this API, e.g. /books/1")
+        if url.split("?", 1)[0].rstrip("/") == "/batch":
+            raise ValueError("batch requests can't be nested")
+        return url
+
+
+class BatchRequest(BaseModel):
+    requests: list[SubRequest] = Field(
+        ..., min_length=1, max_length=settings.BATCH_MAX_REQUESTS
+    )
+
+
+class SubResponse(BaseModel):
+    id: str | None
+    status: int
+    headers: dict[str, str]
+    body: Any
+
+
+class BatchResponse(BaseModel):
+    responses: list[SubResponse]
@@ -1,10 +1,35 @@
-from sqlalchemy import select
+from typing import Sequence
+
+from sqlalchemy import Select, bindparam, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.interfaces import ORMOption
 
+from src.books.facets import book_conditions, book_facets
+from src.books.fuzzy import book_trigrams
+from src.books.leaderboard import leaderboard
 from src.books.models import BookModel
-from src.books.schemas import BookCreate, BookUpdate
+from src.books.schemas import BookCreate, BookQuery, BookUpdate
+from src.books.suggest import book_suggest
+from src.books.trending import trending
+from src.recommendations.index import co_favorites
+from src.reviews.histogram import remove_histogram
+from src.shared.counts import row_count
 from src.shared.crud_base import CRUDBase
 
+book_count = row_count("books", BookModel)
+
+SORT_COLUMNS = {
+    "id": BookModel.id,
+    "title": BookModel.title,
+    "rating": BookModel.rating,
+    "pages": BookModel.pages,
+    "created_at": BookModel.created_at,
+}
+
+_books_by_ids = select(BookModel).where(
+    BookModel.id.in_(bindparam("ids", expanding=True))
+)
+
 
 class CRUDBook(CRUDBase[BookModel, BookCreate, BookUpdate]):
     async def get_by_title_author(
@@ -17,16 +42,85 @@ class CRUDBook(CRUDBase[BookModel, BookCreate, BookUpdate]):
         )
         return result.scalar_one_or_none()
 
-    async def get_top_rated(
-        self, db: AsyncSession, skip: int, limit: int
+    def browse_statement(self, query: BookQuery) -> Select:
+        """
+        Запрос каталога по фильтрам и сортировке. Порядок дополняется id
+        в том же направлении — так он совпадает с составными индексами
+        (поле, id) и (author, поле, id), и страница читается из индекса
+        """
+        column = SORT_COLUMNS[query.sort.lstrip("-")]
+        order = [column] if column is BookModel.id else [column, BookModel.id]
+        if query.sort.startswith("-"):
+            order = [item.desc() for item in order]
+        return select(self.model).where(*book_conditions(query)).order_by(*order)
+
+    async def browse(
+        self,
+        db: AsyncSession,
+        query: BookQuery,
+        skip: int,
+        limit: int,
+        options: Sequence[ORMOption] = (),
     ) -> list[BookModel]:
-        result = await db.execute(
-            select(self.model)
-            .order_by(self.model.rating.desc())
-            .limit(limit)
-            .offset(skip)
+        result = await db.scalars(
+            self.browse_statement(query).options(*options).offset(skip).limit(limit)
         )
-        return result.scalars().all()
+        return result.all()
+
+    async def get_top_rated(
+        self,
+        db: AsyncSession,
+        skip: int,
+        limit: int,
+        options: Sequence[ORMOption] = (),
+    ) -> list[BookModel]:
+        await leaderboard.ensure_loaded()
+        return await self.get_many_ordered(db, leaderboard.page(skip, limit), options)
+
+    async def get_trending(
+        self, db: AsyncSession, limit: int, options: Sequence[ORMOption] = ()
+    ) -> list[BookModel]:
+        await trending.ensure_loaded()
+        book_ids = [book_id for book_id, _ in trending.top(limit)]
+        return await self.get_many_ordered(db, book_ids, options)
+
+    async def get_many_ordered(
+        self,
+        db: AsyncSession,
+        book_ids: list[int],
+        options: Sequence[ORMOption] = (),
+    ) -> list[BookModel]:
+        """Книги по списку ID в том же порядке; удалённые пропускаются"""
+        if not book_ids:
+            return []
+        result = await db.execute(_books_by_ids.options(*options), {"ids": book_ids})
+        books = {book.id: book for book in result.scalars()}
+        return [books[book_id] for book_id in book_ids if book_id in books]
+
+    async def _after_create(self, db: AsyncSession, db_obj: BookModel) -> None:
+        book_count.adjust(1)
+        book_facets.clear()
+        book_suggest.book_saved(db_obj.id, db_obj.title, db_obj.author)
+        book_trigrams.book_saved(db_obj.id, db_obj.title, db_obj.author)
+        leaderboard.book_saved(db_obj.id, db_obj.rating)
+
+    async def _after_update(self, db: AsyncSession, db_obj: BookModel) -> None:
+        book_facets.clear()
+        book_suggest.book_saved(db_obj.id, db_obj.title, db_obj.author)
+        book_trigrams.book_saved(db_obj.id, db_obj.title, db_obj.author)
+        leaderboard.book_saved(db_obj.id, db_obj.rating)
+
+    async def _before_delete(self, db: AsyncSession, db_obj: BookModel) -> None:
+        await remove_histogram(db, db_obj.id)
+
+    async def _after_delete(self, db: AsyncSession, db_obj: BookModel) -> None:
+        book_count.adjust(-1)
+        book_facets.clear()
+        book_suggest.book_removed(db_obj.id)
+        book_trigrams.book_removed(db_obj.id)
+        co_favorites.book_removed(db_obj.id)
+        leaderboard.book_removed(db_obj.id)
+        trending.book_removed(db_obj.id)
 
 
 book = CRUDBook(BookModel)
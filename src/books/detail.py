@@ -0,0 +1,57 @@
+from sqlalchemy import bindparam, exists, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import raiseload
+
+from src.books.models import BookModel
+from src.favorites.models import FavoriteModel
+from src.reviews.crud import review as review_crud
+from src.reviews.histogram import rating_summary
+from src.reviews.models import RATINGS, RatingHistogramModel
+
+# Книга и все её счётчики одной строкой за один запрос: гистограмма оценок
+# по первичному ключу, избранное — подзапросы по ix_favorites_book_id
+_book_with_stats = (
+    select(
+        BookModel,
+        select(func.count())
+        .where(FavoriteModel.book_id == BookModel.id)
+        .scalar_subquery(),
+        exists().where(
+            FavoriteModel.book_id == BookModel.id,
+            FavoriteModel.user_id == bindparam("user_id"),
+        ),
+        *(func.coalesce(RatingHistogramModel.column(rating), 0) for rating in RATINGS),
+    )
+    .outerjoin(RatingHistogramModel, RatingHistogramModel.book_id == BookModel.id)
+    .where(BookModel.id == bindparam("book_id"))
+    .options(raiseload("*"))
+)
+
+
+async def book_detail(
+    db: AsyncSession, book_id: int, user_id: int | None, reviews_limit: int
+) -> dict | None:
+    """
+    Всё для страницы книги за два запроса в сессии запроса: книга со
+    счётчиками, затем первая страница отзывов. Второе соединение из пула не
+    берётся: под нагрузкой запросы держали бы по соединению, ожидая второе.
+    None — книги нет
+    """
+    result = await db.execute(
+        _book_with_stats, {"book_id": book_id, "user_id": user_id}
+    )
+    row = result.one_or_none()
+    if row is None:
+        return None
+    reviews = await review_crud.get_latest_by_book(
+        db, book_id, reviews_limit, [raiseload("*")]
+    )
+
+    book, favorite_count, is_favorite, *counts = row
+    return {
+        "book": book,
+        "rating_summary": rating_summary(dict(zip(RATINGS, counts, strict=True))),
+        "favorite_count": favorite_count,
+        "is_favorite": bool(is_favorite) if user_id is not None else None,
+        "reviews": reviews,
+    }
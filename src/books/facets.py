@@ -0,0 +1,107 @@
+import time
+from collections import OrderedDict
+
+from sqlalchemy import Integer, cast, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.books.models import BookModel
+from src.books.schemas import BookFilter
+from src.shared.config import settings
+
+# Сколько авторов с наибольшим числом книг хранится в кэше на набор фильтров
+MAX_AUTHORS = 100
+
+
+def book_conditions(filters: BookFilter) -> list:
+    conditions = []
+    if filters.author is not None:
+        conditions.append(BookModel.author == filters.author)
+    if filters.pages_min is not None:
+        conditions.append(BookModel.pages >= filters.pages_min)
+    if filters.pages_max is not None:
+        conditions.append(BookModel.pages <= filters.pages_max)
+    if filters.rating_min is not None:
+        conditions.append(BookModel.rating >= filters.rating_min)
+    if filters.rating_max is not None:
+        conditions.append(BookModel.rating <= filters.rating_max)
+    if filters.created_after is not None:
+        conditions.append(BookModel.created_at >= filters.created_after)
+    if filters.created_before is not None:
+        conditions.append(BookModel.created_at < filters.created_before)
+    return conditions
+
+
+class BookFacetCache:
+    """
+    Счётчики книг по авторам и по целой части рейтинга для текущих фильтров.
+
+    Оба разреза считаются одним запросом с группировкой: на Postgres —
+    GROUPING SETS ((author), (bucket)), на SQLite, где их нет, — GROUP BY
+    author, bucket с досуммированием в Python. Результат кэшируется по
+    фильтрам на `ttl` секунд (не больше `max_entries` наборов фильтров)
+    и сбрасывается при любом изменении книг.
+    """
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    async def get(self, db: AsyncSession, filters: BookFilter) -> dict:
+        """Итог, до MAX_AUTHORS авторов по убыванию числа книг и разрез по рейтингу"""
+        key = filters.model_dump_json()
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self._entries.move_to_end(key)
+            return entry[1]
+
+        facets = await self._compute(db, filters)
+        self._entries[key] = (time.monotonic() + self.ttl, facets)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return facets
+
+    async def _compute(self, db: AsyncSession, filters: BookFilter) -> dict:
+        grouping_sets = db.bind.dialect.name == "postgresql"
+        # Postgres при CAST округляет, SQLite отбрасывает дробную часть
+        rating = func.floor(BookModel.rating) if grouping_sets else BookModel.rating
+        bucket = cast(rating, Integer).label("bucket")
+        query = select(BookModel.author, bucket, func.count()).where(
+            *book_conditions(filters)
+        )
+        if grouping_sets:
+            query = query.group_by(func.grouping_sets(BookModel.author, bucket))
+        else:
+            query = query.group_by(BookModel.author, bucket)
+
+        by_author: dict[str, int] = {}
+        by_rating: dict[int | None, int] = {}
+        for author, rating, count in await db.execute(query):
+            # В GROUPING SETS строки разреза по рейтингу идут с author = NULL
+            # (у книг author не бывает NULL), строки разреза по авторам — наоборот
+            if not grouping_sets or author is None:
+                by_rating[rating] = by_rating.get(rating, 0) + count
+            if not grouping_sets or author is not None:
+                by_author[author] = by_author.get(author, 0) + count
+
+        top_authors = sorted(by_author.items(), key=lambda item: (-item[1], item[0]))
+        return {
+            "total": sum(by_rating.values()),
+            "authors": [
+                {"author": author, "count": count}
+                for author, count in top_authors[:MAX_AUTHORS]
+            ],
+            "ratings": [
+                {"rating": rating, "count": by_rating[rating]}
+                for rating in sorted(by_rating, key=lambda r: (r is None, r))
+            ],
+        }
+
+
+book_facets = BookFacetCache(
+    ttl=settings.BOOK_FACETS_TTL, max_entries=settings.BOOK_FACETS_CACHE_SIZE
+)
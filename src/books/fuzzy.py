@@ -0,0 +1,338 @@
+import asyncio
+import bisect
+import heapq
+import math
+import re
+import time
+from array import array
+from collections import Counter
+from dataclasses import dataclass, field
+
+from sqlalchemy import func, or_, select
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.books.models import BookModel
+from src.books.rows import BookRows
+from src.shared.config import settings
+from src.shared.indexes import InMemoryIndex, register_index
+
+# Слова как в pg_trgm: последовательности букв и цифр
+WORD = re.compile(r"[^\W_]+")
+# SQLSTATE query_canceled: запрос прерван по statement_timeout
+QUERY_CANCELED = "57014"
+# Ширина класса размера строки (в триграммах) у списков по триграммам
+SIZE_CLASS = 8
+# Через сколько ключей проверять, не вышел ли бюджет времени поиска
+COUNT_CHUNK = 16_384
+
+_EMPTY = array("i")
+
+Postings = dict[str, dict[int, array]]
+
+
+def trigrams(text: str) -> set[str]:
+    """
+    Триграммы строки по правилам pg_trgm: слово в нижнем регистре
+    дополняется двумя пробелами в начале и одним в конце
+    """
+    grams = set()
+    for word in WORD.findall(text.lower()):
+        padded = f"  {word} "
+        grams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def _add(postings: Postings, grams: set[str], key: int) -> None:
+    size_class = len(grams) // SIZE_CLASS
+    for gram in grams:
+        by_size = postings.get(gram)
+        if by_size is None:
+            by_size = postings[gram] = {}
+        keys = by_size.get(size_class)
+        if keys is None:
+            keys = by_size[size_class] = array("i")
+        # Ключи только добавляются, поэтому списки остаются упорядоченными
+        keys.append(key)
+
+
+def _overlap(threshold: float, size: int, other: int) -> int:
+    """
+    Сколько общих триграмм c нужно строкам из size и other триграмм для
+    сходства не ниже t: c / (size + other − c) ≥ t ⇔ c ≥ t(size + other) / (1 + t)
+    """
+    return max(1, math.ceil(threshold * (size + other) / (1 + threshold) - 1e-9))
+
+
+def _count(counts: Counter, keys: array, deadline: float, only_known: bool) -> bool:
+    """
+    Добавляет к counts ключи из keys (при only_known — только уже известные),
+    проверяя deadline после каждых COUNT_CHUNK ключей; False — время вышло
+    """
+    if not only_known:
+        for start in range(0, len(keys), COUNT_CHUNK):
+            counts.update(keys[start : start + COUNT_CHUNK])
+            if time.perf_counter() > deadline:
+                return False
+    elif len(keys) <= len(counts):
+        for start in range(0, len(keys), COUNT_CHUNK):
+            for key in keys[start : start + COUNT_CHUNK]:
+                if key in counts:
+                    counts[key] += 1
+            if time.perf_counter() > deadline:
+                return False
+    else:
+        # Список длиннее числа кандидатов: ищем их в нём bisect'ом
+        for position, key in enumerate(counts):
+            found = bisect.bisect_left(keys, key)
+            if found < len(keys) and keys[found] == key:
+                counts[key] += 1
+            if position % COUNT_CHUNK == 0 and time.perf_counter() > deadline:
+                return False
+    return True
+
+
+def _similar(
+    postings: Postings,
+    sizes: array,
+    grams: set[str],
+    threshold: float,
+    deadline: float,
+    scores: dict[int, float],
+) -> bool:
+    """
+    Добавляет в scores ключи со сходством (общие триграммы / все триграммы
+    обеих строк, как similarity() в pg_trgm) не ниже threshold. Возвращает
+    False, если подсчёт прерван по deadline: тогда часть подходящих ключей
+    отсутствует, а их оценки могут быть занижены.
+
+    Сходство не ниже t возможно только у строк из t·n … n/t триграмм, поэтому
+    списки разбиты по классам размера строк и просматриваются лишь нужные
+    классы, начиная с близких к размеру запроса. В классе нужно не меньше
+    need общих триграмм, и подходящий ключ встречается хотя бы в одном из
+    n − need + 1 самых коротких списков; остальные только досчитывают
+    найденных кандидатов.
+    """
+    total = len(grams)
+    smallest = max(1, math.ceil(threshold * total - 1e-9))
+    largest = math.floor(total / threshold + 1e-9)
+    size_classes = sorted(
+        range(smallest // SIZE_CLASS, largest // SIZE_CLASS + 1),
+        key=lambda size_class: abs(size_class * SIZE_CLASS - total),
+    )
+    for size_class in size_classes:
+        lists = sorted(
+            (postings.get(gram, {}).get(size_class, _EMPTY) for gram in grams),
+            key=len,
+        )
+        need = _overlap(threshold, total, max(smallest, size_class * SIZE_CLASS))
+        counts: Counter[int] = Counter()
+        complete = True
+        for position, keys in enumerate(lists):
+            if keys and not _count(
+                counts, keys, deadline, only_known=position > total - need
+            ):
+                complete = False
+                break
+        for key, common in counts.items():
+            score = common / (total + sizes[key] - common)
+            if score >= threshold:
+                scores[key] = score
+        if not complete:
+            return False
+    return True
+
+
+@dataclass(slots=True)
+class _Store(BookRows):
+    # Триграмма → класс размера → строки с ней в названии; размеры названий
+    title_postings: Postings = field(default_factory=dict)
+    title_sizes: array = field(default_factory=lambda: array("H"))
+    # Авторы повторяются, поэтому их триграммы хранятся по номеру автора
+    author_postings: Postings = field(default_factory=dict)
+    author_sizes: array = field(default_factory=lambda: array("H"))
+    author_rows: list[array] = field(default_factory=list)
+
+    def append(self, book_id: int, title: str, author: str) -> None:
+        row, author_number = self.append_row(book_id, title, author)
+        grams = trigrams(title)
+        self.title_sizes.append(len(grams))
+        _add(self.title_postings, grams, row)
+
+        if author_number == len(self.author_rows):
+            grams = trigrams(author)
+            self.author_sizes.append(len(grams))
+            _add(self.author_postings, grams, author_number)
+            self.author_rows.append(array("i"))
+        self.author_rows[author_number].append(row)
+
+
+class BookTrigramIndex(InMemoryIndex):
+    """
+    Нечёткий поиск книг по триграммам названия и автора для SQLite, где
+    нет pg_trgm.
+
+    Сходство считается как similarity() в pg_trgm, поэтому результаты
+    совпадают с поиском на Postgres. Списки строк по триграммам хранятся
+    в компактных массивах и поддерживаются из CRUD; место старых версий
+    книг освобождается полной перестройкой в отдельном потоке. На Postgres
+    индекс не строится: там ищет GIN-индекс pg_trgm.
+    """
+
+    name = "book_trigrams"
+
+    def __init__(self, rebuild_interval: float):
+        super().__init__()
+        self.rebuild_interval = rebuild_interval
+        self.reset()
+
+    def reset(self) -> None:
+        self.loaded = False
+        self.enabled = True
+        self._store = _Store()
+        self._pending: list[tuple[int, str, str] | int] | None = None
+
+    async def _rebuild(self, db: AsyncSession) -> None:
+        self.enabled = db.bind.dialect.name != "postgresql"
+        if not self.enabled:
+            return
+        # Очередь — до чтения книг, как в BookSuggestIndex._rebuild
+        self._pending = []
+        try:
+            rows = await db.execute(
+                select(BookModel.id, BookModel.title, BookModel.author).order_by(
+                    BookModel.id
+                )
+            )
+            store = await asyncio.to_thread(self._build, rows.all())
+            for change in self._pending:
+                if isinstance(change, int):
+                    store.remove(change)
+                else:
+                    store.append(*change)
+            self._store = store
+        finally:
+            self._pending = None
+
+    @staticmethod
+    def _build(books) -> _Store:
+        store = _Store()
+        for book_id, title, author in books:
+            store.append(book_id, title, author)
+        return store
+
+    def book_saved(self, book_id: int, title: str, author: str) -> None:
+        if self._pending is not None:
+            self._pending.append((book_id, title, author))
+        if self.loaded and self.enabled:
+            self._store.append(book_id, title, author)
+
+    def book_removed(self, book_id: int) -> None:
+        self._store.remove(book_id)
+        if self._pending is not None:
+            self._pending.append(book_id)
+
+    def search(
+        self, query: str, limit: int, threshold: float, budget: float
+    ) -> tuple[list[dict], bool]:
+        """
+        До `limit` книг по убыванию сходства названия или автора с `query`.
+        Второй элемент — False, если поиск не уложился в `budget` секунд
+        и возвращены лучшие из найденных к этому моменту
+        """
+        grams = trigrams(query)
+        if not grams:
+            return [], True
+        store = self._store
+        deadline = time.perf_counter() + budget
+        # Авторов намного меньше, чем книг, поэтому они проверяются первыми
+        authors: dict[int, float] = {}
+        titles: dict[int, float] = {}
+        complete = _similar(
+            store.author_postings,
+            store.author_sizes,
+            grams,
+            threshold,
+            deadline,
+            authors,
+        ) and _similar(
+            store.title_postings, store.title_sizes, grams, threshold, deadline, titles
+        )
+
+        best = {row: score for row, score in titles.items() if store.book_ids[row]}
+        for author_number, score in authors.items():
+            for row in store.author_rows[author_number]:
+                if store.book_ids[row] and score > best.get(row, 0.0):
+                    best[row] = score
+        top = heapq.nlargest(
+            limit, best.items(), key=lambda item: (item[1], -store.book_ids[item[0]])
+        )
+        hits = [
+            {
+                "id": store.book_ids[row],
+                "title": store.title(row),
+                "author": store.author(row),
+                "score": round(score, 4),
+            }
+            for row, score in top
+        ]
+        return hits, complete
+
+
+book_trigrams = register_index(
+    BookTrigramIndex(rebuild_interval=settings.FUZZY_SEARCH_REBUILD_SECONDS)
+)
+
+
+async def fuzzy_search(
+    db: AsyncSession, query: str, limit: int
+) -> tuple[list[dict], bool]:
+    """
+    Нечёткий поиск книг: на Postgres — GIN-индексами pg_trgm, иначе —
+    индексом в памяти. Второй элемент — False, если поиск не уложился
+    в FUZZY_SEARCH_BUDGET_MS или индекс в памяти ещё загружается
+    """
+    threshold = settings.FUZZY_SEARCH_THRESHOLD
+    budget_ms = settings.FUZZY_SEARCH_BUDGET_MS
+    if db.bind.dialect.name != "postgresql":
+        if not book_trigrams.loaded:
+            # Прогрев не загрузил индекс: строить его в запросе слишком долго
+            book_trigrams.load_in_background()
+            return [], False
+        return book_trigrams.search(query, limit, threshold, budget_ms / 1000)
+
+    score = func.greatest(
+        func.similarity(BookModel.title, query),
+        func.similarity(BookModel.author, query),
+    ).label("score")
+    statement = (
+        select(BookModel.id, BookModel.title, BookModel.author, score)
+        # Оператор % использует GIN-индекс, порог — pg_trgm.similarity_threshold
+        .where(or_(BookModel.title.op("%")(query), BookModel.author.op("%")(query)))
+        .order_by(score.desc(), BookModel.id)
+        .limit(limit)
+    )
+    # set_config(..., true) — как SET LOCAL: действует до конца транзакции, а
+    # откат точки сохранения возвращает прежние значения. Поиск ничего не
+    # меняет, поэтому точка откатывается всегда — иначе порог и таймаут
+    # достались бы следующим запросам в той же транзакции (лента /batch)
+    savepoint = await db.begin_nested()
+    try:
+        await db.execute(
+            select(
+                func.set_config("pg_trgm.similarity_threshold", str(threshold), True),
+                func.set_config("statement_timeout", str(budget_ms), True),
+            )
+        )
+        rows = (await db.execute(statement)).all()
+    except DBAPIError as exc:
+        if getattr(exc.orig, "sqlstate", None) != QUERY_CANCELED:
+            raise
+        return [], False
+    finally:
+        await savepoint.rollback()
+    hits = [
+        {"id": id, "title": title, "author": author, "score": round(score, 4)}
+        for id, title, author, score in rows
+    ]
+    return hits, True
@@ -0,0 +1,161 @@
+import bisect
+from collections.abc import Callable
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.books.models import UNRATED, BookModel
+from src.reviews.models import RatingHistogramModel
+from src.shared.config import settings
+from src.shared.indexes import InMemoryIndex, register_index
+
+
+class RatingLeaderboard(InMemoryIndex):
+    """
+    Рейтинг книг по байесовскому среднему оценок из отзывов.
+
+    score = (prior · m + сумма оценок) / (m + число оценок), где m —
+    LEADERBOARD_MIN_REVIEWS: пока отзывов меньше m, книга держится около
+    своего априорного значения и не взлетает от одной пятёрки. Априорное
+    значение — рейтинг книги, заданный при создании, а если его нет (NULL
+    или UNRATED) — средняя оценка по всем отзывам на момент перестройки.
+
+    Книги хранятся в отсортированном списке ключей (-score, id): страница —
+    срез списка, запись отзыва — bisect и вставка, без запросов к БД.
+    """
+
+    name = "leaderboard"
+
+    def __init__(self, min_reviews: int, rebuild_interval: float):
+        super().__init__()
+        self.min_reviews = min_reviews
+        self.rebuild_interval = rebuild_interval
+        self.reset()
+
+    def reset(self) -> None:
+        self.loaded = False
+        self._global_mean = 0.0
+        # book_id -> [априорное значение, число оценок, сумма оценок]
+        self._stats: dict[int, list[float]] = {}
+        self._keys: dict[int, tuple[float, int]] = {}
+        self._ranked: list[tuple[float, int]] = []
+        # Изменения, пришедшие во время перестройки
+        self._pending: list[tuple[Callable, tuple]] | None = None
+
+    async def _rebuild(self, db: AsyncSession) -> None:
+        # Очередь заводится до чтения: изменение, зафиксированное во время
+        # запроса, иначе осталось бы только в выбрасываемом рейтинге
+        self._pending = []
+        try:
+            # Число и сумма оценок — из гистограмм: reviews не просматривается.
+            # Общее среднее считается по тем же строкам, то есть по одному
+            # снимку данных, а не отдельным запросом
+            count = RatingHistogramModel.count_expression()
+            total = RatingHistogramModel.sum_expression()
+            rows = await db.execute(
+                select(
+                    BookModel.id,
+                    BookModel.rating,
+                    func.coalesce(count, 0),
+                    func.coalesce(total, 0),
+                ).outerjoin(
+                    RatingHistogramModel, RatingHistogramModel.book_id == BookModel.id
+                )
+            )
+            rows = rows.all()
+            overall_count = sum(row[2] for row in rows)
+            overall_total = sum(row[3] for row in rows)
+
+            self._global_mean = overall_total / overall_count if overall_count else 0.0
+            self._stats = {
+                book_id: [self._prior(rating), count, total]
+                for book_id, rating, count, total in rows
+            }
+            self._keys = {
+                book_id: self._key(book_id, stats)
+                for book_id, stats in self._stats.items()
+            }
+            self._ranked = sorted(self._keys.values())
+            # Изменение, зафиксированное перед самым чтением, может попасть и в
+            # выборку, и в очередь; лишний отзыв уйдёт при следующей перестройке
+            for apply, args in self._pending:
+                apply(*args)
+        finally:
+            self._pending = None
+
+    def _prior(self, rating: float | None) -> float:
+        # Книга, созданная без рейтинга, хранит UNRATED, и заданный вручную 0.0
+        # от него не отличить. Оба считаются отсутствием рейтинга: иначе каждая
+        # книга без рейтинга начинала бы с самой низкой оценки
+        if rating is None or rating == UNRATED:
+            return self._global_mean
+        return rating
+
+    def _key(self, book_id: int, stats: list[float]) -> tuple[float, int]:
+        prior, count, total = stats
+        score = (prior * self.min_reviews + total) / (self.min_reviews + count)
+        return -score, book_id
+
+    def _place(self, book_id: int) -> None:
+        old = self._keys.pop(book_id, None)
+        if old is not None:
+            del self._ranked[bisect.bisect_left(self._ranked, old)]
+        stats = self._stats.get(book_id)
+        if stats is not None:
+            key = self._keys[book_id] = self._key(book_id, stats)
+            bisect.insort(self._ranked, key)
+
+    def page(self, skip: int, limit: int) -> list[int]:
+        return [book_id for _, book_id in self._ranked[skip : skip + limit]]
+
+    def book_saved(self, book_id: int, rating: float | None) -> None:
+        self._track(self._book_saved, book_id, rating)
+        if self.loaded:
+            self._book_saved(book_id, rating)
+
+    def _book_saved(self, book_id: int, rating: float | None) -> None:
+        stats = self._stats.setdefault(book_id, [0.0, 0, 0])
+        stats[0] = self._prior(rating)
+        self._place(book_id)
+
+    def book_removed(self, book_id: int) -> None:
+        self._track(self._book_removed, book_id)
+        self._book_removed(book_id)
+
+    def _book_removed(self, book_id: int) -> None:
+        if self._stats.pop(book_id, None) is not None:
+            self._place(book_id)
+
+    def review_added(self, book_id: int, rating: int) -> None:
+        self._track(self._review_added, book_id, rating)
+        self._review_added(book_id, rating)
+
+    def _review_added(self, book_id: int, rating: int) -> None:
+        stats = self._stats.get(book_id)
+        if stats is not None:
+            stats[1] += 1
+            stats[2] += rating
+            self._place(book_id)
+
+    def review_removed(self, book_id: int, rating: int) -> None:
+        self._track(self._review_removed, book_id, rating)
+        self._review_removed(book_id, rating)
+
+    def _review_removed(self, book_id: int, rating: int) -> None:
+        stats = self._stats.get(book_id)
+        if stats is not None and stats[1]:
+            stats[1] -= 1
+            stats[2] -= rating
+            self._place(book_id)
+
+    def _track(self, apply: Callable, *args) -> None:
+        if self._pending is not None:
+            self._pending.append((apply, args))
+
+
+leaderboard = register_index(
+    RatingLeaderboard(
+        min_reviews=settings.LEADERBOARD_MIN_REVIEWS,
+        rebuild_interval=settings.LEADERBOARD_REBUILD_SECONDS,
+    )
+)
@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import TYPE_CHECKING
 
-from sqlalchemy import DateTime, String, func
+from sqlalchemy import DDL, DateTime, Index, String, event, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.shared.database import Base
@@ -10,22 +10,59 @@ if TYPE_CHECKING:
     from src.favorites.models import FavoriteModel
     from src.reviews.models import ReviewModel
 
+# Рейтинг книги, созданной без рейтинга: API передаёт None, и ORM
+# подставляет значение по умолчанию
+UNRATED = 0.0
+
 
 class BookModel(Base):
     __tablename__ = "books"
+    __table_args__ = (
+        # Индекс на каждую сортировку каталога, с id для однозначного порядка:
+        # страница читается из индекса подряд, без сортировки выборки. Варианты
+        # с author первым обслуживают сортировку внутри фильтра по автору
+        Index("ix_books_title_id", "title", "id"),
+        Index("ix_books_rating_id", "rating", "id"),
+        Index("ix_books_pages_id", "pages", "id"),
+        Index("ix_books_created_at_id", "created_at", "id"),
+        Index("ix_books_author_title_id", "author", "title", "id"),
+        Index("ix_books_author_rating_id", "author", "rating", "id"),
+        Index("ix_books_author_pages_id", "author", "pages", "id"),
+        Index("ix_books_author_created_at_id", "author", "created_at", "id"),
+        # Нечёткий поиск /books/search: GIN-индексы pg_trgm для оператора %
+        Index(
+            "ix_books_title_trgm",
+            "title",
+            postgresql_using="gin",
+            postgresql_ops={"title": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+        Index(
+            "ix_books_author_trgm",
+            "author",
+            postgresql_using="gin",
+            postgresql_ops={"author": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    title: Mapped[str] = mapped_column(String(100), index=True)
+    title: Mapped[str] = mapped_column(String(100))
     author: Mapped[str] = mapped_column(String(100), index=True)
     pages: Mapped[int] = mapped_column()
-    rating: Mapped[float | None] = mapped_column(default=0.0)
+    rating: Mapped[float | None] = mapped_column(default=UNRATED)
     created_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), server_default=func.now(), index=True
+        DateTime(timezone=True), server_default=func.now()
     )
 
-    favorited_by: Mapped["FavoriteModel"] = relationship(
+    favorited_by: Mapped[list["FavoriteModel"]] = relationship(
         back_populates="book", cascade="all, delete-orphan"
     )
     reviews: Mapped[list["ReviewModel"]] = relationship(
         back_populates="book", cascade="all, delete-orphan", lazy="selectin"
     )
+
+
+event.listen(
+    BookModel.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
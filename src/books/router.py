@@ -1,14 +1,43 @@
-from fastapi import APIRouter
+from typing import Annotated
 
-from src.auth.dependencies import AdminDep
+from fastapi import APIRouter, Depends, Query, Response
+
+from src.auth.dependencies import AdminDep, OptionalUserDep
 from src.books.crud import book as book_crud
-from src.books.schemas import Book, BookCreate, BookUpdate
+from src.books.crud import book_count
+from src.books.detail import book_detail
+from src.books.facets import MAX_AUTHORS, book_conditions, book_facets
+from src.books.fuzzy import fuzzy_search
+from src.books.models import BookModel
+from src.books.schemas import (
+    Book,
+    BookCreate,
+    BookDetail,
+    BookFacets,
+    BookFilter,
+    BookListItem,
+    BookQuery,
+    BookSearchResults,
+    BookSuggestion,
+    BookUpdate,
+    RatingDistribution,
+)
+from src.books.suggest import BookSuggestIndex, book_suggest
+from src.books.summaries import book_includes, book_summaries
+from src.reviews.histogram import get_histogram, rating_summary
 from src.shared.database import DatabaseDep
 from src.shared.exceptions import AlreadyExistsException, NotFoundException
+from src.shared.fields import FieldSelection, sparse_fields
 from src.shared.pagination import PaginationDep
 
 router = APIRouter(prefix="/books", tags=["Books"])
 
+BookFilterDep = Annotated[BookFilter, Depends(BookFilter)]
+BookQueryDep = Annotated[BookQuery, Depends(BookQuery)]
+BookSuggestDep = Annotated[BookSuggestIndex, Depends(book_suggest)]
+BookFieldsDep = Annotated[FieldSelection, Depends(sparse_fields(Book, BookModel))]
+BookIncludesDep = Annotated[tuple[str, ...], Depends(book_includes)]
+
 
 @router.post(
     "/",
@@ -48,48 +77,248 @@ async def create_book(book_data: BookCreate, db: DatabaseDep, current_user: Admi
 
 @router.get(
     "/",
-    response_model=list[Book],
+    response_model=list[BookListItem],
+    response_model_exclude_unset=True,
     summary="Gets paginated list of books",
     responses={
         200: {"description": "List of books retrieved successfully"},
         400: {"description": "Invalid pagination parameters"},
+        422: {"description": "Invalid filter, sort, fields or include parameters"},
         500: {"description": "Internal server error"},
     },
 )
-async def read_books(db: DatabaseDep, pagination: PaginationDep):
+async def read_books(
+    db: DatabaseDep,
+    pagination: PaginationDep,
+    query: BookQueryDep,
+    fields: BookFieldsDep,
+    include: BookIncludesDep,
+    response: Response,
+):
     """
-    ## Retrieve a paginated list of all books in the system
+    ## Retrieve a paginated, optionally filtered and sorted list of books
 
     **Query parameters**:
     - **skip**: Number of records to skip (min 0)
     - **limit**: Number of records to return (1-100), default: 10
+    - **author**: exact author name
+    - **pages_min**, **pages_max**: number of pages range (inclusive)
+    - **rating_min**, **rating_max**: rating range (inclusive)
+    - **created_after**, **created_before**: date added range
+    - **sort**: `id` (default), `title`, `rating`, `pages` or `created_at`;
+    prefix with `-` for descending order, e.g. `-rating`
+    - **fields**: comma-separated fields to return, e.g. `id,title`; all by default
+    - **include**: comma-separated summaries to add to every book:
+    `rating_summary` (average and number of review ratings), `favorite_count`
 
     **Example**:
     - `GET /books/?skip=0&limit=20` - first page of 20 books
     - `GET /books/?skip=20&limit=20` - second page of 20 books
+    - `GET /books/?author=Лев Толстой&sort=-rating` - an author's books, best first
+    - `GET /books/?fields=id,title` - only IDs and titles
+    - `GET /books/?include=rating_summary` - books with their review ratings
+
+    **Response headers:**
+    - **X-Total-Count**: total number of books matching the filters
     """
-    return await book_crud.get_all(db, pagination.skip, pagination.limit)
+    filters = BookFilter.model_validate(query.model_dump(exclude={"sort"}))
+    conditions = book_conditions(filters)
+    if conditions:
+        total = await book_count.count_where(db, filters.model_dump_json(), *conditions)
+        if total is not None:
+            response.headers["X-Total-Count"] = str(total)
+    else:
+        await book_count(response)
+    books = await book_crud.browse(
+        db, query, pagination.skip, pagination.limit, fields.options()
+    )
+    summaries = await book_summaries(db, [book.id for book in books], include)
+    return fields.render(books, summaries)
+
+
+@router.get(
+    "/facets",
+    response_model=BookFacets,
+    summary="Get book counts per author and rating",
+    responses={
+        200: {"description": "Facet counts retrieved successfully"},
+        422: {"description": "Invalid filter parameters"},
+        500: {"description": "Internal server error"},
+    },
+)
+async def get_book_facets(
+    db: DatabaseDep,
+    filters: BookFilterDep,
+    authors: Annotated[int, Query(ge=1, le=MAX_AUTHORS)] = 20,
+):
+    """
+    ## Count the books matching the filters per author and per rating
+
+    **Query parameters**:
+    - the same filters as `GET /books/`
+    - **authors**: number of authors with the most books to return (1-100), default: 20
+
+    **Response**:
+    - **total**: number of books matching the filters
+    - **authors**: authors with the most matching books
+    - **ratings**: matching books per whole rating, e.g. `4` counts ratings
+    from 4.0 up to (not including) 5.0; `null` for books without a rating
+
+    <u>Note: computed in one grouped query and cached per filter set for
+    `BOOK_FACETS_TTL` seconds or until a book changes.</u>
+    """
+    facets = await book_facets.get(db, filters)
+    return {**facets, "authors": facets["authors"][:authors]}
 
 
 @router.get(
     "/top_rated",
-    response_model=list[Book],
+    response_model=list[BookListItem],
+    response_model_exclude_unset=True,
+    dependencies=[Depends(book_count)],
     summary="Get top rated books",
     responses={
         200: {"description": "Top rated books retrieved successfully"},
+        422: {"description": "Invalid pagination, fields or include parameters"},
         500: {"description": "Internal server error"},
     },
 )
-async def get_top_books(db: DatabaseDep, pagination: PaginationDep):
+async def get_top_books(
+    db: DatabaseDep,
+    pagination: PaginationDep,
+    fields: BookFieldsDep,
+    include: BookIncludesDep,
+):
     """
     ## Retrieve the highest rated books in descending order
 
     **Query parameters**:
-    - **limit**: number of top books to return (1-50), default: 10
+    - **skip**: Number of records to skip (min 0)
+    - **limit**: number of top books to return (1-100), default: 10
+    - **fields**: comma-separated fields to return, e.g. `id,title`; all by default
+    - **include**: comma-separated summaries to add to every book:
+    `rating_summary` (average and number of review ratings), `favorite_count`
+
+    **Ranking**:
+    - Bayesian average of review ratings: the book's own rating (or the average of
+    all reviews if it has none) counts as `LEADERBOARD_MIN_REVIEWS` extra reviews,
+    so a single 5-star review can't push a book to the top
+
+    **Response headers:**
+    - **X-Total-Count**: total number of books
+
+    <u>Note: served from an in-memory leaderboard updated on every review write
+    and fully recomputed every `LEADERBOARD_REBUILD_SECONDS`.</u>
+    """
+    books = await book_crud.get_top_rated(
+        db, pagination.skip, pagination.limit, fields.options()
+    )
+    summaries = await book_summaries(db, [book.id for book in books], include)
+    return fields.render(books, summaries)
+
+
+@router.get(
+    "/trending",
+    response_model=list[Book],
+    summary="Get trending books",
+    responses={
+        200: {"description": "Trending books retrieved successfully"},
+        422: {"description": "Invalid limit or fields"},
+        500: {"description": "Internal server error"},
+    },
+)
+async def get_trending_books(
+    db: DatabaseDep,
+    fields: BookFieldsDep,
+    limit: Annotated[int, Query(ge=1, le=100)] = 10,
+):
+    """
+    ## Retrieve the books with the most recent activity
+
+    **Query parameters**:
+    - **limit**: number of books to return (1-100), default: 10
+    - **fields**: comma-separated fields to return, e.g. `id,title`; all by default
+
+    **Ranking**:
+    - Every favorite and review counts as one event whose weight halves every
+    `TRENDING_HALF_LIFE_HOURS`
+
+    <u>Note: served from in-memory counters updated on every favorite and review,
+    only books with activity are returned.</u>
+    """
+    books = await book_crud.get_trending(db, limit, fields.options())
+    return fields.render(books)
+
+
+@router.get(
+    "/suggest",
+    response_model=list[BookSuggestion],
+    summary="Suggest books while typing",
+    responses={
+        200: {"description": "Suggestions retrieved successfully"},
+        422: {"description": "Invalid query or limit"},
+        500: {"description": "Internal server error"},
+    },
+)
+async def suggest_books(
+    index: BookSuggestDep,
+    q: Annotated[str, Query(min_length=1, max_length=100)],
+    limit: Annotated[int, Query(ge=1, le=20)] = 10,
+):
+    """
+    ## Suggest books whose title or author words start with the typed text
+
+    **Query parameters**:
+    - **q**: typed text; every word must start a word of the title or author,
+    case-insensitive, `ё` matches `е`
+    - **limit**: number of suggestions to return (1-20), default: 10
+
+    **Example**:
+    - `GET /books/suggest?q=толст во` - "Война и мир" by Лев Толстой
+
+    <u>Note: served from an in-memory index without database queries.</u>
+    """
+    return index.suggest(q, limit)
+
+
+@router.get(
+    "/search",
+    response_model=BookSearchResults,
+    summary="Search books by title or author, tolerating typos",
+    responses={
+        200: {"description": "Search results retrieved successfully"},
+        422: {"description": "Invalid query or limit"},
+        500: {"description": "Internal server error"},
+    },
+)
+async def search_books(
+    db: DatabaseDep,
+    q: Annotated[str, Query(min_length=1, max_length=100)],
+    limit: Annotated[int, Query(ge=1, le=50)] = 10,
+):
+    """
+    ## Find books whose title or author is similar to the query
+
+    **Query parameters**:
+    - **q**: search text, misspellings allowed
+    - **limit**: number of books to return (1-50), default: 10
+
+    **Example**:
+    - `GET /books/search?q=достаевский` - books by Фёдор Достоевский
+
+    **Response**:
+    - **items**: books ordered by **score**, the trigram similarity (0-1) of the
+    title or the author to the query, whichever is higher; only books scoring at
+    least `FUZZY_SEARCH_THRESHOLD` are returned
+    - **complete**: `false` if the search ran out of its `FUZZY_SEARCH_BUDGET_MS`
+    time budget and the results may be missing better matches, or if the
+    in-memory index is still loading after a restart
 
-    <u>Note: books without ratings are excluded from the results. Results are sorted by rating descending.</u>
+    <u>Note: uses pg_trgm GIN indexes on PostgreSQL and an in-memory trigram
+    index on SQLite.</u>
     """
-    return await book_crud.get_top_rated(db, pagination.skip, pagination.limit)
+    items, complete = await fuzzy_search(db, q, limit)
+    return {"items": items, "complete": complete}
 
 
 @router.get(
@@ -99,23 +328,113 @@ async def get_top_books(db: DatabaseDep, pagination: PaginationDep):
     responses={
         200: {"description": "Book found successfully", "model": Book},
         404: {"description": "Book not found with the specified ID"},
-        422: {"description": "Invalid book ID format"},
+        422: {"description": "Invalid book ID format or fields"},
         500: {"description": "Internal server error"},
     },
 )
-async def read_book(book_id: int, db: DatabaseDep):
+async def read_book(book_id: int, db: DatabaseDep, fields: BookFieldsDep):
     """
     ## Retrieve a specific book by its unique identifier
 
     **Path parameters**:
     - **book_id**: unique integer ID of the book
+
+    **Query parameters**:
+    - **fields**: comma-separated fields to return, e.g. `id,title`; all by default
     """
-    db_book = await book_crud.get(db, book_id)
+    db_book = await book_crud.get(db, book_id, fields.options())
     if not db_book:
         raise NotFoundException(
             detail="Book not found", resource_type="book", resource_id=book_id
         )
-    return db_book
+    return fields.render(db_book)
+
+
+@router.get(
+    "/{book_id}/full",
+    response_model=BookDetail,
+    summary="Get everything for the book page",
+    responses={
+        200: {"description": "Book page retrieved successfully", "model": BookDetail},
+        401: {"description": "Invalid token"},
+        404: {"description": "Book not found with the specified ID"},
+        422: {"description": "Invalid book ID or reviews limit"},
+        500: {"description": "Internal server error"},
+    },
+)
+async def read_book_full(
+    book_id: int,
+    db: DatabaseDep,
+    user: OptionalUserDep,
+    reviews: Annotated[int, Query(ge=1, le=100)] = 10,
+):
+    """
+    ## Retrieve a book with its rating, latest reviews and favorites in one call
+
+    **Path parameters**:
+    - **book_id**: unique integer ID of the book
+
+    **Query parameters**:
+    - **reviews**: number of latest reviews to return (1-100), default: 10
+
+    **Response**:
+    - **book**: the book, as in `GET /books/{book_id}`
+    - **rating_summary**: **average** (`null` without reviews) and **count**
+    of review ratings
+    - **favorite_count**: number of users who added the book to favorites
+    - **is_favorite**: whether the caller has the book in favorites;
+    `null` without an `Authorization` header
+    - **reviews**: the latest reviews, newest first
+
+    <u>Note: replaces the book, average rating, reviews and favorite status
+    requests. The book with all its counters is one query, followed by the
+    reviews query on the same database connection.</u>
+    """
+    detail = await book_detail(db, book_id, user.id if user else None, reviews)
+    if detail is None:
+        raise NotFoundException(
+            detail="Book not found", resource_type="book", resource_id=book_id
+        )
+    return detail
+
+
+@router.get(
+    "/{book_id}/rating_distribution",
+    response_model=RatingDistribution,
+    summary="Get the number of reviews per rating",
+    responses={
+        200: {"description": "Rating distribution retrieved successfully"},
+        404: {"description": "Book not found with the specified ID"},
+        422: {"description": "Invalid book ID format"},
+        500: {"description": "Internal server error"},
+    },
+)
+async def get_rating_distribution(book_id: int, db: DatabaseDep):
+    """
+    ## Count the book's reviews for every rating from 1 to 5
+
+    **Path parameters**:
+    - **book_id**: unique integer ID of the book
+
+    **Response**:
+    - **average**: average review rating, `null` without reviews
+    - **count**: number of reviews
+    - **ratings**: number of reviews per rating, all five ratings included
+
+    <u>Note: read from per-book counters updated in the same transaction as
+    every review write, without scanning reviews.</u>
+    """
+    histogram = await get_histogram(db, book_id)
+    if histogram is None:
+        raise NotFoundException(
+            detail="Book not found", resource_type="book", resource_id=book_id
+        )
+    return {
+        **rating_summary(histogram),
+        "ratings": [
+            {"rating": rating, "count": count} for rating, count in histogram.items()
+        ],
+    }
 
 
 @router.put(
@@ -0,0 +1,53 @@
+from array import array
+from dataclasses import dataclass, field
+
+
+@dataclass(slots=True)
+class BookRows:
+    """
+    Строки книг для индексов в памяти: по одной на сохранение книги, только
+    добавляются. Изменённая или удалённая книга оставляет строку с
+    book_id = 0 до следующей перестройки индекса.
+    """
+
+    book_ids: array = field(default_factory=lambda: array("q"))
+    authors: array = field(default_factory=lambda: array("i"))
+    # Названия в UTF-8 одним буфером: titles[starts[r]:starts[r + 1]] — строки r
+    titles: bytearray = field(default_factory=bytearray)
+    starts: array = field(default_factory=lambda: array("q", [0]))
+    author_names: list[str] = field(default_factory=list)
+    author_numbers: dict[str, int] = field(default_factory=dict)
+    # Строка книги по её ID (ID идут подряд, массив компактнее словаря); -1 — нет
+    row_of: array = field(default_factory=lambda: array("i"))
+    # Число строк с book_id = 0: память, которую вернёт только перестройка
+    dead: int = 0
+
+    def append_row(self, book_id: int, title: str, author: str) -> tuple[int, int]:
+        """Добавляет строку книги, прежнюю помечает удалённой; (строка, номер автора)"""
+        self.remove(book_id)
+
+        row = len(self.book_ids)
+        author_number = self.author_numbers.get(author)
+        if author_number is None:
+            author_number = self.author_numbers[author] = len(self.author_names)
+            self.author_names.append(author)
+        self.book_ids.append(book_id)
+        self.authors.append(author_number)
+        self.titles += title.encode()
+        self.starts.append(len(self.titles))
+        if book_id >= len(self.row_of):
+            self.row_of.extend([-1] * (book_id + 1 - len(self.row_of)))
+        self.row_of[book_id] = row
+        return row, author_number
+
+    def remove(self, book_id: int) -> None:
+        if book_id < len(self.row_of) and self.row_of[book_id] >= 0:
+            self.book_ids[self.row_of[book_id]] = 0
+            self.row_of[book_id] = -1
+            self.dead += 1
+
+    def title(self, row: int) -> str:
+        return self.titles[self.starts[row] : self.starts[row + 1]].decode()
+
+    def author(self, row: int) -> str:
+        return self.author_names[self.authors[row]]
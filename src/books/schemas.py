@@ -1,7 +1,10 @@
 from datetime import datetime
+from typing import Literal
 
 from pydantic import BaseModel, ConfigDict, Field
 
+from src.reviews.schemas import Review
+
 
 class BookBase(BaseModel):
     title: str = Field(..., max_length=100, examples=["Война и мир"])
@@ -20,8 +23,101 @@ class Book(BookBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+class RatingSummary(BaseModel):
+    average: float | None = Field(None, examples=[4.2])
+    count: int = Field(..., examples=[12])
+
+
+class RatingCount(BaseModel):
+    rating: int = Field(..., ge=1, le=5)
+    count: int
+
+
+class RatingDistribution(RatingSummary):
+    # Все оценки от 1 до 5, в том числе с нулевым числом
+    ratings: list[RatingCount]
+
+
+class BookListItem(Book):
+    # Заполняются только по запросу (?include=), иначе в ответе отсутствуют
+    rating_summary: RatingSummary | None = None
+    favorite_count: int | None = None
+
+
+class BookDetail(BaseModel):
+    book: Book
+    rating_summary: RatingSummary
+    favorite_count: int
+    # None для анонимного запроса
+    is_favorite: bool | None
+    reviews: list[Review]
+
+
 class BookUpdate(BaseModel):
     title: str | None = Field(None, max_length=100, examples=["Война и мир"])
     author: str | None = Field(None, max_length=100, examples=["Лев Толстой"])
     pages: int | None = Field(None, gt=0, examples=[100, 250])
     rating: float | None = Field(None, ge=0.0, le=5.0, examples=[3.5])
+
+
+BookSort = Literal[
+    "id",
+    "title",
+    "-title",
+    "rating",
+    "-rating",
+    "pages",
+    "-pages",
+    "created_at",
+    "-created_at",
+]
+
+
+class BookFilter(BaseModel):
+    author: str | None = Field(None, max_length=100, examples=["Лев Толстой"])
+    pages_min: int | None = Field(None, ge=0)
+    pages_max: int | None = Field(None, ge=0)
+    rating_min: float | None = Field(None, ge=0.0, le=5.0)
+    rating_max: float | None = Field(None, ge=0.0, le=5.0)
+    created_after: datetime | None = None
+    created_before: datetime | None = None
+
+
+class BookQuery(BookFilter):
+    sort: BookSort = Field(
+        "id", description="Sort field, `-` prefix for descending order"
+    )
+
+
+class AuthorFacet(BaseModel):
+    author: str
+    count: int
+
+
+class RatingFacet(BaseModel):
+    # Целая часть рейтинга: 4 — рейтинг от 4.0 до 5.0 не включительно
+    rating: int | None
+    count: int
+
+
+class BookFacets(BaseModel):
+    total: int
+    authors: list[AuthorFacet]
+    ratings: list[RatingFacet]
+
+
+class BookSuggestion(BaseModel):
+    id: int
+    title: str
+    author: str
+
+
+class BookSearchHit(BookSuggestion):
+    # Сходство названия или автора с запросом, от 0 до 1
+    score: float
+
+
+class BookSearchResults(BaseModel):
+    items: list[BookSearchHit]
+    # False — поиск не уложился в бюджет времени, результаты неполные
+    complete: bool
@@ -0,0 +1,213 @@
+import asyncio
+import bisect
+import re
+from array import array
+from dataclasses import dataclass, field
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.books.models import BookModel
+from src.books.rows import BookRows
+from src.shared.config import settings
+from src.shared.indexes import InMemoryIndex, register_index
+
+WORD = re.compile(r"\w+")
+# Длиннее слова в индекс не попадают: для подсказок хватает начала слова
+MAX_WORD_LENGTH = 24
+# Сколько кандидатов проверить на остальные слова запроса, прежде чем сдаться
+SCAN_LIMIT = 5_000
+# Остальные слова запроса проверяются bisect'ом по спискам строк, если
+# под префикс попадает не больше стольких слов, иначе — по словам книги
+MAX_LOOKUP_WORDS = 64
+
+
+def normalize_words(text: str) -> list[str]:
+    return [
+        word[:MAX_WORD_LENGTH]
+        for word in WORD.findall(text.casefold().replace("ё", "е"))
+    ]
+
+
+@dataclass(slots=True)
+class _Store(BookRows):
+    # Отсортированный словарь слов и строки, в которых слово встречается
+    words: list[str] = field(default_factory=list)
+    postings: dict[str, array] = field(default_factory=dict)
+
+    def append(
+        self, book_id: int, title: str, author: str, sort_words: bool = True
+    ) -> None:
+        row, _ = self.append_row(book_id, title, author)
+        for word in set(normalize_words(f"{title} {author}")):
+            rows = self.postings.get(word)
+            if rows is None:
+                rows = self.postings[word] = array("i")
+                if sort_words:
+                    bisect.insort(self.words, word)
+            # Строки только добавляются, поэтому списки остаются упорядоченными
+            rows.append(row)
+
+    def prefix_range(self, prefix: str) -> tuple[int, int]:
+        start = bisect.bisect_left(self.words, prefix)
+        end = bisect.bisect_left(self.words, prefix + "\U0010ffff", start)
+        return start, end
+
+    def volume(self, prefix: str, limit: int | None = None) -> int:
+        """Число строк со словом на `prefix`; счёт прекращается после `limit`"""
+        start, end = self.prefix_range(prefix)
+        total = 0
+        for position in range(start, end):
+            total += len(self.postings[self.words[position]])
+            if limit is not None and total > limit:
+                break
+        return total
+
+    def has_prefix(self, row: int, lists: list[array]) -> bool:
+        for rows in lists:
+            position = bisect.bisect_left(rows, row)
+            if position < len(rows) and rows[position] == row:
+                return True
+        return False
+
+    def rows_for_prefix(self, prefix: str):
+        """Строки со словом на `prefix`: сначала точное слово, затем по алфавиту"""
+        start, end = self.prefix_range(prefix)
+        for position in range(start, end):
+            yield from self.postings[self.words[position]]
+
+
+class BookSuggestIndex(InMemoryIndex):
+    """
+    Подсказки по названиям и авторам книг при наборе текста, без запросов к БД.
+
+    Слова названия и автора (casefold, ё → е) хранятся в отсортированном
+    словаре; префикс находится bisect'ом, а строки с подходящими словами —
+    в компактных массивах. Последнее слово запроса считается недописанным,
+    остальные тоже сопоставляются с началами слов книги. Книги
+    добавляются и обновляются из CRUD; место удалённых и старых версий
+    освобождается полной перестройкой, которая идёт в отдельном потоке,
+    а изменения, пришедшие за это время, применяются к новому индексу.
+    Когда таких строк больше `max_dead_rows`, перестройка запускается
+    раньше срока — память индекса не растёт от частых правок.
+    """
+
+    name = "book_suggest"
+
+    def __init__(self, rebuild_interval: float, max_dead_rows: int | None = None):
+        super().__init__()
+        self.rebuild_interval = rebuild_interval
+        self.max_dead_rows = max_dead_rows
+        self.reset()
+
+    def reset(self) -> None:
+        self.loaded = False
+        self._store = _Store()
+        self._pending: list[tuple[int, str, str] | int] | None = None
+
+    async def _rebuild(self, db: AsyncSession) -> None:
+        # Очередь заводится до чтения книг: изменение, зафиксированное во время
+        # запроса, иначе осталось бы только в выбрасываемом индексе. Повтор
+        # изменения, уже попавшего в выборку, ничего не меняет: сохранение
+        # заменяет строку книги, удаление уже удалённой ничего не делает
+        self._pending = []
+        try:
+            rows = await db.execute(
+                select(BookModel.id, BookModel.title, BookModel.author).order_by(
+                    BookModel.id
+                )
+            )
+            store = await asyncio.to_thread(self._build, rows.all())
+            for change in self._pending:
+                if isinstance(change, int):
+                    store.remove(change)
+                else:
+                    store.append(*change)
+            self._store = store
+        finally:
+            self._pending = None
+
+    @staticmethod
+    def _build(books) -> _Store:
+        store = _Store()
+        for book_id, title, author in books:
+            store.append(book_id, title, author, sort_words=False)
+        store.words = sorted(store.postings)
+        return store
+
+    def book_saved(self, book_id: int, title: str, author: str) -> None:
+        if self._pending is not None:
+            self._pending.append((book_id, title, author))
+        if self.loaded:
+            self._store.append(book_id, title, author)
+            self._check_dead_rows()
+
+    def book_removed(self, book_id: int) -> None:
+        self._store.remove(book_id)
+        if self._pending is not None:
+            self._pending.append(book_id)
+        self._check_dead_rows()
+
+    def _check_dead_rows(self) -> None:
+        if (
+            self.max_dead_rows is not None
+            and self._store.dead > self.max_dead_rows
+            and self._pending is None
+        ):
+            self.rebuild_in_background()
+
+    def suggest(self, query: str, limit: int) -> list[dict]:
+        words = normalize_words(query)
+        if not words:
+            return []
+        store = self._store
+        # Перебираем строки самого редкого слова запроса, остальные слова
+        # ищем в отсортированных списках строк или, если под префикс
+        # попадает слишком много слов, среди слов самой книги
+        volumes = dict.fromkeys(words, 0)
+        if len(volumes) > 1:
+            best = None
+            for word in sorted(volumes, key=len, reverse=True):
+                volumes[word] = store.volume(word, best)
+                if best is None or volumes[word] < best:
+                    best = volumes[word]
+        driver = min(volumes, key=volumes.get)
+        lookups, checked = [], []
+        for word in volumes:
+            if word == driver:
+                continue
+            start, end = store.prefix_range(word)
+            if end - start <= MAX_LOOKUP_WORDS:
+                lookups.append([store.postings[w] for w in store.words[start:end]])
+            else:
+                checked.append(word)
+
+        found: list[dict] = []
+        seen: set[int] = set()
+        for scanned, row in enumerate(store.rows_for_prefix(driver)):
+            if scanned >= SCAN_LIMIT or len(found) == limit:
+                break
+            book_id = store.book_ids[row]
+            if not book_id or book_id in seen:
+                continue
+            if not all(store.has_prefix(row, lists) for lists in lookups):
+                continue
+            title, author = store.title(row), store.author(row)
+            if checked:
+                book_words = normalize_words(f"{title} {author}")
+                if not all(
+                    any(word.startswith(other) for word in book_words)
+                    for other in checked
+                ):
+                    continue
+            seen.add(book_id)
+            found.append({"id": book_id, "title": title, "author": author})
+        return found
+
+
+book_suggest = register_index(
+    BookSuggestIndex(
+        rebuild_interval=settings.SUGGEST_REBUILD_SECONDS,
+        max_dead_rows=settings.SUGGEST_MAX_DEAD_ROWS,
+    )
+)
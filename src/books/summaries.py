@@ -0,0 +1,73 @@
+from typing import Annotated
+
+from fastapi import Query
+from sqlalchemy import bindparam, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.favorites.models import FavoriteModel
+from src.reviews.histogram import rating_summary
+from src.reviews.models import RATINGS, RatingHistogramModel
+from src.shared.fields import parse_names
+
+BOOK_INCLUDES = ("rating_summary", "favorite_count")
+
+# Один запрос на страницу для каждой сводки: оценки — строки гистограмм
+# по первичному ключу, избранное — группировка по ix_favorites_book_id
+_rating_histograms = select(
+    RatingHistogramModel.book_id,
+    *(RatingHistogramModel.column(rating) for rating in RATINGS),
+).where(RatingHistogramModel.book_id.in_(bindparam("ids", expanding=True)))
+_favorite_counts = (
+    select(FavoriteModel.book_id, func.count())
+    .where(FavoriteModel.book_id.in_(bindparam("ids", expanding=True)))
+    .group_by(FavoriteModel.book_id)
+)
+
+
+def book_includes(
+    include: Annotated[
+        str | None,
+        Query(
+            max_length=100,
+            description=f"Comma-separated summaries to add: {', '.join(BOOK_INCLUDES)}",
+            examples=["rating_summary,favorite_count"],
+        ),
+    ] = None,
+) -> tuple[str, ...]:
+    """Зависимость FastAPI, читающая `?include=` списков книг"""
+    if include is None:
+        return ()
+    return parse_names(include, BOOK_INCLUDES, "include")
+
+
+async def book_summaries(
+    db: AsyncSession, book_ids: list[int], includes: tuple[str, ...]
+) -> list[dict] | None:
+    """
+    Сводки для книг страницы в порядке `book_ids`, по запросу на каждую
+    включённую сводку вместо запроса на каждую книгу; None — ничего не включено
+    """
+    if not includes:
+        return None
+    summaries: list[dict] = [{} for _ in book_ids]
+    if not book_ids:
+        return summaries
+
+    if "rating_summary" in includes:
+        rows = await db.execute(_rating_histograms, {"ids": book_ids})
+        found = {
+            book_id: rating_summary(dict(zip(RATINGS, counts, strict=True)))
+            for book_id, *counts in rows
+        }
+        for summary, book_id in zip(summaries, book_ids, strict=True):
+            summary["rating_summary"] = found.get(
+                book_id, {"average": None, "count": 0}
+            )
+
+    if "favorite_count" in includes:
+        rows = await db.execute(_favorite_counts, {"ids": book_ids})
+        counts = dict(rows.tuples().all())
+        for summary, book_id in zip(summaries, book_ids, strict=True):
+            summary["favorite_count"] = counts.get(book_id, 0)
+
+    return summaries
@@ -0,0 +1,142 @@
+import heapq
+import math
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.favorites.models import FavoriteModel
+from src.reviews.models import ReviewModel
+from src.shared.config import settings
+from src.shared.indexes import InMemoryIndex, register_index
+
+# События старше HORIZON периодов полураспада весят меньше 0.4% и не читаются
+HORIZON = 8
+
+
+class TrendingIndex(InMemoryIndex):
+    """
+    Книги, вокруг которых сейчас больше всего активности: добавления
+    в избранное и отзывы с экспоненциальным затуханием.
+
+    Счётчики не пересчитываются со временем: событие в момент t весит
+    e^(λ·(t − t₀)) относительно фиксированной точки t₀ (forward decay), поэтому
+    порядок книг не меняется, пока нет новых событий, а запись события — O(1).
+    t₀ сдвигается при каждой полной перестройке, так что веса не растут
+    неограниченно.
+
+    Лучшие `top_k` книг хранятся отдельно: счёт книги только растёт, и книга
+    попадает в top-K, лишь обогнав его минимум.
+    """
+
+    name = "trending"
+
+    def __init__(self, half_life: float, top_k: int, rebuild_interval: float):
+        super().__init__()
+        self.decay = math.log(2) / half_life
+        self.horizon = half_life * HORIZON
+        self.top_k = top_k
+        self.rebuild_interval = rebuild_interval
+        self.reset()
+
+    def reset(self) -> None:
+        self.loaded = False
+        self._landmark = time.time()
+        self._scores: dict[int, float] = {}
+        self._top: dict[int, float] = {}
+        self._floor = 0.0
+        # События и удаления книг, пришедшие во время перестройки
+        self._pending: list[tuple[int, float] | int] | None = None
+
+    async def _rebuild(self, db: AsyncSession) -> None:
+        landmark = time.time()
+        since = datetime.fromtimestamp(landmark - self.horizon, timezone.utc)
+
+        # Очередь заводится до чтения событий: событие, зафиксированное во время
+        # чтения, иначе осталось бы только в выбрасываемых счётчиках
+        self._pending = []
+        try:
+            scores: dict[int, float] = {}
+            for model in (FavoriteModel, ReviewModel):
+                rows = await db.stream(
+                    select(model.book_id, model.created_at).where(
+                        model.created_at >= since
+                    )
+                )
+                async for book_id, created_at in rows:
+                    if created_at.tzinfo is None:
+                        # SQLite возвращает время без зоны; server_default пишет UTC
+                        created_at = created_at.replace(tzinfo=timezone.utc)
+                    scores[book_id] = scores.get(book_id, 0.0) + math.exp(
+                        self.decay * (created_at.timestamp() - landmark)
+                    )
+
+            # Событие, зафиксированное перед самым чтением, может попасть и в
+            # выборку, и в очередь; лишний вес уйдёт при следующей перестройке
+            for change in self._pending:
+                if isinstance(change, int):
+                    scores.pop(change, None)
+                else:
+                    book_id, at = change
+                    scores[book_id] = scores.get(book_id, 0.0) + math.exp(
+                        self.decay * (at - landmark)
+                    )
+
+            self._landmark = landmark
+            self._scores = scores
+            self._refill_top()
+        finally:
+            self._pending = None
+
+    def _refill_top(self) -> None:
+        self._top = dict(
+            heapq.nlargest(self.top_k, self._scores.items(), key=lambda item: item[1])
+        )
+        self._floor = min(self._top.values()) if len(self._top) == self.top_k else 0.0
+
+    def record(self, book_id: int, at: float | None = None) -> None:
+        """Учитывает событие по книге (по умолчанию — сейчас)"""
+        at = time.time() if at is None else at
+        if self._pending is not None:
+            self._pending.append((book_id, at))
+        if not self.loaded:
+            return
+        score = self._scores.get(book_id, 0.0) + math.exp(
+            self.decay * (at - self._landmark)
+        )
+        self._scores[book_id] = score
+
+        if book_id in self._top or len(self._top) < self.top_k:
+            self._top[book_id] = score
+        elif score > self._floor:
+            del self._top[min(self._top, key=self._top.get)]
+            self._top[book_id] = score
+        else:
+            return
+        if len(self._top) == self.top_k:
+            self._floor = min(self._top.values())
+
+    def book_removed(self, book_id: int) -> None:
+        if self._pending is not None:
+            self._pending.append(book_id)
+        self._scores.pop(book_id, None)
+        if self._top.pop(book_id, None) is not None:
+            self._refill_top()
+
+    def top(self, limit: int) -> list[tuple[int, float]]:
+        """
+        До `limit` книг с текущим счётом — числом событий, приведённым к «сейчас»
+        """
+        scale = math.exp(self.decay * (self._landmark - time.time()))
+        ranked = sorted(self._top.items(), key=lambda item: (-item[1], item[0]))
+        return [(book_id, score * scale) for book_id, score in ranked[:limit]]
+
+
+trending = register_index(
+    TrendingIndex(
+        half_life=settings.TRENDING_HALF_LIFE_HOURS * 3600,
+        top_k=settings.TRENDING_TOP_K,
+        rebuild_interval=settings.TRENDING_REBUILD_SECONDS,
+    )
+)
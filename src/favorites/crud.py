@@ -1,11 +1,23 @@
-from sqlalchemy import delete, select
+from sqlalchemy import bindparam, delete, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
+from src.books.trending import trending
 from src.favorites.models import FavoriteModel
 from src.favorites.schemas import FavoriteCreate, FavoriteUpdate
+from src.recommendations.index import co_favorites
 from src.shared.crud_base import CRUDBase
 
+# Частые запросы собираются один раз (см. CRUDBase._get_by_id)
+_favorite_exists = (
+    select(FavoriteModel.id)
+    .where(
+        FavoriteModel.user_id == bindparam("user_id"),
+        FavoriteModel.book_id == bindparam("book_id"),
+    )
+    .limit(1)
+)
+
 
 class CRUDReview(CRUDBase[FavoriteModel, FavoriteCreate, FavoriteUpdate]):
     async def add_to_favorites(
@@ -15,6 +27,11 @@ class CRUDReview(CRUDBase[FavoriteModel, FavoriteCreate, FavoriteUpdate]):
         db.add(favorite)
         await db.commit()
         await db.refresh(favorite)
+
+        trending.record(book_id)
+        if co_favorites.tracking:
+            other_book_ids = await self.get_user_book_ids(db, user_id)
+            co_favorites.favorite_added(book_id, other_book_ids)
         return favorite
 
     async def get_user_favorites(
@@ -38,17 +55,26 @@ class CRUDReview(CRUDBase[FavoriteModel, FavoriteCreate, FavoriteUpdate]):
             )
         )
         await db.commit()
-        return result.rowcount > 0
+        removed = result.rowcount > 0
+
+        if removed and co_favorites.tracking:
+            other_book_ids = await self.get_user_book_ids(db, user_id)
+            co_favorites.favorite_removed(book_id, other_book_ids)
+        return removed
+
+    async def get_user_book_ids(self, db: AsyncSession, user_id: int) -> list[int]:
+        result = await db.scalars(
+            select(FavoriteModel.book_id).where(FavoriteModel.user_id == user_id)
+        )
+        return result.all()
 
     async def is_book_in_favorites(
         self, db: AsyncSession, user_id: int, book_id: int
     ) -> bool:
         result = await db.execute(
-            select(FavoriteModel).where(
-                FavoriteModel.user_id == user_id, FavoriteModel.book_id == book_id
-            )
+            _favorite_exists, {"user_id": user_id, "book_id": book_id}
         )
-        return result.scalar_one_or_none() is not None
+        return result.scalar() is not None
 
 
 favorite = CRUDReview(FavoriteModel)
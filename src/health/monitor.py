@@ -0,0 +1,45 @@
+import asyncio
+
+from src.shared.config import settings
+
+
+class LoopLagMonitor:
+    """
+    Фоновая задача, измеряющая задержку event loop: насколько позже
+    запланированного просыпается `asyncio.sleep(interval)`.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.lag = 0.0
+        self.max_lag = 0.0
+        self._task: asyncio.Task | None = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            self.lag = max(0.0, loop.time() - started - self.interval)
+            # Пик затухает, чтобы одна старая задержка не висела вечно
+            self.max_lag = max(self.lag, self.max_lag * 0.9)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+
+loop_lag_monitor = LoopLagMonitor(settings.HEALTH_LOOP_LAG_INTERVAL)
@@ -0,0 +1,141 @@
+from fastapi import APIRouter, Request, Response, status
+
+from src.auth.utils import bcrypt_queue_depth
+from src.health.monitor import loop_lag_monitor
+from src.health.schemas import JobsStatus, LiveStatus, PoolEventsStatus, ReadyStatus
+from src.jobs.runner import job_registry, job_runner
+from src.shared.config import settings
+from src.shared.database import get_engine, pool_events, pool_status, pool_wait
+
+router = APIRouter(prefix="/health", tags=["Health"])
+
+
+@router.get(
+    "/live",
+    response_model=LiveStatus,
+    summary="Liveness probe",
+    responses={200: {"description": "Process is running"}},
+)
+async def live():
+    """
+    ## Check that the worker process is alive
+
+    Does not touch the database or any other dependency.
+    """
+    return {"status": "ok"}
+
+
+@router.get(
+    "/ready",
+    response_model=ReadyStatus,
+    summary="Readiness probe",
+    responses={
+        200: {"description": "Worker is ready to accept traffic"},
+        503: {"description": "Worker is warming up or saturated", "model": ReadyStatus},
+    },
+)
+async def ready(request: Request, response: Response):
+    """
+    ## Check that the worker can take traffic
+
+    Fails with 503 until the startup warm-up finishes and while the recent
+    wait for a database connection exceeds `HEALTH_POOL_WAIT_THRESHOLD_MS`.
+
+    **Response:**
+    - **pool**: pool size, checked-out connections, overflow and recent checkout wait
+    - **bcrypt_queue_depth**: password hashes queued or running
+    - **loop_lag_ms**: last measured event loop lag, **loop_lag_max_ms**: decaying peak
+
+    <u>Note: only in-process counters are read, so it is cheap to poll every second.</u>
+    """
+    recent_wait_ms = pool_wait.recent_max * 1000
+
+    reasons = []
+    if not getattr(request.app.state, "ready", False):
+        reasons.append("warming up")
+    if recent_wait_ms > settings.HEALTH_POOL_WAIT_THRESHOLD_MS:
+        reasons.append("database pool saturated")
+
+    if reasons:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+
+    return {
+        "status": "not ready" if reasons else "ready",
+        "reasons": reasons,
+        "pool": {**pool_status(), "recent_wait_ms": recent_wait_ms},
+        "bcrypt_queue_depth": bcrypt_queue_depth(),
+        "loop_lag_ms": loop_lag_monitor.lag * 1000,
+        "loop_lag_max_ms": loop_lag_monitor.max_lag * 1000,
+    }
+
+
+@router.get(
+    "/pool",
+    response_model=PoolEventsStatus,
+    summary="Connection pool statistics",
+    responses={200: {"description": "Pool counters since worker start"}},
+)
+async def pool(request: Request):
+    """
+    ## Connection pool counters of this worker
+
+    Use them to tune `DB_POOL_SIZE`, `DB_MAX_OVERFLOW` and `DB_POOL_TIMEOUT`.
+
+    **Response:**
+    - **events**: number of connect, checkout, checkin, invalidate and close events
+    - **checkout_wait_histogram**: how long requests waited for a connection
+    - **max_overflow**: current overflow limit; changes over time when
+      `DB_POOL_ADAPTIVE` is enabled, **resizes** counts those changes
+    """
+    autoscaler = request.app.state.pool_autoscaler
+    return {
+        "pool": {**pool_status(), "recent_wait_ms": pool_wait.recent_max * 1000},
+        "events": pool_events.counts,
+        "checkout_wait_count": pool_wait.count,
+        "checkout_wait_avg_ms": (
+            pool_wait.total / pool_wait.count * 1000 if pool_wait.count else 0.0
+        ),
+        "checkout_wait_histogram": pool_wait.histogram(),
+        "adaptive": autoscaler is not None,
+        "max_overflow": getattr(get_engine().pool, "_max_overflow", None),
+        "resizes": autoscaler.resizes if autoscaler is not None else 0,
+    }
+
+
+@router.get(
+    "/jobs",
+    response_model=JobsStatus,
+    summary="Background job statistics",
+    responses={200: {"description": "Job counters since worker start"}},
+)
+async def jobs():
+    """
+    ## Background job counters of this worker
+
+    **Response:**
+    - **running**: jobs executing now, out of `concurrency` slots
+    - **jobs**: per registered job: finished, failed and retried runs, duration,
+      last error and cron schedule
+
+    <u>Note: counters are per worker process; the queue itself lives
+    in the `jobs` table.</u>
+    """
+    stats = {}
+    for name, spec in job_registry.items():
+        metrics = job_runner.metrics[name]
+        finished = metrics.succeeded + metrics.failed + metrics.retried
+        stats[name] = {
+            "succeeded": metrics.succeeded,
+            "failed": metrics.failed,
+            "retried": metrics.retried,
+            "running": metrics.running,
+            "avg_seconds": metrics.total_seconds / finished if finished else 0.0,
+            "max_seconds": metrics.max_seconds,
+            "last_error": metrics.last_error,
+            "schedule": spec.schedule.expression if spec.schedule else None,
+        }
+    return {
+        "concurrency": job_runner.concurrency,
+        "running": sum(metrics.running for metrics in job_runner.metrics.values()),
+        "jobs": stats,
+    }
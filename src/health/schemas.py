@@ -0,0 +1,49 @@
+from pydantic import BaseModel
+
+
+class LiveStatus(BaseModel):
+    status: str
+
+
+class PoolStatus(BaseModel):
+    size: int | None
+    checkedout: int | None
+    overflow: int | None
+    recent_wait_ms: float
+
+
+class ReadyStatus(BaseModel):
+    status: str
+    reasons: list[str]
+    pool: PoolStatus
+    bcrypt_queue_depth: int
+    loop_lag_ms: float
+    loop_lag_max_ms: float
+
+
+class PoolEventsStatus(BaseModel):
+    pool: PoolStatus
+    events: dict[str, int]
+    checkout_wait_count: int
+    checkout_wait_avg_ms: float
+    checkout_wait_histogram: dict[str, int]
+    adaptive: bool
+    max_overflow: int | None
+    resizes: int
+
+
+class JobStats(BaseModel):
+    succeeded: int
+    failed: int
+    retried: int
+    running: int
+    avg_seconds: float
+    max_seconds: float
+    last_error: str | None
+    schedule: str | None
+
+
+class JobsStatus(BaseModel):
+    concurrency: int
+    running: int
+    jobs: dict[str, JobStats]
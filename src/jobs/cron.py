@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta, timezone
+
+# (минимум, максимум) для полей: минута, час, день месяца, месяц, день недели
+FIELD_RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 6))
+
+
+def _parse_field(field: str, low: int, high: int) -> frozenset[int]:
+    values: set[int] = set()
+    for part in field.split(","):
+        part, _, step = part.partition("/")
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start, end = (int(value) for value in part.split("-", 1))
+        else:
+            start = end = int(part)
+            if step:
+                end = high
+        if not low <= start <= end <= high:
+            raise ValueError(f"Cron field {field!r} is out of range {low}-{high}")
+        values.update(range(start, end + 1, int(step) if step else 1))
+    return frozenset(values)
+
+
+class CronSchedule:
+    """
+    Расписание в формате cron из пяти полей: минута, час, день месяца, месяц,
+    день недели (0 — воскресенье). Поддерживаются `*`, списки, диапазоны и шаг:
+    `*/15 * * * *`, `0 3 * * 1-5`. Время — UTC.
+    """
+
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression must have 5 fields: {expression!r}")
+        self.expression = expression
+        (
+            self.minutes,
+            self.hours,
+            self.days,
+            self.months,
+            self.weekdays,
+        ) = (
+            _parse_field(field, low, high)
+            for field, (low, high) in zip(fields, FIELD_RANGES, strict=True)
+        )
+
+    def _day_matches(self, moment: datetime) -> bool:
+        # Как в cron: если ограничены оба поля дня, достаточно совпадения одного
+        weekday = moment.isoweekday() % 7
+        days_limited = len(self.days) < 31
+        weekdays_limited = len(self.weekdays) < 7
+        if days_limited and weekdays_limited:
+            return moment.day in self.days or weekday in self.weekdays
+        return moment.day in self.days and weekday in self.weekdays
+
+    def next_after(self, moment: datetime) -> datetime:
+        """Ближайшее время срабатывания строго позже `moment`"""
+        moment = moment.astimezone(timezone.utc).replace(second=0, microsecond=0)
+        moment += timedelta(minutes=1)
+        # Перебор по дням, затем по минутам внутри подходящего дня
+        for _ in range(366 * 5):
+            if moment.month in self.months and self._day_matches(moment):
+                for hour in sorted(h for h in self.hours if h >= moment.hour):
+                    start = moment.minute if hour == moment.hour else 0
+                    for minute in sorted(m for m in self.minutes if m >= start):
+                        return moment.replace(hour=hour, minute=minute)
+            moment = (moment + timedelta(days=1)).replace(hour=0, minute=0)
+        raise ValueError(f"Cron expression never fires: {self.expression!r}")
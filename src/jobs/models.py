@@ -0,0 +1,33 @@
+from datetime import datetime
+
+from sqlalchemy import JSON, DateTime, Index, String, Text, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.shared.database import Base
+
+
+class JobModel(Base):
+    __tablename__ = "jobs"
+    __table_args__ = (Index("ix_jobs_status_run_at", "status", "run_at"),)
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    name: Mapped[str] = mapped_column(String(100), index=True)
+    payload: Mapped[dict] = mapped_column(JSON, default=dict)
+    # queued -> running -> done | failed; при повторе снова queued
+    status: Mapped[str] = mapped_column(String(16), default="queued")
+    # Ключ дедупликации: запуск по расписанию ставится в очередь один раз,
+    # сколько бы воркеров его ни запланировали
+    dedupe_key: Mapped[str | None] = mapped_column(
+        String(255), unique=True, nullable=True
+    )
+    attempts: Mapped[int] = mapped_column(default=0)
+    max_attempts: Mapped[int] = mapped_column()
+    # Unix-время: не раньше какого момента выполнять и до какого момента
+    # задача закреплена за воркером (после — её может забрать другой)
+    run_at: Mapped[float] = mapped_column()
+    locked_until: Mapped[float | None] = mapped_column(nullable=True)
+    finished_at: Mapped[float | None] = mapped_column(nullable=True, index=True)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
@@ -0,0 +1,327 @@
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.jobs.cron import CronSchedule
+from src.jobs.models import JobModel
+from src.shared.config import settings
+from src.shared.database import new_session
+
+logger = logging.getLogger("src")
+
+JobHandler = Callable[[dict[str, Any]], Awaitable[None]]
+
+
+@dataclass(slots=True)
+class JobSpec:
+    name: str
+    handler: JobHandler
+    max_attempts: int
+    schedule: CronSchedule | None = None
+
+
+@dataclass(slots=True)
+class JobMetrics:
+    succeeded: int = 0
+    failed: int = 0
+    retried: int = 0
+    running: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+    last_error: str | None = None
+
+
+job_registry: dict[str, JobSpec] = {}
+
+
+def job(name: str, max_attempts: int | None = None, cron: str | None = None):
+    """
+    Регистрирует обработчик задачи `name`. С `cron` задача ещё и ставится
+    в очередь по расписанию — один раз на срабатывание для всех воркеров.
+    """
+
+    def decorator(handler: JobHandler) -> JobHandler:
+        job_registry[name] = JobSpec(
+            name=name,
+            handler=handler,
+            max_attempts=max_attempts or settings.JOBS_MAX_ATTEMPTS,
+            schedule=CronSchedule(cron) if cron else None,
+        )
+        return handler
+
+    return decorator
+
+
+async def _insert_job(db: AsyncSession, values: dict) -> int | None:
+    dialect = postgresql if db.bind.dialect.name == "postgresql" else sqlite
+    result = await db.execute(
+        dialect.insert(JobModel)
+        .values(**values)
+        .on_conflict_do_nothing(index_elements=[JobModel.dedupe_key])
+        .returning(JobModel.id)
+    )
+    return result.scalar()
+
+
+async def enqueue(
+    db: AsyncSession,
+    name: str,
+    payload: dict[str, Any] | None = None,
+    delay: float = 0.0,
+    dedupe_key: str | None = None,
+) -> int | None:
+    """
+    Ставит задачу в очередь и сразу возвращает её ID — обработчик запроса
+    не ждёт выполнения. Вернёт None, если задача с `dedupe_key` уже есть.
+    """
+    spec = job_registry.get(name)
+    if spec is None:
+        raise ValueError(f"Unknown job: {name}")
+
+    job_id = await _insert_job(
+        db,
+        {
+            "name": name,
+            "payload": payload or {},
+            "status": "queued",
+            "dedupe_key": dedupe_key,
+            "attempts": 0,
+            "max_attempts": spec.max_attempts,
+            "run_at": time.time() + delay,
+        },
+    )
+    await db.commit()
+    if job_id is not None and not delay:
+        job_runner.wake()
+    return job_id
+
+
+class JobRunner:
+    """
+    Выполняет задачи из таблицы jobs в фоне процесса.
+
+    Воркер забирает не больше задач, чем у него свободных слотов, одним
+    UPDATE ... RETURNING: на Postgres подзапрос выбирает строки с
+    FOR UPDATE SKIP LOCKED, поэтому воркеры не ждут друг друга и не берут
+    одну задачу дважды; SQLite выполняет запись целиком под своей блокировкой.
+    Взятая задача закреплена за воркером на `lease` секунд — если процесс
+    упадёт, её заберёт другой (поэтому аренда должна быть дольше самой долгой
+    задачи). Ошибка приводит к повтору с экспоненциальной
+    задержкой, пока не исчерпан max_attempts.
+    """
+
+    def __init__(
+        self,
+        concurrency: int,
+        poll_interval: float,
+        lease: float,
+        backoff: float,
+        backoff_max: float,
+    ):
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.metrics: dict[str, JobMetrics] = defaultdict(JobMetrics)
+        self._running: set[asyncio.Task] = set()
+        self._next_fire: dict[str, datetime] = {}
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def wake(self) -> None:
+        self._wakeup.set()
+
+    def retry_delay(self, attempts: int) -> float:
+        return min(self.backoff_max, self.backoff * 2 ** (attempts - 1))
+
+    async def schedule_due(self) -> None:
+        """Ставит в очередь задачи по расписанию, время которых наступило"""
+        now = datetime.now(timezone.utc)
+        for spec in job_registry.values():
+            if spec.schedule is None:
+                continue
+            fire = self._next_fire.get(spec.name)
+            if fire is None:
+                self._next_fire[spec.name] = spec.schedule.next_after(now)
+                continue
+            if fire > now:
+                continue
+            async with new_session() as db:
+                await _insert_job(
+                    db,
+                    {
+                        "name": spec.name,
+                        "payload": {},
+                        "status": "queued",
+                        "dedupe_key": f"{spec.name}@{fire.isoformat()}",
+                        "attempts": 0,
+                        "max_attempts": spec.max_attempts,
+                        "run_at": fire.timestamp(),
+                    },
+                )
+                await db.commit()
+            self._next_fire[spec.name] = spec.schedule.next_after(now)
+
+    async def claim(self, limit: int) -> list:
+        now = time.time()
+        claimable = (
+            select(JobModel.id)
+            .where(
+                or_(
+                    and_(JobModel.status == "queued", JobModel.run_at <= now),
+                    # Аренда истекла: воркер, взявший задачу, скорее всего упал
+                    and_(JobModel.status == "running", JobModel.locked_until < now),
+                )
+            )
+            .order_by(JobModel.run_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        async with new_session() as db:
+            result = await db.execute(
+                update(JobModel)
+                .where(JobModel.id.in_(claimable))
+                .values(
+                    status="running",
+                    attempts=JobModel.attempts + 1,
+                    locked_until=now + self.lease,
+                )
+                .returning(
+                    JobModel.id,
+                    JobModel.name,
+                    JobModel.payload,
+                    JobModel.attempts,
+                    JobModel.max_attempts,
+                )
+                .execution_options(synchronize_session=False)
+            )
+            jobs = result.all()
+            await db.commit()
+        return jobs
+
+    async def _finish(self, job_id: int, **values) -> None:
+        async with new_session() as db:
+            await db.execute(
+                update(JobModel)
+                .where(JobModel.id == job_id)
+                .values(locked_until=None, **values)
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+
+    async def execute(self, job_id, name, payload, attempts, max_attempts) -> None:
+        spec = job_registry.get(name)
+        metrics = self.metrics[name]
+        metrics.running += 1
+        started = time.perf_counter()
+        try:
+            if spec is None:
+                raise LookupError(f"No handler registered for job {name}")
+            if attempts > max_attempts:
+                raise TimeoutError("Lease expired on the last attempt")
+            await spec.handler(payload)
+        except Exception as exc:
+            error = f"{type(exc).__name__}: {exc}"
+            metrics.last_error = error
+            if spec is not None and attempts < max_attempts:
+                metrics.retried += 1
+                delay = self.retry_delay(attempts)
+                logger.warning("Job %s #%d failed, retry in %.0fs", name, job_id, delay)
+                await self._finish(
+                    job_id,
+                    status="queued",
+                    run_at=time.time() + delay,
+                    last_error=error,
+                )
+            else:
+                metrics.failed += 1
+                logger.exception("Job %s #%d failed permanently", name, job_id)
+                await self._finish(
+                    job_id, status="failed", finished_at=time.time(), last_error=error
+                )
+        else:
+            metrics.succeeded += 1
+            await self._finish(
+                job_id, status="done", finished_at=time.time(), last_error=None
+            )
+        finally:
+            elapsed = time.perf_counter() - started
+            metrics.running -= 1
+            metrics.total_seconds += elapsed
+            metrics.max_seconds = max(metrics.max_seconds, elapsed)
+
+    async def run_once(self) -> int:
+        """Один проход: расписание, захват и выполнение. Возвращает число задач"""
+        await self.schedule_due()
+        jobs = await self.claim(self.concurrency)
+        await asyncio.gather(*(self.execute(*job) for job in jobs))
+        return len(jobs)
+
+    def _spawn(self, job) -> None:
+        task = asyncio.create_task(self.execute(*job))
+        self._running.add(task)
+
+        def done(task: asyncio.Task) -> None:
+            self._running.discard(task)
+            self.wake()
+
+        task.add_done_callback(done)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.schedule_due()
+                free = self.concurrency - len(self._running)
+                if free > 0:
+                    for job in await self.claim(free):
+                        self._spawn(job)
+            except Exception:
+                logger.exception("Job runner poll failed")
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except TimeoutError:
+                pass
+
+    def start(self) -> None:
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float) -> None:
+        """
+        Перестаёт брать задачи и ждёт выполняющиеся до `timeout` секунд;
+        незавершённые заберёт другой воркер после истечения аренды
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._running and timeout > 0:
+            await asyncio.wait(self._running, timeout=timeout)
+
+    def reset(self) -> None:
+        self.metrics.clear()
+        self._next_fire.clear()
+
+
+job_runner = JobRunner(
+    concurrency=settings.JOBS_CONCURRENCY,
+    poll_interval=settings.JOBS_POLL_INTERVAL,
+    lease=settings.JOBS_LEASE_SECONDS,
+    backoff=settings.JOBS_RETRY_BACKOFF,
+    backoff_max=settings.JOBS_RETRY_BACKOFF_MAX,
+)
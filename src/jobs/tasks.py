@@ -0,0 +1,34 @@
+import time
+
+from sqlalchemy import delete
+
+from src.jobs.models import JobModel
+from src.jobs.runner import job
+from src.recommendations.index import RATING_REBUILD_JOB, rating_recommendations
+from src.shared.config import settings
+from src.shared.database import new_session
+from src.shared.rate_limit import DatabaseRateLimitBackend, rate_limit_backend
+
+
+@job("jobs.cleanup", cron="17 * * * *")
+async def delete_finished_jobs(payload: dict) -> None:
+    """Удаляет выполненные и окончательно упавшие задачи старше срока хранения"""
+    cutoff = time.time() - settings.JOBS_RETENTION_HOURS * 3600
+    async with new_session() as db:
+        await db.execute(delete(JobModel).where(JobModel.finished_at < cutoff))
+        await db.commit()
+
+
+@job("rate_limit.prune", cron="*/10 * * * *")
+async def prune_rate_limit_windows(payload: dict) -> None:
+    """Удаляет истёкшие окна лимитов из таблицы rate_limit_windows"""
+    if isinstance(rate_limit_backend, DatabaseRateLimitBackend):
+        await rate_limit_backend.prune()
+
+
+@job(RATING_REBUILD_JOB, cron=settings.RECOMMENDATIONS_RATING_CRON)
+async def build_rating_recommendations(payload: dict) -> None:
+    """Считает снимок персональных рекомендаций один раз для всех воркеров"""
+    async with new_session() as db:
+        await rating_recommendations.build_snapshot(db)
+        await rating_recommendations.rebuild(db)
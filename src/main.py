@@ -1,42 +1,197 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager, suppress
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy.exc import SQLAlchemyError
 
-from src.admins.router import router as admin_router
-from src.auth.router import router as auth_router
-from src.books.router import router as book_router
-from src.favorites.router import router as favorite_router
-from src.reviews.router import router as review_router
+from src.shared.compression import CompressionMiddleware, compression_budget
+from src.shared.config import settings
+from src.shared.database import (
+    create_pool_autoscaler,
+    dispose_engine,
+    new_session,
+    prewarm_pool,
+)
 from src.shared.exceptions import global_exception_handler
-from src.users.router import router as user_router
-
-app = FastAPI(
-    title="Books API",
-    description="An API for book managment with authentication",
-    version="1.0.0",
+from src.shared.indexes import rebuild_indexes, run_periodic_rebuilds
+from src.shared.rate_limit import (
+    RateLimitMiddleware,
+    RateLimitPolicy,
+    RateLimitRule,
+    rate_limit_backend,
 )
 
+logger = logging.getLogger("src")
+
 origins = [
     "http://localhost:3000",
 ]
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=origins,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-app.add_exception_handler(Exception, global_exception_handler)
+list_policy = RateLimitPolicy("list", window=60, anonymous=120, user=300)
+review_write_policy = RateLimitPolicy("review-write", window=60, anonymous=10, user=20)
 
-routers = [
-    admin_router,
-    auth_router,
-    book_router,
-    favorite_router,
-    review_router,
-    user_router,
+rate_limit_rules = [
+    RateLimitRule("GET", "/books/", list_policy),
+    RateLimitRule("GET", "/books/top_rated", list_policy),
+    RateLimitRule("GET", "/books/trending", list_policy),
+    RateLimitRule("GET", "/reviews/", list_policy),
+    RateLimitRule("GET", "/favorites/me", list_policy),
+    RateLimitRule("POST", "/reviews/", review_write_policy),
+    RateLimitRule("PUT", "/reviews/{review_id}", review_write_policy),
 ]
 
-for router in routers:
-    app.include_router(router)
+
+def _warm_dependencies():
+    """Импорт passlib/jose и первый вызов валидаторов Pydantic"""
+    from src.auth.schemas import LoginRequestSchema
+    from src.auth.utils import create_access_token, get_pwd_context, verify_token
+    from src.users.schemas import UserCreate
+
+    get_pwd_context()
+    verify_token(create_access_token({"sub": "0"}))
+
+    UserCreate.model_validate(
+        {"username": "warmup", "email": "warmup@example.com", "password": "warmup"}
+    )
+    LoginRequestSchema.model_validate({"username": "warmup", "password": "warmup"})
+
+
+async def _compile_hot_statements():
+    """
+    Выполняет самые частые запросы, чтобы SQLAlchemy скомпилировал их
+    и положил в кэш движка до первого настоящего запроса
+    """
+    from src.auth.crud import session as session_crud
+    from src.books.crud import book as book_crud
+    from src.favorites.crud import favorite as favorite_crud
+    from src.reviews.crud import review as review_crud
+    from src.users.crud import user as user_crud
+
+    async with new_session() as db:
+        await book_crud.get(db, 0)
+        await book_crud.get_all(db, 0, 1)
+        await book_crud.get_top_rated(db, 0, 1)
+        await book_crud.get_trending(db, 1)
+        await user_crud.get(db, 0)
+        await user_crud.get_by_username(db, "")
+        await favorite_crud.is_book_in_favorites(db, 0, 0)
+        await review_crud.get_by_book(db, 0)
+        await session_crud.get_by_jti(db, "")
+
+
+async def warm_up(app: FastAPI):
+    started = time.perf_counter()
+
+    _warm_dependencies()
+    app.openapi()
+
+    try:
+        await prewarm_pool(settings.DB_WARMUP_CONNECTIONS)
+        await _compile_hot_statements()
+        await rebuild_indexes()
+    except (SQLAlchemyError, OSError):
+        # Недоступная БД не должна мешать запуску: запросы получат ошибку сами
+        logger.warning("Database warm-up failed", exc_info=True)
+
+    logger.info("Warm-up finished in %.1f ms", (time.perf_counter() - started) * 1000)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    from src.health.monitor import loop_lag_monitor
+    from src.jobs.runner import job_runner
+
+    index_rebuilds = None
+    loop_lag_monitor.start()
+    # Фоновые задачи и движок освобождаются и при ошибке старта или отмене
+    try:
+        if settings.WARMUP_ENABLED:
+            await warm_up(app)
+        if settings.DB_POOL_ADAPTIVE:
+            app.state.pool_autoscaler = create_pool_autoscaler()
+            app.state.pool_autoscaler.start()
+        index_rebuilds = asyncio.create_task(run_periodic_rebuilds())
+        if settings.JOBS_ENABLED:
+            job_runner.start()
+        app.state.ready = True
+        yield
+    finally:
+        app.state.ready = False
+        await job_runner.stop(settings.GRACEFUL_SHUTDOWN_TIMEOUT)
+        if index_rebuilds is not None:
+            index_rebuilds.cancel()
+            with suppress(asyncio.CancelledError):
+                await index_rebuilds
+        if app.state.pool_autoscaler is not None:
+            await app.state.pool_autoscaler.stop()
+        await loop_lag_monitor.stop()
+        await dispose_engine()
+
+
+def create_app() -> FastAPI:
+    from src.admins.router import router as admin_router
+    from src.auth.router import router as auth_router
+    from src.auth.utils import rate_limit_principal
+    from src.batch.router import router as batch_router
+    from src.books.router import router as book_router
+    from src.favorites.router import router as favorite_router
+    from src.health.router import router as health_router
+    from src.jobs import tasks  # noqa: F401 - регистрирует обработчики задач
+    from src.recommendations.router import router as recommendation_router
+    from src.reviews.router import router as review_router
+    from src.users.router import router as user_router
+
+    app = FastAPI(
+        title="Books API",
+        description="An API for book managment with authentication",
+        version="1.0.0",
+        lifespan=lifespan,
+    )
+    app.state.ready = False
+    app.state.pool_autoscaler = None
+
+    app.add_middleware(
+        RateLimitMiddleware,
+        rules=rate_limit_rules,
+        backend=rate_limit_backend,
+        resolve_principal=rate_limit_principal,
+        enabled=settings.RATE_LIMIT_ENABLED,
+    )
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=origins,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=["X-Total-Count"],
+    )
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MIN_SIZE,
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+        zstd_level=settings.COMPRESSION_ZSTD_LEVEL,
+        budget=compression_budget,
+        enabled=settings.COMPRESSION_ENABLED,
+    )
+
+    app.add_exception_handler(Exception, global_exception_handler)
+
+    routers = [
+        admin_router,
+        auth_router,
+        batch_router,
+        book_router,
+        favorite_router,
+        health_router,
+        recommendation_router,
+        review_router,
+        user_router,
+    ]
+
+    for router in routers:
+        app.include_router(router)
+
+    return app
@@ -0,0 +1,494 @@
+import asyncio
+import heapq
+import math
+import time
+from array import array
+from collections.abc import Callable
+from dataclasses import dataclass
+from itertools import chain, groupby, islice
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from src.favorites.models import FavoriteModel
+from src.jobs.runner import enqueue
+from src.recommendations.models import RatingRecommendationModel
+from src.reviews.models import ReviewModel
+from src.shared.config import settings
+from src.shared.indexes import InMemoryIndex, register_index
+
+# Размер порции строк при потоковом чтении из БД
+STREAM_CHUNK = 10_000
+
+
+@dataclass(frozen=True, slots=True)
+class SimilarBook:
+    book_id: int
+    co_favorites: int
+    score: float
+
+
+class CoFavoriteIndex(InMemoryIndex):
+    """
+    Индекс «с этой книгой также добавляли в избранное».
+
+    Для каждой книги хранит не больше `candidates` соседей с наибольшим
+    числом совместных добавлений (книга → книга → число читателей, добавивших
+    обе) и готовый top-K из них, поэтому выдача стоит O(K) и не обращается
+    к БД. Всего пар в памяти не больше `max_pairs`: новая пара, для которой
+    нет места, учитывается только следующей полной перестройкой.
+
+    Полная перестройка перекладывает умножение матриц на БД: самосоединение
+    favorites по user_id с группировкой по паре книг — это AᵀA для матрицы
+    «пользователь × книга». Пары читаются потоком, в памяти остаются только
+    ограниченные кучи кандидатов, а изменения избранного, пришедшие за время
+    перестройки, применяются к новому индексу.
+    """
+
+    name = "co_favorites"
+
+    def __init__(
+        self,
+        top_k: int,
+        rebuild_interval: float,
+        candidates: int | None = None,
+        max_pairs: int | None = None,
+    ):
+        super().__init__()
+        self.top_k = top_k
+        self.rebuild_interval = rebuild_interval
+        self.candidates = max(candidates, top_k) if candidates else None
+        self.max_pairs = max_pairs
+        self.reset()
+
+    def reset(self) -> None:
+        self.loaded = False
+        self._counts: dict[int, dict[int, int]] = {}
+        self._pairs = 0
+        self._popularity: dict[int, int] = {}
+        # Отсортированы по убыванию (число, -id)
+        self._top: dict[int, list[tuple[int, int]]] = {}
+        self._pending: list[tuple[Callable, tuple]] | None = None
+
+    @property
+    def tracking(self) -> bool:
+        """Нужны ли индексу изменения избранного: он загружен или строится"""
+        return self.loaded or self._pending is not None
+
+    async def _rebuild(self, db: AsyncSession) -> None:
+        # Очередь заводится до чтения пар: изменение, зафиксированное во время
+        # запроса, иначе осталось бы только в выбрасываемом индексе
+        self._pending = []
+        try:
+            left = aliased(FavoriteModel)
+            right = aliased(FavoriteModel)
+            pairs = await db.stream(
+                select(left.book_id, right.book_id, func.count())
+                .join(
+                    right,
+                    (left.user_id == right.user_id) & (left.book_id != right.book_id),
+                )
+                .group_by(left.book_id, right.book_id)
+            )
+            heaps: dict[int, list[tuple[int, int]]] = {}
+            total = 0
+            async for partition in pairs.partitions(STREAM_CHUNK):
+                total = self._collect_candidates(heaps, total, partition)
+
+            popularity = await db.execute(
+                select(FavoriteModel.book_id, func.count()).group_by(
+                    FavoriteModel.book_id
+                )
+            )
+
+            self._counts = {
+                book_id: {-other: count for count, other in heap}
+                for book_id, heap in heaps.items()
+            }
+            self._pairs = total
+            self._popularity = dict(popularity.all())
+            self._top = {book_id: self._select_top(book_id) for book_id in heaps}
+            # Изменение, зафиксированное перед самым чтением пар, может попасть
+            # и в выборку, и в очередь; лишняя единица уйдёт при перестройке
+            for apply, args in self._pending:
+                apply(*args)
+        finally:
+            self._pending = None
+
+    def _collect_candidates(self, heaps, total: int, partition) -> int:
+        for book_id, other_id, count in partition:
+            item = (count, -other_id)
+            heap = heaps.get(book_id, ())
+            if self._has_room(heap, total):
+                heapq.heappush(heaps.setdefault(book_id, []), item)
+                total += 1
+            elif heap and item > heap[0]:
+                heapq.heapreplace(heap, item)
+        return total
+
+    def _has_room(self, neighbours, total: int) -> bool:
+        """Можно ли добавить книге соседа при `total` парах в индексе"""
+        if self.candidates is not None and len(neighbours) >= self.candidates:
+            return False
+        return self.max_pairs is None or total < self.max_pairs
+
+    def _select_top(self, book_id: int) -> list[tuple[int, int]]:
+        neighbours = self._counts.get(book_id, {})
+        return heapq.nlargest(
+            self.top_k, ((count, -other) for other, count in neighbours.items())
+        )
+
+    def _increment(self, book_id: int, other_id: int) -> None:
+        neighbours = self._counts.setdefault(book_id, {})
+        if other_id in neighbours:
+            count = neighbours[other_id] = neighbours[other_id] + 1
+        elif self._has_room(neighbours, self._pairs):
+            count = neighbours[other_id] = 1
+            self._pairs += 1
+        else:
+            # Места нет: точное число совместных добавлений этой пары
+            # неизвестно, её учтёт полная перестройка
+            return
+
+        top = self._top.setdefault(book_id, [])
+        for position, (_, top_id) in enumerate(top):
+            if -top_id == other_id:
+                top[position] = (count, -other_id)
+                top.sort(reverse=True)
+                return
+        if len(top) < self.top_k or (count, -other_id) > top[-1]:
+            top.append((count, -other_id))
+            top.sort(reverse=True)
+            del top[self.top_k :]
+
+    def _decrement(self, book_id: int, other_id: int) -> None:
+        neighbours = self._counts.get(book_id)
+        if not neighbours or other_id not in neighbours:
+            return
+        neighbours[other_id] -= 1
+        if not neighbours[other_id]:
+            del neighbours[other_id]
+            self._pairs -= 1
+
+        # Книга могла выпасть из top-K — кандидата на её место ищем среди всех соседей
+        if any(-top_id == other_id for _, top_id in self._top.get(book_id, ())):
+            self._top[book_id] = self._select_top(book_id)
+
+    def favorite_added(self, book_id: int, other_book_ids: list[int]) -> None:
+        """Пользователь добавил book_id, уже имея в избранном other_book_ids"""
+        if self._pending is not None:
+            self._pending.append((self._favorite_added, (book_id, other_book_ids)))
+        self._favorite_added(book_id, other_book_ids)
+
+    def _favorite_added(self, book_id: int, other_book_ids: list[int]) -> None:
+        self._popularity[book_id] = self._popularity.get(book_id, 0) + 1
+        for other_id in other_book_ids:
+            if other_id != book_id:
+                self._increment(book_id, other_id)
+                self._increment(other_id, book_id)
+
+    def favorite_removed(self, book_id: int, other_book_ids: list[int]) -> None:
+        """Пользователь удалил book_id, оставив в избранном other_book_ids"""
+        if self._pending is not None:
+            self._pending.append((self._favorite_removed, (book_id, other_book_ids)))
+        self._favorite_removed(book_id, other_book_ids)
+
+    def _favorite_removed(self, book_id: int, other_book_ids: list[int]) -> None:
+        if self._popularity.get(book_id, 0) > 1:
+            self._popularity[book_id] -= 1
+        else:
+            self._popularity.pop(book_id, None)
+        for other_id in other_book_ids:
+            if other_id != book_id:
+                self._decrement(book_id, other_id)
+                self._decrement(other_id, book_id)
+
+    def book_removed(self, book_id: int) -> None:
+        if self._pending is not None:
+            self._pending.append((self._book_removed, (book_id,)))
+        self._book_removed(book_id)
+
+    def _book_removed(self, book_id: int) -> None:
+        self._popularity.pop(book_id, None)
+        self._top.pop(book_id, None)
+        neighbours = self._counts.pop(book_id, {})
+        self._pairs -= len(neighbours)
+        for other_id in neighbours:
+            if self._counts.get(other_id, {}).pop(book_id, None) is not None:
+                self._pairs -= 1
+            if any(-top_id == book_id for _, top_id in self._top.get(other_id, ())):
+                self._top[other_id] = self._select_top(other_id)
+
+    def has_favorites(self, book_id: int) -> bool:
+        return book_id in self._popularity
+
+    def similar(self, book_id: int, limit: int) -> list[SimilarBook]:
+        """
+        До `limit` книг, чаще всего добавляемых вместе с book_id.
+        score — косинусная близость: совместные добавления / √(n₁·n₂).
+        """
+        popularity = self._popularity.get(book_id, 1)
+        # Пара может остаться односторонней, если у удалённой книги не было
+        # места для соседа; книги без избранного пропускаются до перестройки
+        top = (
+            (count, -other)
+            for count, other in self._top.get(book_id, ())
+            if -other in self._popularity
+        )
+        return [
+            SimilarBook(
+                book_id=other_id,
+                co_favorites=count,
+                score=count / math.sqrt(popularity * self._popularity[other_id]),
+            )
+            for count, other_id in islice(top, limit)
+        ]
+
+
+@dataclass(frozen=True, slots=True)
+class RecommendedBook:
+    book_id: int
+    score: float
+
+
+# Задача, считающая снимок rating_recommendations (см. src/jobs/tasks.py)
+RATING_REBUILD_JOB = "recommendations.rating"
+# Строка снимка со списком популярных книг для пользователей без оценок
+POPULAR_USER_ID = 0
+
+# Оценка, которая не сдвигает рекомендации ни в одну сторону: соседи книг,
+# оценённых выше, поднимаются, соседи оценённых ниже — опускаются
+NEUTRAL_RATING = 3
+
+
+class RatingRecommendationIndex(InMemoryIndex):
+    """
+    Персональные рекомендации по оценкам из отзывов (item-item CF).
+
+    Расчёт (`build_snapshot`) занимает минуты, поэтому его выполняет задача
+    recommendations.rating по расписанию RECOMMENDATIONS_RATING_CRON — один
+    воркер на всё приложение:
+    1. БД считает скалярные произведения столбцов матрицы «пользователь ×
+       книга» с оценками, сдвинутыми на NEUTRAL_RATING (самосоединение reviews
+       по user_id), и их нормы — так нелюбимые книги дают отрицательную
+       близость;
+    2. пары читаются потоком, и для каждой книги в куче остаются `neighbours`
+       самых близких по косинусу;
+    3. для каждого пользователя соседи его книг суммируются с весом
+       (оценка − NEUTRAL_RATING), и остаётся top-N в компактных массивах
+       `array`. Список добирается популярными книгами.
+    Шаги 2 и 3 — чистый CPU и выполняются в отдельном потоке. Результат
+    записывается в таблицу rating_recommendations.
+
+    Перестройка индекса в воркере только перечитывает этот снимок, и то
+    если он обновился. Индекс фоновый: воркер готов без него, а до первой
+    загрузки рекомендаций нет. Запрос рекомендаций — один поиск в словаре.
+    """
+
+    name = "rating_recommendations"
+    background = True
+
+    def __init__(self, top_n: int, neighbours: int, rebuild_interval: float):
+        super().__init__()
+        self.top_n = top_n
+        self.neighbours = neighbours
+        self.rebuild_interval = rebuild_interval
+        self.reset()
+
+    def reset(self) -> None:
+        self.loaded = False
+        self._by_user: dict[int, tuple[array, array]] = {}
+        self._popular: tuple[array, array] = (array("i"), array("f"))
+        self._built_at: float | None = None
+
+    async def _rebuild(self, db: AsyncSession) -> None:
+        model = RatingRecommendationModel
+        built_at = await db.scalar(
+            select(model.built_at).where(model.user_id == POPULAR_USER_ID)
+        )
+        if built_at is None:
+            # Снимка ещё нет: его посчитает задача, а не каждый воркер сам
+            await enqueue(
+                db, RATING_REBUILD_JOB, dedupe_key=f"{RATING_REBUILD_JOB}@initial"
+            )
+            return
+        if built_at == self._built_at:
+            return
+
+        by_user: dict[int, tuple[array, array]] = {}
+        popular = (array("i"), array("f"))
+        rows = await db.stream(
+            select(model.user_id, model.book_ids, model.scores, model.built_at)
+        )
+        async for partition in rows.partitions(STREAM_CHUNK):
+            for user_id, book_ids, scores, row_built_at in partition:
+                entry = (array("i", book_ids), array("f", scores))
+                if user_id == POPULAR_USER_ID:
+                    popular, built_at = entry, row_built_at
+                else:
+                    by_user[user_id] = entry
+        self._by_user, self._popular, self._built_at = by_user, popular, built_at
+
+    async def build_snapshot(self, db: AsyncSession) -> None:
+        """Полный расчёт рекомендаций и замена снимка в БД одной транзакцией"""
+        centered = ReviewModel.rating - NEUTRAL_RATING
+        books = await db.execute(
+            select(
+                ReviewModel.book_id,
+                func.sum(centered * centered),
+                func.count(),
+                func.avg(ReviewModel.rating),
+            ).group_by(ReviewModel.book_id)
+        )
+        books = books.all()
+        norms = {book_id: math.sqrt(squares) for book_id, squares, _, _ in books}
+
+        # Пар книг может быть на порядки больше, чем оценок: они читаются
+        # потоком, и в памяти остаются только ограниченные кучи соседей
+        left = aliased(ReviewModel)
+        right = aliased(ReviewModel)
+        heaps: dict[int, list[tuple[float, int]]] = {}
+        dots = await db.stream(
+            select(
+                left.book_id,
+                right.book_id,
+                func.sum(
+                    (left.rating - NEUTRAL_RATING) * (right.rating - NEUTRAL_RATING)
+                ),
+            )
+            .join(
+                right, (left.user_id == right.user_id) & (left.book_id != right.book_id)
+            )
+            .group_by(left.book_id, right.book_id)
+        )
+        async for partition in dots.partitions(STREAM_CHUNK):
+            await asyncio.to_thread(self._collect_neighbours, heaps, norms, partition)
+
+        # Оценки упаковываются в массивы: ~9 байт на оценку вместо строки Row
+        user_ids, book_ids, ratings = array("i"), array("i"), array("b")
+        rows = await db.stream(
+            select(
+                ReviewModel.user_id, ReviewModel.book_id, ReviewModel.rating
+            ).order_by(ReviewModel.user_id)
+        )
+        async for partition in rows.partitions(STREAM_CHUNK):
+            for user_id, book_id, rating in partition:
+                user_ids.append(user_id)
+                book_ids.append(book_id)
+                ratings.append(rating)
+
+        by_user, popular = await asyncio.to_thread(
+            self._build, heaps, books, user_ids, book_ids, ratings
+        )
+
+        built_at = time.time()
+        entries = chain([(POPULAR_USER_ID, popular)], by_user.items())
+        await db.execute(delete(RatingRecommendationModel))
+        while chunk := list(islice(entries, STREAM_CHUNK)):
+            await db.execute(
+                insert(RatingRecommendationModel),
+                [
+                    {
+                        "user_id": user_id,
+                        "book_ids": recommended.tobytes(),
+                        "scores": scores.tobytes(),
+                        "built_at": built_at,
+                    }
+                    for user_id, (recommended, scores) in chunk
+                ],
+            )
+        await db.commit()
+
+    def _collect_neighbours(self, heaps, norms, partition) -> None:
+        for book_id, other_id, dot in partition:
+            # У книги, оценённой только нейтрально, нулевая норма и нулевой вклад
+            if not dot:
+                continue
+            item = (dot / (norms[book_id] * norms[other_id]), other_id)
+            heap = heaps.setdefault(book_id, [])
+            if len(heap) < self.neighbours:
+                heapq.heappush(heap, item)
+            elif item > heap[0]:
+                heapq.heapreplace(heap, item)
+
+    def _build(self, heaps, books, user_ids, book_ids, ratings):
+        # С запасом: часть популярных книг пользователь уже оценил
+        popular = [
+            book_id
+            for book_id, *_ in sorted(
+                books, key=lambda row: (row[2], row[3], -row[0]), reverse=True
+            )[: self.top_n * 2]
+        ]
+
+        by_user: dict[int, tuple[array, array]] = {}
+        position = 0
+        for user_id, group in groupby(user_ids):
+            count = sum(1 for _ in group)
+            rated = dict(
+                zip(
+                    book_ids[position : position + count],
+                    ratings[position : position + count],
+                    strict=True,
+                )
+            )
+            position += count
+
+            scores: dict[int, float] = {}
+            for book_id, rating in rated.items():
+                weight = rating - NEUTRAL_RATING
+                if not weight:
+                    continue
+                for similarity, other_id in heaps.get(book_id, ()):
+                    if other_id not in rated:
+                        scores[other_id] = (
+                            scores.get(other_id, 0.0) + similarity * weight
+                        )
+
+            top = heapq.nlargest(
+                self.top_n,
+                ((score, -book_id) for book_id, score in scores.items() if score > 0),
+            )
+            recommended = array("i", (-book_id for _, book_id in top))
+            recommended_scores = array("f", (score for score, _ in top))
+            for book_id in popular:
+                if len(recommended) >= self.top_n:
+                    break
+                if book_id not in rated and book_id not in recommended:
+                    recommended.append(book_id)
+                    recommended_scores.append(0.0)
+            by_user[user_id] = (recommended, recommended_scores)
+
+        popular_ids = array("i", popular[: self.top_n])
+        return by_user, (popular_ids, array("f", [0.0] * len(popular_ids)))
+
+    def for_user(self, user_id: int, limit: int) -> tuple[bool, list[RecommendedBook]]:
+        """
+        До `limit` рекомендаций и признак того, что они персональные.
+        Пользователь без оценок получает популярные книги, а пока индекс
+        не загружен — пустой список.
+        """
+        entry = self._by_user.get(user_id)
+        book_ids, scores = entry or self._popular
+        return entry is not None, [
+            RecommendedBook(book_id=book_id, score=score)
+            for book_id, score in zip(book_ids[:limit], scores[:limit], strict=True)
+        ]
+
+
+co_favorites = register_index(
+    CoFavoriteIndex(
+        top_k=settings.SIMILAR_BOOKS_TOP_K,
+        rebuild_interval=settings.RECOMMENDATIONS_REBUILD_SECONDS,
+        candidates=settings.SIMILAR_BOOKS_CANDIDATES,
+        max_pairs=settings.SIMILAR_BOOKS_MAX_PAIRS,
+    )
+)
+
+rating_recommendations = register_index(
+    RatingRecommendationIndex(
+        top_n=settings.RECOMMENDATIONS_TOP_N,
+        neighbours=settings.RECOMMENDATIONS_NEIGHBOURS,
+        rebuild_interval=settings.RECOMMENDATIONS_RATING_RELOAD_SECONDS,
+    )
+)
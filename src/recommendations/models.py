@@ -0,0 +1,21 @@
+from sqlalchemy import LargeBinary
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.shared.database import Base
+
+
+class RatingRecommendationModel(Base):
+    """
+    Снимок персональных рекомендаций, посчитанный задачей
+    recommendations.rating: воркеры читают его вместо собственного расчёта.
+    """
+
+    __tablename__ = "rating_recommendations"
+
+    # 0 — список популярных книг для пользователей без оценок
+    user_id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    # Содержимое array("i") и array("f") в порядке байтов воркеров
+    book_ids: Mapped[bytes] = mapped_column(LargeBinary)
+    scores: Mapped[bytes] = mapped_column(LargeBinary)
+    # Unix-время расчёта снимка: по нему воркер понимает, что перечитывать нечего
+    built_at: Mapped[float] = mapped_column()
@@ -0,0 +1,102 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import load_only, raiseload
+
+from src.auth.dependencies import CurrentUserDep
+from src.books.crud import book as book_crud
+from src.books.models import BookModel
+from src.recommendations.index import (
+    CoFavoriteIndex,
+    RatingRecommendationIndex,
+    co_favorites,
+    rating_recommendations,
+)
+from src.recommendations.schemas import Recommendations, SimilarBooks
+from src.shared.database import DatabaseDep
+from src.shared.exceptions import NotFoundException
+
+router = APIRouter(tags=["Recommendations"])
+
+CoFavoritesDep = Annotated[CoFavoriteIndex, Depends(co_favorites)]
+RatingRecommendationsDep = Annotated[
+    RatingRecommendationIndex, Depends(rating_recommendations)
+]
+
+
+@router.get(
+    "/books/{book_id}/similar",
+    response_model=SimilarBooks,
+    summary="Readers also favorited",
+    responses={
+        200: {"description": "Similar books retrieved"},
+        404: {"description": "Book not found with the specified ID"},
+        422: {"description": "Invalid book ID or limit"},
+        500: {"description": "Internal server error"},
+    },
+)
+async def similar_books(
+    book_id: int,
+    index: CoFavoritesDep,
+    db: DatabaseDep,
+    limit: Annotated[int, Query(ge=1, le=100)] = 10,
+):
+    """
+    ## Books most often favorited by readers who favorited this book
+
+    **Path parameters**:
+    - **book_id**: ID of the book
+
+    **Query parameters**:
+    - **limit**: number of similar books to return (1-100), default: 10
+
+    **Response:**
+    - **co_favorites**: number of readers who favorited both books
+    - **score**: cosine similarity, `co_favorites / sqrt(favorites(a) * favorites(b))`
+
+    <u>Note: served from an in-memory index without database queries.
+    A book nobody has favorited yet is looked up in the database and
+    returns an empty list.</u>
+    """
+    if not index.has_favorites(book_id) and not await book_crud.get(
+        db, book_id, [load_only(BookModel.id), raiseload("*")]
+    ):
+        raise NotFoundException(
+            detail="Book not found", resource_type="book", resource_id=book_id
+        )
+    return {"book_id": book_id, "similar": index.similar(book_id, limit)}
+
+
+@router.get(
+    "/users/me/recommendations",
+    response_model=Recommendations,
+    summary="Personal recommendations",
+    responses={
+        200: {"description": "Recommendations retrieved"},
+        401: {"description": "Not authenticated"},
+        422: {"description": "Invalid limit"},
+        500: {"description": "Internal server error"},
+    },
+)
+async def my_recommendations(
+    current_user: CurrentUserDep,
+    index: RatingRecommendationsDep,
+    limit: Annotated[int, Query(ge=1, le=100)] = 10,
+):
+    """
+    ## Books recommended from the current user's review ratings
+
+    **Query parameters**:
+    - **limit**: number of books to return (1-100), default: 10
+
+    **Response:**
+    - **personalized**: `false` if the user has no ratings yet and gets popular books
+    - **score**: sum of item similarities weighted by the user's ratings;
+    `0` for popular books added when there are too few personal candidates
+
+    <u>Note: lists are precomputed by a background rebuild, so new reviews
+    are reflected after the next rebuild. Until a freshly started worker has
+    built them, the list is empty and **personalized** is `false`.</u>
+    """
+    personalized, books = index.for_user(current_user.id, limit)
+    return {"personalized": personalized, "books": books}
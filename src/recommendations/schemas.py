@@ -0,0 +1,26 @@
+from pydantic import BaseModel, ConfigDict
+
+
+class SimilarBook(BaseModel):
+    book_id: int
+    co_favorites: int
+    score: float
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class SimilarBooks(BaseModel):
+    book_id: int
+    similar: list[SimilarBook]
+
+
+class RecommendedBook(BaseModel):
+    book_id: int
+    score: float
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class Recommendations(BaseModel):
+    personalized: bool
+    books: list[RecommendedBook]
@@ -1,10 +1,19 @@
-from sqlalchemy import func, select
+from typing import Sequence
+
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.interfaces import ORMOption
 
+from src.books.leaderboard import leaderboard
+from src.books.trending import trending
+from src.reviews.histogram import adjust_histogram, get_histogram, rating_summary
 from src.reviews.models import ReviewModel
 from src.reviews.schemas import ReviewCreate, ReviewUpdate
+from src.shared.counts import row_count
 from src.shared.crud_base import CRUDBase
 
+review_count = row_count("reviews", ReviewModel)
+
 
 class CRUDReviews(CRUDBase[ReviewModel, ReviewCreate, ReviewUpdate]):
     async def create(
@@ -13,27 +22,95 @@ class CRUDReviews(CRUDBase[ReviewModel, ReviewCreate, ReviewUpdate]):
         data = obj_in.model_dump() if not isinstance(obj_in, dict) else obj_in
         db_obj = ReviewModel(**data)
         db.add(db_obj)
+        await adjust_histogram(db, db_obj.book_id, {db_obj.rating: 1})
         await db.commit()
         await db.refresh(db_obj)
+        await self._after_create(db, db_obj)
+        return db_obj
+
+    async def update(
+        self, db: AsyncSession, id: int, obj_in: ReviewUpdate
+    ) -> ReviewModel | None:
+        # Строка блокируется до фиксации: одновременные правки одного отзыва
+        # видят оценку друг друга и переносят в гистограмме именно её
+        previous = await db.execute(
+            select(self.model.book_id, self.model.rating)
+            .where(self.model.id == id)
+            .with_for_update()
+        )
+        previous = previous.one_or_none()
+        if previous is None:
+            return None
+
+        update_data = obj_in.model_dump(exclude_unset=True)
+        if update_data:
+            await db.execute(
+                update(self.model).where(self.model.id == id).values(**update_data)
+            )
+            book_id = update_data.get("book_id", previous.book_id)
+            rating = update_data.get("rating", previous.rating)
+            if book_id != previous.book_id:
+                await adjust_histogram(db, previous.book_id, {previous.rating: -1})
+                await adjust_histogram(db, book_id, {rating: 1})
+            elif rating != previous.rating:
+                await adjust_histogram(db, book_id, {previous.rating: -1, rating: 1})
+            await db.commit()
+
+        db_obj = await self.get(db, id)
+        if db_obj is not None:
+            leaderboard.review_removed(*previous)
+            leaderboard.review_added(db_obj.book_id, db_obj.rating)
+            await self._after_update(db, db_obj)
         return db_obj
 
-    async def get_by_book(self, db: AsyncSession, book_id: int) -> list[ReviewModel]:
+    async def get_by_book(
+        self, db: AsyncSession, book_id: int, options: Sequence[ORMOption] = ()
+    ) -> list[ReviewModel]:
         result = await db.execute(
-            select(self.model).where(self.model.book_id == book_id)
+            select(self.model).options(*options).where(self.model.book_id == book_id)
         )
         return result.scalars().all()
 
-    async def get_by_user(self, db: AsyncSession, user_id: int) -> list[ReviewModel]:
+    async def get_latest_by_book(
+        self,
+        db: AsyncSession,
+        book_id: int,
+        limit: int,
+        options: Sequence[ORMOption] = (),
+    ) -> list[ReviewModel]:
+        """Последние отзывы книги, новые первыми"""
         result = await db.execute(
-            select(self.model).where(self.model.user_id == user_id)
+            select(self.model)
+            .options(*options)
+            .where(self.model.book_id == book_id)
+            .order_by(self.model.id.desc())
+            .limit(limit)
         )
         return result.scalars().all()
 
-    async def get_average_rating(self, db: AsyncSession, book_id: int) -> float | None:
+    async def get_by_user(
+        self, db: AsyncSession, user_id: int, options: Sequence[ORMOption] = ()
+    ) -> list[ReviewModel]:
         result = await db.execute(
-            select(func.avg(self.model.rating)).where(self.model.book_id == book_id)
+            select(self.model).options(*options).where(self.model.user_id == user_id)
         )
-        return result.scalar()
+        return result.scalars().all()
+
+    async def get_average_rating(self, db: AsyncSession, book_id: int) -> float | None:
+        histogram = await get_histogram(db, book_id)
+        return rating_summary(histogram)["average"] if histogram else None
+
+    async def _after_create(self, db: AsyncSession, db_obj: ReviewModel) -> None:
+        review_count.adjust(1)
+        leaderboard.review_added(db_obj.book_id, db_obj.rating)
+        trending.record(db_obj.book_id)
+
+    async def _before_delete(self, db: AsyncSession, db_obj: ReviewModel) -> None:
+        await adjust_histogram(db, db_obj.book_id, {db_obj.rating: -1})
+
+    async def _after_delete(self, db: AsyncSession, db_obj: ReviewModel) -> None:
+        review_count.adjust(-1)
+        leaderboard.review_removed(db_obj.book_id, db_obj.rating)
 
 
 review = CRUDReviews(ReviewModel)
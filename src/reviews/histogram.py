@@ -0,0 +1,68 @@
+from collections.abc import Mapping
+
+from sqlalchemy import bindparam, delete, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.books.models import BookModel
+from src.reviews.models import RATINGS, RatingHistogramModel
+
+_book_histogram = (
+    select(
+        BookModel.id,
+        *(func.coalesce(RatingHistogramModel.column(rating), 0) for rating in RATINGS),
+    )
+    .outerjoin(RatingHistogramModel, RatingHistogramModel.book_id == BookModel.id)
+    .where(BookModel.id == bindparam("book_id"))
+)
+
+
+async def adjust_histogram(
+    db: AsyncSession, book_id: int, deltas: Mapping[int, int]
+) -> None:
+    """
+    Прибавляет к счётчикам книги `deltas` {оценка: изменение} в текущей
+    транзакции, не фиксируя её. Приращение считает сама БД
+    (INSERT ... ON CONFLICT DO UPDATE SET rating_n = rating_n + d), поэтому
+    одновременные записи отзывов одной книги не теряют обновлений
+    """
+    deltas = {rating: delta for rating, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    model = RatingHistogramModel
+    dialect = postgresql if db.bind.dialect.name == "postgresql" else sqlite
+    stmt = dialect.insert(model).values(
+        book_id=book_id,
+        **{f"rating_{rating}": max(delta, 0) for rating, delta in deltas.items()},
+    )
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[model.book_id],
+            set_={
+                f"rating_{rating}": model.column(rating) + delta
+                for rating, delta in deltas.items()
+            },
+        )
+    )
+
+
+async def remove_histogram(db: AsyncSession, book_id: int) -> None:
+    """Удаляет счётчики книги в текущей транзакции (перед удалением книги)"""
+    await db.execute(
+        delete(RatingHistogramModel).where(RatingHistogramModel.book_id == book_id)
+    )
+
+
+def rating_summary(counts: Mapping[int, int]) -> dict:
+    """Средняя оценка и число оценок по счётчикам {оценка: число}"""
+    count = sum(counts.values())
+    total = sum(rating * number for rating, number in counts.items())
+    return {"average": total / count if count else None, "count": count}
+
+
+async def get_histogram(db: AsyncSession, book_id: int) -> dict[int, int] | None:
+    """Счётчики {оценка: число} книги одной строкой по ключу; None — книги нет"""
+    row = (await db.execute(_book_histogram, {"book_id": book_id})).one_or_none()
+    if row is None:
+        return None
+    return dict(zip(RATINGS, row[1:], strict=True))
@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import TYPE_CHECKING
 
-from sqlalchemy import DateTime, ForeignKey, String, func
+from sqlalchemy import DateTime, ForeignKey, Index, String, func, literal
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.shared.database import Base
@@ -13,6 +13,10 @@ if TYPE_CHECKING:
 
 class ReviewModel(Base):
     __tablename__ = "reviews"
+    __table_args__ = (
+        # Отзывы книги и их оценки (пересчёт гистограмм) читаются по индексу
+        Index("ix_reviews_book_id_rating", "book_id", "rating"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     text: Mapped[str] = mapped_column(String(1000))
@@ -26,3 +30,39 @@ class ReviewModel(Base):
 
     book: Mapped["BookModel"] = relationship(back_populates="reviews", lazy="selectin")
     user: Mapped["UserModel"] = relationship(back_populates="reviews", lazy="selectin")
+
+
+RATINGS = range(1, 6)
+
+
+class RatingHistogramModel(Base):
+    """
+    Число оценок 1–5 каждой книги. Обновляется в транзакции записи отзыва
+    (см. src/reviews/histogram.py), поэтому сводки оценок читаются одной
+    строкой по ключу, без просмотра reviews
+    """
+
+    __tablename__ = "rating_histograms"
+
+    book_id: Mapped[int] = mapped_column(
+        ForeignKey("books.id", ondelete="CASCADE"), primary_key=True
+    )
+    rating_1: Mapped[int] = mapped_column(default=0, server_default="0")
+    rating_2: Mapped[int] = mapped_column(default=0, server_default="0")
+    rating_3: Mapped[int] = mapped_column(default=0, server_default="0")
+    rating_4: Mapped[int] = mapped_column(default=0, server_default="0")
+    rating_5: Mapped[int] = mapped_column(default=0, server_default="0")
+
+    @classmethod
+    def column(cls, rating: int):
+        return getattr(cls, f"rating_{rating}")
+
+    @classmethod
+    def count_expression(cls):
+        """SQL: число оценок (NULL, если строки нет)"""
+        return sum((cls.column(rating) for rating in RATINGS), literal(0))
+
+    @classmethod
+    def sum_expression(cls):
+        """SQL: сумма оценок (NULL, если строки нет)"""
+        return sum((cls.column(rating) * rating for rating in RATINGS), literal(0))
@@ -1,16 +1,23 @@
-from fastapi import APIRouter
+from typing import Annotated
+
+from fastapi import APIRouter, Depends
 
 from src.auth.dependencies import CurrentUserDep, OwnershipOrAdminDep
 from src.books.crud import book as book_crud
 from src.reviews.crud import review as review_crud
+from src.reviews.crud import review_count
+from src.reviews.models import ReviewModel
 from src.reviews.schemas import Review, ReviewCreate
 from src.shared.database import DatabaseDep
 from src.shared.exceptions import ForbiddenException, NotFoundException
+from src.shared.fields import FieldSelection, sparse_fields
 from src.shared.pagination import PaginationDep
 from src.users.crud import user as user_crud
 
 router = APIRouter(prefix="/reviews", tags=["Reviews"])
 
+ReviewFieldsDep = Annotated[FieldSelection, Depends(sparse_fields(Review, ReviewModel))]
+
 
 @router.post(
     "/",
@@ -57,14 +64,18 @@ async def create_review(
 @router.get(
     "/",
     response_model=list[Review],
+    dependencies=[Depends(review_count)],
     summary="Get paginated list of reviews",
     responses={
         200: {"description": "List of reviews retrieved successfully"},
         400: {"description": "Invalid pagination parameters"},
+        422: {"description": "Invalid fields parameter"},
         500: {"description": "Internal server error"},
     },
 )
-async def read_reviews(db: DatabaseDep, pagination: PaginationDep):
+async def read_reviews(
+    db: DatabaseDep, pagination: PaginationDep, fields: ReviewFieldsDep
+):
     """
     ## Retrieve a paginated list of all reviews in the system.
 
@@ -72,13 +83,21 @@ async def read_reviews(db: DatabaseDep, pagination: PaginationDep):
     **Query parameters**:
     - **skip**: Number of records to skip (min 0)
     - **limit**: Number of records to return (1-100), default: 10
+    - **fields**: comma-separated fields to return, e.g. `id,rating`; all by default
 
 
     **Example**:
     - `GET /reviews/?skip=0&limit=20` - first page of 20 reviews
     - `GET /reviews/?skip=20&limit=20` - second page of 20 reviews
+    - `GET /reviews/?fields=id,rating` - only IDs and ratings
+
+    **Response headers:**
+    - **X-Total-Count**: total number of reviews
     """
-    return await review_crud.get_all(db, pagination.skip, pagination.limit)
+    reviews = await review_crud.get_all(
+        db, pagination.skip, pagination.limit, fields.options()
+    )
+    return fields.render(reviews)
 
 
 @router.get(
@@ -91,19 +110,22 @@ async def read_reviews(db: DatabaseDep, pagination: PaginationDep):
         500: {"description": "Internal server error"},
     },
 )
-async def read_reviews_by_book(book_id: int, db: DatabaseDep):
+async def read_reviews_by_book(book_id: int, db: DatabaseDep, fields: ReviewFieldsDep):
     """
     ## Retrieve all reviews for a specific book
 
     **Path parameters**:
     - **book_id**: ID of the book to get reviews for
+
+    **Query parameters**:
+    - **fields**: comma-separated fields to return, e.g. `id,rating`; all by default
     """
     book = await book_crud.get(db, book_id)
     if not book:
         raise NotFoundException(
             detail="Book not found", resource_type="book", resource_id=book_id
         )
-    return await review_crud.get_by_book(db, book_id)
+    return fields.render(await review_crud.get_by_book(db, book_id, fields.options()))
 
 
 @router.get(
@@ -116,19 +138,22 @@ async def read_reviews_by_book(book_id: int, db: DatabaseDep):
         500: {"description": "Internal server error"},
     },
 )
-async def read_reviews_by_user(user_id: int, db: DatabaseDep):
+async def read_reviews_by_user(user_id: int, db: DatabaseDep, fields: ReviewFieldsDep):
     """
     ## Retrieve all reviews created by a specific user
 
     **Path parameters:**
     - **user_id**: ID of the user to get reviews for
+
+    **Query parameters:**
+    - **fields**: comma-separated fields to return, e.g. `id,rating`; all by default
     """
     user = await user_crud.get(db, user_id)
     if not user:
         raise NotFoundException(
             detail="User not found", resource_type="user", resource_id=user_id
         )
-    return await review_crud.get_by_user(db, user_id)
+    return fields.render(await review_crud.get_by_user(db, user_id, fields.options()))
 
 
 @router.get(
@@ -141,19 +166,22 @@ async def read_reviews_by_user(user_id: int, db: DatabaseDep):
         500: {"description": "Internal server error"},
     },
 )
-async def read_review(review_id: int, db: DatabaseDep):
+async def read_review(review_id: int, db: DatabaseDep, fields: ReviewFieldsDep):
     """
     ## Retrieve a specific review by its ID
 
     **Path parameters:**
     - **review_id**: ID of the review to retrieve
+
+    **Query parameters:**
+    - **fields**: comma-separated fields to return, e.g. `id,rating`; all by default
     """
-    review = await review_crud.get(db, review_id)
+    review = await review_crud.get(db, review_id, fields.options())
     if not review:
         raise NotFoundException(
             detail="Review not found", resource_type="review", resource_id=review_id
         )
-    return review
+    return fields.render(review)
 
 
 @router.delete(
@@ -178,7 +206,7 @@ async def delete_review(
     **Path parameters:**
     - **review_id**: ID of the review to delete
 
-    <u>Note: Users can only delete their own reviews, admins can delete any review. 
+    <u>Note: Users can only delete their own reviews, admins can delete any review.
     This action is permanent and cannot be undone.</u>
     """
     review = await review_crud.get(db, review_id)
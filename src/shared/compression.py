@@ -0,0 +1,233 @@
+import math
+import time
+import zlib
+from typing import Callable
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.shared.config import settings
+
+try:
+    import zstandard
+except ImportError:  # zstd необязателен: без пакета zstandard отдаётся gzip
+    zstandard = None
+
+# Типы ответов, которые имеет смысл сжимать (JSON и текстовые выгрузки)
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+
+class GzipEncoder:
+    name = "gzip"
+
+    def __init__(self, level: int):
+        # wbits=31 — формат gzip (заголовок и CRC), а не "голый" deflate
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        """Сжимает часть потока и сбрасывает её клиенту, не закрывая поток"""
+        return self._compressor.compress(data) + self._compressor.flush(
+            zlib.Z_SYNC_FLUSH
+        )
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+class ZstdEncoder:
+    name = "zstd"
+
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(
+            zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        )
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+def available_encodings() -> tuple[str, ...]:
+    """Поддерживаемые кодировки в порядке предпочтения"""
+    return ("zstd", "gzip") if zstandard is not None else ("gzip",)
+
+
+def negotiate(accept_encoding: str, available: tuple[str, ...]) -> str | None:
+    """
+    Первая из `available`, которую клиент принимает по Accept-Encoding
+    (с q > 0, явно или через `*`); None — сжимать нельзя
+    """
+    accepted: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name.strip():
+            accepted[name.strip().lower()] = quality
+    for name in available:
+        if accepted.get(name, accepted.get("*", 0.0)) > 0:
+            return name
+    return None
+
+
+class CpuBudget:
+    """
+    Доля процессорного времени, которую воркер тратит на сжатие: затраты
+    затухают экспоненциально с постоянной `window` секунд, и бюджет
+    исчерпан, когда за последнее окно сжатие заняло больше `share` времени.
+    """
+
+    def __init__(self, share: float, window: float = 1.0):
+        self.share = share
+        self.window = window
+        self.reset()
+
+    def reset(self) -> None:
+        self._spent = 0.0
+        self._updated_at = time.monotonic()
+
+    def _decay(self) -> None:
+        now = time.monotonic()
+        self._spent *= math.exp(-(now - self._updated_at) / self.window)
+        self._updated_at = now
+
+    def spend(self, seconds: float) -> None:
+        self._decay()
+        self._spent += seconds
+
+    @property
+    def exhausted(self) -> bool:
+        self._decay()
+        return self._spent > self.share * self.window
+
+
+compression_budget = CpuBudget(settings.COMPRESSION_CPU_BUDGET)
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware, сжимающее ответы gzip или zstd (если клиент его
+    принимает и установлен пакет zstandard).
+
+    Ответ целиком сжимается, только если он не меньше `minimum_size` байт;
+    потоковые ответы (StreamingResponse) сжимаются по частям, и каждая часть
+    сразу уходит клиенту. Уже сжатые ответы и типы, кроме JSON и текста,
+    проходят как есть. Когда сжатие исчерпывает бюджет процессора `budget`,
+    новые ответы отдаются без сжатия, пока нагрузка не спадёт. Сжимаемые
+    типы получают Vary: Accept-Encoding, даже когда отданы без сжатия.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int,
+        gzip_level: int,
+        zstd_level: int,
+        budget: CpuBudget,
+        enabled: bool = True,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.levels = {"gzip": gzip_level, "zstd": zstd_level}
+        self.budget = budget
+        self.enabled = enabled
+        self.encodings = available_encodings()
+
+    def _encoder(self, name: str) -> GzipEncoder | ZstdEncoder:
+        encoder = ZstdEncoder if name == "zstd" else GzipEncoder
+        return encoder(self.levels[name])
+
+    def _run(self, compress: Callable[[bytes], bytes], data: bytes) -> bytes:
+        started = time.thread_time()
+        try:
+            return compress(data)
+        finally:
+            self.budget.spend(time.thread_time() - started)
+
+    @staticmethod
+    def _compressible(headers: MutableHeaders) -> bool:
+        return "content-encoding" not in headers and headers.get(
+            "content-type", ""
+        ).startswith(COMPRESSIBLE_TYPES)
+
+    def _vary(self, headers: MutableHeaders) -> bool:
+        """
+        Добавляет Vary: Accept-Encoding сжимаемому ответу, даже если этот
+        ответ уйдёт без сжатия: иначе кэш отдаст его клиентам с любым
+        Accept-Encoding. Возвращает, сжимаем ли ответ
+        """
+        if not self._compressible(headers):
+            return False
+        headers.add_vary_header("Accept-Encoding")
+        return True
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.enabled:
+            return await self.app(scope, receive, send)
+        encoding = negotiate(
+            Headers(scope=scope).get("accept-encoding", ""), self.encodings
+        )
+        if encoding is None:
+
+            async def send_with_vary(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    self._vary(MutableHeaders(scope=message))
+                await send(message)
+
+            return await self.app(scope, receive, send_with_vary)
+
+        start: Message | None = None
+        encoder: GzipEncoder | ZstdEncoder | None = None
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, encoder
+            if message["type"] == "http.response.start":
+                # Заголовки отправляются вместе с первой частью тела: до неё
+                # неизвестно, потоковый ли ответ и какого он размера
+                start = message
+                return
+            if message["type"] != "http.response.body":
+                return await send(message)
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start is not None:
+                headers = MutableHeaders(scope=start)
+                compressible = self._vary(headers)
+                if (
+                    not compressible
+                    or (not more_body and len(body) < self.minimum_size)
+                    or self.budget.exhausted
+                ):
+                    await send(start)
+                    start = None
+                    return await send(message)
+
+                encoder = self._encoder(encoding)
+                headers["Content-Encoding"] = encoding
+                if more_body:
+                    if "content-length" in headers:
+                        del headers["Content-Length"]
+                else:
+                    body = self._run(encoder.finish, body)
+                    headers["Content-Length"] = str(len(body))
+                    await send(start)
+                    start = None
+                    return await send({**message, "body": body})
+                await send(start)
+                start = None
+
+            if encoder is None:
+                return await send(message)
+            compress = encoder.compress if more_body else encoder.finish
+            await send({**message, "body": self._run(compress, body)})
+
+        await self.app(scope, receive, send_compressed)
@@ -1,3 +1,6 @@
+import os
+from typing import Literal
+
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -13,6 +16,154 @@ class Settings(BaseSettings):
 
     DB_TYPE: str = Field(default="sqlite")
 
+    # Режим запуска: development — один процесс с автоперезагрузкой,
+    # production — несколько воркеров uvicorn
+    APP_ENV: Literal["development", "production"] = Field(default="development")
+    HOST: str = Field(default="0.0.0.0")
+    PORT: int = Field(default=8000)
+    # Путь к unix-сокету; если задан, HOST и PORT игнорируются
+    UNIX_SOCKET: str | None = Field(default=None)
+    # 0 — по числу CPU
+    WORKERS: int = Field(default=0, ge=0)
+    UVICORN_LOOP: Literal["auto", "asyncio", "uvloop"] = Field(default="auto")
+    UVICORN_HTTP: Literal["auto", "h11", "httptools"] = Field(default="auto")
+    KEEP_ALIVE: int = Field(default=5, ge=1)
+    BACKLOG: int = Field(default=2048, ge=1)
+    GRACEFUL_SHUTDOWN_TIMEOUT: int = Field(default=30, ge=0)
+    # Прогрев при старте воркера: соединения пула, частые запросы, схема OpenAPI
+    WARMUP_ENABLED: bool = Field(default=True)
+    DB_WARMUP_CONNECTIONS: int = Field(default=5, ge=1)
+
+    # Пул соединений одного воркера; при нескольких воркерах уменьшается,
+    # чтобы суммарно не превысить max_connections PostgreSQL
+    DB_POOL_SIZE: int = Field(default=20, ge=1)
+    DB_MAX_OVERFLOW: int = Field(default=10, ge=0)
+    POSTGRES_MAX_CONNECTIONS: int = Field(default=100, ge=1)
+    # Соединения, оставляемые для миграций, psql и суперпользователя
+    DB_RESERVED_CONNECTIONS: int = Field(default=10, ge=0)
+    # Сколько секунд ждать свободное соединение, прежде чем вернуть ошибку
+    DB_POOL_TIMEOUT: float = Field(default=30, gt=0)
+    # Пересоздавать соединения старше N секунд (-1 — никогда)
+    DB_POOL_RECYCLE: int = Field(default=1800, ge=-1)
+    # Проверять соединение перед выдачей из пула (лишний round-trip)
+    DB_POOL_PRE_PING: bool = Field(default=False)
+    # Размер кэша подготовленных выражений asyncpg; 0 — для pgbouncer
+    DB_STATEMENT_CACHE_SIZE: int = Field(default=100, ge=0)
+    # statement_timeout PostgreSQL в мс; 0 — без ограничения
+    DB_STATEMENT_TIMEOUT_MS: int = Field(default=0, ge=0)
+    DB_ECHO: bool = Field(default=False)
+
+    # Адаптивный пул: overflow растёт на DB_POOL_ADAPTIVE_STEP, пока ожидание
+    # соединения выше цели, в пределах бюджета соединений воркера
+    DB_POOL_ADAPTIVE: bool = Field(default=False)
+    DB_POOL_ADAPTIVE_TARGET_WAIT_MS: float = Field(default=50, gt=0)
+    DB_POOL_ADAPTIVE_STEP: int = Field(default=5, ge=1)
+    DB_POOL_ADAPTIVE_INTERVAL: float = Field(default=10, gt=0)
+
+    # /health/ready отвечает 503, если ожидание соединения из пула за последние
+    # HEALTH_POOL_WAIT_WINDOW секунд превысило порог
+    HEALTH_POOL_WAIT_THRESHOLD_MS: float = Field(default=200, gt=0)
+    HEALTH_POOL_WAIT_WINDOW: float = Field(default=10, gt=0)
+    # Период замера задержки event loop
+    HEALTH_LOOP_LAG_INTERVAL: float = Field(default=0.5, gt=0)
+
+    # Рекомендации: размер top-K похожих книг и период полной перестройки индексов
+    SIMILAR_BOOKS_TOP_K: int = Field(default=20, ge=1)
+    # Сколько соседей книги держать кандидатами в top-K и сколько пар книг
+    # всего — ограничение памяти индекса в каждом воркере
+    SIMILAR_BOOKS_CANDIDATES: int = Field(default=100, ge=1)
+    SIMILAR_BOOKS_MAX_PAIRS: int = Field(default=2_000_000, ge=1)
+    RECOMMENDATIONS_REBUILD_SECONDS: float = Field(default=600, gt=0)
+    # Персональные рекомендации по оценкам: длина готового списка на пользователя
+    # и число ближайших соседей книги, участвующих в подсчёте
+    RECOMMENDATIONS_TOP_N: int = Field(default=50, ge=1)
+    RECOMMENDATIONS_NEIGHBOURS: int = Field(default=50, ge=1)
+    # Расписание расчёта снимка персональных рекомендаций (задача, один воркер;
+    # JOBS_LEASE_SECONDS должен быть дольше расчёта) и период, с которым
+    # воркеры проверяют, не появился ли новый снимок
+    RECOMMENDATIONS_RATING_CRON: str = Field(default="40 */6 * * *")
+    RECOMMENDATIONS_RATING_RELOAD_SECONDS: float = Field(default=300, gt=0)
+
+    # /books/top_rated: вес априорной оценки в байесовском среднем (в отзывах)
+    # и период полной перестройки рейтинга
+    LEADERBOARD_MIN_REVIEWS: int = Field(default=5, ge=1)
+    LEADERBOARD_REBUILD_SECONDS: float = Field(default=300, gt=0)
+
+    # /books/trending: период полураспада веса события (избранное, отзыв),
+    # размер хранимого top-K и период полной перестройки
+    TRENDING_HALF_LIFE_HOURS: float = Field(default=24, gt=0)
+    TRENDING_TOP_K: int = Field(default=100, ge=1)
+    TRENDING_REBUILD_SECONDS: float = Field(default=300, gt=0)
+
+    # GET /books/suggest: период полной перестройки индекса подсказок и число
+    # строк удалённых и старых версий книг, после которого она идёт раньше срока
+    SUGGEST_REBUILD_SECONDS: float = Field(default=600, gt=0)
+    SUGGEST_MAX_DEAD_ROWS: int = Field(default=50_000, ge=1)
+
+    # GET /books/search: минимальное сходство по триграммам (как
+    # pg_trgm.similarity_threshold), бюджет времени на поиск в миллисекундах
+    # и период полной перестройки триграммного индекса (только SQLite)
+    FUZZY_SEARCH_THRESHOLD: float = Field(default=0.3, gt=0, le=1)
+    FUZZY_SEARCH_BUDGET_MS: int = Field(default=50, ge=1)
+    FUZZY_SEARCH_REBUILD_SECONDS: float = Field(default=600, gt=0)
+
+    # GET /books/facets: срок жизни и число закэшированных наборов фильтров
+    BOOK_FACETS_TTL: float = Field(default=60, ge=0)
+    BOOK_FACETS_CACHE_SIZE: int = Field(default=256, ge=1)
+
+    # POST /batch: максимум подзапросов и сколько из них выполняется
+    # одновременно (столько же сессий БД на один /batch)
+    BATCH_MAX_REQUESTS: int = Field(default=20, ge=1)
+    BATCH_CONCURRENCY: int = Field(default=4, ge=1)
+
+    # Размер порции массовых действий администратора (один UPDATE на порцию)
+    ADMIN_BULK_CHUNK_SIZE: int = Field(default=1000, ge=1, le=10_000)
+
+    # X-Total-Count у списков: режим для каждого списка ("exact" — COUNT(*)
+    # с кэшем, "estimate" — оценка reltuples Postgres для таблиц больше
+    # TOTAL_COUNT_ESTIMATE_ABOVE строк, "off" — без заголовка) и период пересчёта
+    TOTAL_COUNT_MODES: dict[str, Literal["exact", "estimate", "off"]] = Field(
+        default={
+            "books": "estimate",
+            "reviews": "estimate",
+            "users": "estimate",
+            "admins": "exact",
+            "banned": "exact",
+            "inactive": "exact",
+        }
+    )
+    TOTAL_COUNT_TTL: float = Field(default=60, ge=0)
+    TOTAL_COUNT_ESTIMATE_ABOVE: int = Field(default=100_000, ge=0)
+    # Сколько наборов фильтров хранить в кэше итогов списка с фильтрами
+    TOTAL_COUNT_CACHE_SIZE: int = Field(default=256, ge=1)
+
+    # Фоновые задачи (таблица jobs): число одновременно выполняемых задач
+    # на воркер, период опроса очереди, аренда задачи, повторы с задержкой
+    # JOBS_RETRY_BACKOFF · 2^(попытка − 1), но не больше JOBS_RETRY_BACKOFF_MAX,
+    # и срок хранения завершённых задач
+    JOBS_ENABLED: bool = Field(default=True)
+    JOBS_CONCURRENCY: int = Field(default=4, ge=1)
+    JOBS_POLL_INTERVAL: float = Field(default=1.0, gt=0)
+    JOBS_LEASE_SECONDS: float = Field(default=300, gt=0)
+    JOBS_MAX_ATTEMPTS: int = Field(default=5, ge=1)
+    JOBS_RETRY_BACKOFF: float = Field(default=5, ge=0)
+    JOBS_RETRY_BACKOFF_MAX: float = Field(default=3600, ge=0)
+    JOBS_RETENTION_HOURS: float = Field(default=72, gt=0)
+
+    # Ограничение частоты запросов к дорогим эндпоинтам
+    RATE_LIMIT_ENABLED: bool = Field(default=True)
+    RATE_LIMIT_BACKEND: Literal["memory", "database"] = Field(default="memory")
+    RATE_LIMIT_MAX_KEYS: int = Field(default=100_000, ge=1)
+
+    # Сжатие ответов (gzip, zstd при установленном zstandard): минимальный
+    # размер сжимаемого ответа, уровни сжатия и доля процессорного времени
+    # воркера на сжатие, после которой ответы отдаются без него
+    COMPRESSION_ENABLED: bool = Field(default=True)
+    COMPRESSION_MIN_SIZE: int = Field(default=1024, ge=0)
+    COMPRESSION_GZIP_LEVEL: int = Field(default=6, ge=1, le=9)
+    COMPRESSION_ZSTD_LEVEL: int = Field(default=3, ge=1, le=22)
+    COMPRESSION_CPU_BUDGET: float = Field(default=0.25, gt=0, le=1)
+
     @property
     def DB_URL(self) -> str:
         if self.DB_TYPE == "postgres":
@@ -20,6 +171,36 @@ class Settings(BaseSettings):
         else:
             return f"sqlite+aiosqlite:///{self.SQLITE_DB_PATH}"
 
+    @property
+    def WORKER_COUNT(self) -> int:
+        if self.APP_ENV == "development":
+            return 1
+        return self.WORKERS or os.cpu_count() or 1
+
+    @property
+    def DB_CONNECTION_BUDGET(self) -> int:
+        """Сколько соединений PostgreSQL может открыть один воркер"""
+        return max(
+            1,
+            (self.POSTGRES_MAX_CONNECTIONS - self.DB_RESERVED_CONNECTIONS)
+            // self.WORKER_COUNT,
+        )
+
+    @property
+    def DB_POOL_LIMITS(self) -> tuple[int, int]:
+        """
+        (pool_size, max_overflow) для одного воркера. Если все воркеры вместе
+        могут открыть больше соединений, чем разрешает сервер, лимиты
+        уменьшаются пропорционально.
+        """
+        budget = self.DB_CONNECTION_BUDGET
+        requested = self.DB_POOL_SIZE + self.DB_MAX_OVERFLOW
+        if requested <= budget:
+            return self.DB_POOL_SIZE, self.DB_MAX_OVERFLOW
+
+        pool_size = max(1, budget * self.DB_POOL_SIZE // requested)
+        return pool_size, budget - pool_size
+
     model_config = SettingsConfigDict(
         env_file=".env", env_file_encoding="utf-8", extra="ignore"
     )
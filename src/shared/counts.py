@@ -0,0 +1,169 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from typing import Literal
+
+from fastapi import Response
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.shared.config import settings
+from src.shared.database import Base, new_session
+
+CountMode = Literal["exact", "estimate", "off"]
+
+_reltuples = text("SELECT reltuples FROM pg_class WHERE oid = to_regclass(:table)")
+
+_row_counts: list["RowCount"] = []
+
+
+class RowCount:
+    """
+    Число строк для заголовка X-Total-Count у постраничных списков.
+
+    COUNT(*) выполняется не чаще раза в `ttl` секунд, а между пересчётами
+    счётчик поддерживается из CRUD через `adjust` — пересчёт лишь догоняет
+    изменения, сделанные другими воркерами. Счётчик с условием (`where`)
+    CRUD сдвигает только там, где знает, что строка под условие попадает,
+    а после смены флагов сбрасывает через `reset`.
+
+    Режим "estimate" на Postgres не считает таблицы больше `estimate_above`
+    строк: берётся оценка планировщика reltuples из pg_class, которую
+    обновляют ANALYZE и autovacuum. Режим "off" отключает заголовок.
+
+    `count_where` считает список с фильтрами запроса: COUNT(*), а в режиме
+    "estimate" — оценка планировщика из EXPLAIN для больших выборок. Итог
+    кэшируется на `ttl` секунд по ключу нормализованных фильтров (не больше
+    `max_filtered` наборов) и сбрасывается вместе со счётчиком.
+
+    Экземпляр — зависимость FastAPI: `dependencies=[Depends(count)]` в
+    декораторе маршрута добавляет заголовок к ответу.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        model: type[Base],
+        *where,
+        mode: CountMode,
+        ttl: float,
+        estimate_above: int,
+        max_filtered: int,
+    ):
+        self.name = name
+        self.model = model
+        self.where = where
+        self.mode = mode
+        self.ttl = ttl
+        self.estimate_above = estimate_above
+        self.max_filtered = max_filtered
+        self._lock = asyncio.Lock()
+        self._filtered: OrderedDict[str, tuple[float, int]] = OrderedDict()
+        self.reset()
+
+    def reset(self) -> None:
+        self._value: int | None = None
+        self._expires_at = 0.0
+        self._filtered.clear()
+
+    def adjust(self, delta: int) -> None:
+        if self._value is not None:
+            self._value = max(0, self._value + delta)
+        # Итоги с фильтрами сдвинуть нельзя: неизвестно, под какие попала строка
+        self._filtered.clear()
+
+    async def get(self) -> int | None:
+        if self.mode == "off":
+            return None
+        if self._value is None or time.monotonic() >= self._expires_at:
+            async with self._lock:
+                if self._value is None or time.monotonic() >= self._expires_at:
+                    async with new_session() as db:
+                        self._value = await self._count(db)
+                    self._expires_at = time.monotonic() + self.ttl
+        return self._value
+
+    async def _count(self, db: AsyncSession) -> int:
+        if (
+            self.mode == "estimate"
+            and not self.where
+            and db.bind.dialect.name == "postgresql"
+        ):
+            estimate = await db.scalar(_reltuples, {"table": self.model.__tablename__})
+            # -1 у таблицы, которую ещё не анализировали
+            if estimate is not None and estimate >= self.estimate_above:
+                return int(estimate)
+        return await db.scalar(
+            select(func.count()).select_from(self.model).where(*self.where)
+        )
+
+    async def count_where(self, db: AsyncSession, key: str, *conditions) -> int | None:
+        """
+        Число строк под условиями `conditions`; None в режиме "off".
+        `key` — нормализованные фильтры, из которых построены условия
+        """
+        if self.mode == "off":
+            return None
+        entry = self._filtered.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self._filtered.move_to_end(key)
+            return entry[1]
+
+        total = await self._count_where(db, (*self.where, *conditions))
+        self._filtered[key] = (time.monotonic() + self.ttl, total)
+        self._filtered.move_to_end(key)
+        while len(self._filtered) > self.max_filtered:
+            self._filtered.popitem(last=False)
+        return total
+
+    async def _count_where(self, db: AsyncSession, where: tuple) -> int:
+        if self.mode == "estimate" and db.bind.dialect.name == "postgresql":
+            estimate = await self._plan_rows(db, select(self.model.id).where(*where))
+            if estimate >= self.estimate_above:
+                return estimate
+        return await db.scalar(
+            select(func.count()).select_from(self.model).where(*where)
+        )
+
+    @staticmethod
+    async def _plan_rows(db: AsyncSession, query) -> int:
+        # Значения фильтров передаются драйверу параметрами, а не в тексте SQL.
+        # exec_driver_sql: text() принял бы двоеточия в запросе за параметры
+        compiled = query.compile(dialect=db.bind.dialect)
+        params = compiled.params
+        if compiled.positiontup is not None:
+            params = tuple(params[name] for name in compiled.positiontup)
+        connection = await db.connection()
+        result = await connection.exec_driver_sql(
+            f"EXPLAIN (FORMAT JSON) {compiled}", params
+        )
+        plan = result.scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    async def __call__(self, response: Response) -> None:
+        total = await self.get()
+        if total is not None:
+            response.headers["X-Total-Count"] = str(total)
+
+
+def row_count(name: str, model: type[Base], *where) -> RowCount:
+    """Создаёт счётчик с режимом из TOTAL_COUNT_MODES и регистрирует его"""
+    count = RowCount(
+        name,
+        model,
+        *where,
+        mode=settings.TOTAL_COUNT_MODES.get(name, "exact"),
+        ttl=settings.TOTAL_COUNT_TTL,
+        estimate_above=settings.TOTAL_COUNT_ESTIMATE_ABOVE,
+        max_filtered=settings.TOTAL_COUNT_CACHE_SIZE,
+    )
+    _row_counts.append(count)
+    return count
+
+
+def reset_row_counts() -> None:
+    for count in _row_counts:
+        count.reset()
@@ -1,8 +1,9 @@
-from typing import Generic, Type, TypeVar
+from typing import Generic, Sequence, Type, TypeVar
 
 from pydantic import BaseModel
-from sqlalchemy import select, update
+from sqlalchemy import bindparam, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.interfaces import ORMOption
 
 ModelType = TypeVar("ModelType")
 CreateShcemaType = TypeVar("CreateShcemaType", bound=BaseModel)
@@ -12,20 +13,36 @@ UpdateShcemaType = TypeVar("UpdateShcemaType", bound=BaseModel)
 class CRUDBase(Generic[ModelType, CreateShcemaType, UpdateShcemaType]):
     def __init__(self, model: Type[ModelType]):
         self.model = model
+        # Запрос собирается один раз: SQLAlchemy запоминает его ключ кэша,
+        # и каждый вызов get сразу берёт SQL из кэша компиляции движка
+        self._get_by_id = select(model).where(model.id == bindparam("id"))
 
     async def create(self, db: AsyncSession, obj_in: CreateShcemaType) -> ModelType:
         db_obj = self.model(**obj_in.model_dump())
         db.add(db_obj)
         await db.commit()
         await db.refresh(db_obj)
+        await self._after_create(db, db_obj)
         return db_obj
 
-    async def get(self, db: AsyncSession, id: int) -> ModelType | None:
-        result = await db.execute(select(self.model).where(self.model.id == id))
+    async def get(
+        self, db: AsyncSession, id: int, options: Sequence[ORMOption] = ()
+    ) -> ModelType | None:
+        # .options() копирует запрос, поэтому без опций исполняется сам объект
+        stmt = self._get_by_id.options(*options) if options else self._get_by_id
+        result = await db.execute(stmt, {"id": id})
         return result.scalar_one_or_none()
 
-    async def get_all(self, db: AsyncSession, skip: int, limit: int) -> list[ModelType]:
-        result = await db.execute(select(self.model).offset(skip).limit(limit))
+    async def get_all(
+        self,
+        db: AsyncSession,
+        skip: int,
+        limit: int,
+        options: Sequence[ORMOption] = (),
+    ) -> list[ModelType]:
+        result = await db.execute(
+            select(self.model).options(*options).offset(skip).limit(limit)
+        )
         return result.scalars().all()
 
     async def update(
@@ -40,11 +57,32 @@ class CRUDBase(Generic[ModelType, CreateShcemaType, UpdateShcemaType]):
         )
 
         await db.commit()
-        return await self.get(db, id)
+        db_obj = await self.get(db, id)
+        if db_obj is not None:
+            await self._after_update(db, db_obj)
+        return db_obj
 
     async def delete(self, db: AsyncSession, id: int) -> ModelType | None:
         db_obj = await self.get(db, id)
         if db_obj:
+            await self._before_delete(db, db_obj)
             await db.delete(db_obj)
             await db.commit()
+            await self._after_delete(db, db_obj)
         return db_obj
+
+    # Вызывается в транзакции удаления до фиксации: наследники меняют в нём
+    # зависимые таблицы, и изменения фиксируются вместе с удалением
+    async def _before_delete(self, db: AsyncSession, db_obj: ModelType) -> None:
+        pass
+
+    # Вызываются после фиксации транзакции; наследники обновляют в них
+    # структуры в памяти (индексы, рейтинги), построенные по этой таблице
+    async def _after_create(self, db: AsyncSession, db_obj: ModelType) -> None:
+        pass
+
+    async def _after_update(self, db: AsyncSession, db_obj: ModelType) -> None:
+        pass
+
+    async def _after_delete(self, db: AsyncSession, db_obj: ModelType) -> None:
+        pass
@@ -1,30 +1,170 @@
-from typing import Annotated
+import asyncio
+from contextvars import ContextVar
+from typing import Annotated, Callable
 
 from fastapi import Depends
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import DeclarativeBase
 
-from src.shared.config import settings
+from src.shared.config import Settings, settings
+from src.shared.pool import (
+    PoolAutoscaler,
+    PoolEventCounters,
+    PoolWaitTracker,
+    timed_queue_pool,
+)
 
 
 class Base(DeclarativeBase):
     pass
 
 
-if settings.DB_TYPE == "sqlite":
-    engine = create_async_engine(
-        settings.DB_URL, connect_args={"check_same_thread": False}, echo=True
+# async_sessionmaker или любая функция, возвращающая новую сессию
+SessionFactory = Callable[[], AsyncSession]
+
+# Движок создаётся при первом обращении, а не при импорте модуля
+_engine: AsyncEngine | None = None
+_session_factory: async_sessionmaker[AsyncSession] | None = None
+
+
+def engine_options(config: Settings = settings) -> dict:
+    """Параметры create_async_engine для текущей СУБД"""
+    options = {
+        "echo": config.DB_ECHO,
+        "pool_pre_ping": config.DB_POOL_PRE_PING,
+        "pool_recycle": config.DB_POOL_RECYCLE,
+    }
+
+    if config.DB_TYPE == "sqlite":
+        options["connect_args"] = {"check_same_thread": False}
+        # In-memory SQLite живёт в одном соединении (StaticPool) без размера пула
+        if config.SQLITE_DB_PATH != ":memory:":
+            options.update(
+                pool_size=config.DB_POOL_SIZE,
+                max_overflow=config.DB_MAX_OVERFLOW,
+                pool_timeout=config.DB_POOL_TIMEOUT,
+            )
+        return options
+
+    pool_size, max_overflow = config.DB_POOL_LIMITS
+    connect_args = {
+        # Кэш подготовленных выражений asyncpg и диалекта SQLAlchemy;
+        # 0 отключает оба (нужно за pgbouncer в режиме transaction)
+        "statement_cache_size": config.DB_STATEMENT_CACHE_SIZE,
+        "prepared_statement_cache_size": config.DB_STATEMENT_CACHE_SIZE,
+    }
+    if config.DB_STATEMENT_TIMEOUT_MS:
+        connect_args["server_settings"] = {
+            "statement_timeout": str(config.DB_STATEMENT_TIMEOUT_MS)
+        }
+    options.update(
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=config.DB_POOL_TIMEOUT,
+        connect_args=connect_args,
+    )
+    return options
+
+
+def create_engine() -> AsyncEngine:
+    options = engine_options()
+    # Пулу с очередью (не StaticPool in-memory SQLite) — замер ожидания checkout
+    if "pool_size" in options:
+        options["poolclass"] = timed_queue_pool(pool_wait)
+    engine = create_async_engine(settings.DB_URL, **options)
+    pool_events.attach(engine)
+    return engine
+
+
+def get_engine() -> AsyncEngine:
+    global _engine
+    if _engine is None:
+        _engine = create_engine()
+    return _engine
+
+
+def get_session_factory() -> async_sessionmaker[AsyncSession]:
+    global _session_factory
+    if _session_factory is None:
+        _session_factory = async_sessionmaker(
+            bind=get_engine(), expire_on_commit=False, autoflush=False
+        )
+    return _session_factory
+
+
+def new_session() -> AsyncSession:
+    """Новая сессия основной БД — для кода вне запроса (фоновые задачи, лимиты)"""
+    return get_session_factory()()
+
+
+pool_wait = PoolWaitTracker(settings.HEALTH_POOL_WAIT_WINDOW)
+pool_events = PoolEventCounters()
+
+
+def pool_status() -> dict[str, int | None]:
+    """Состояние пула основного движка; у SQLite часть счётчиков отсутствует"""
+    pool = get_engine().pool
+    stats = {}
+    for name in ("size", "checkedout", "overflow"):
+        method = getattr(pool, name, None)
+        stats[name] = method() if method is not None else None
+    return stats
+
+
+def create_pool_autoscaler() -> PoolAutoscaler:
+    pool_size, max_overflow = (
+        settings.DB_POOL_LIMITS
+        if settings.DB_TYPE == "postgres"
+        else (settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW)
+    )
+    return PoolAutoscaler(
+        get_engine().pool,
+        pool_wait,
+        target_wait=settings.DB_POOL_ADAPTIVE_TARGET_WAIT_MS / 1000,
+        max_overflow=max(max_overflow, settings.DB_CONNECTION_BUDGET - pool_size),
+        step=settings.DB_POOL_ADAPTIVE_STEP,
+        interval=settings.DB_POOL_ADAPTIVE_INTERVAL,
     )
-else:
-    engine = create_async_engine(settings.DB_URL, pool_size=20, max_overflow=10)
 
-AsyncSessionLocal = async_sessionmaker(
-    bind=engine, expire_on_commit=False, autoflush=False
+
+async def prewarm_pool(connections: int) -> None:
+    """Открывает соединения пула заранее, чтобы первые запросы их не ждали"""
+    engine = get_engine()
+
+    async def ping():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    await asyncio.gather(*(ping() for _ in range(max(1, connections))))
+
+
+async def dispose_engine() -> None:
+    global _engine, _session_factory
+    if _engine is not None:
+        await _engine.dispose()
+    _engine = _session_factory = None
+
+
+# Сессия, которую подзапросы POST /batch получают вместо новой
+shared_session: ContextVar[AsyncSession | None] = ContextVar(
+    "shared_session", default=None
 )
 
 
 async def get_db():
-    async with AsyncSessionLocal() as session:
+    session = shared_session.get()
+    if session is not None:
+        yield session
+        return
+    # Соединение берётся из пула при первом запросе к БД, а не заранее:
+    # маршрутам, отвечающим из памяти, оно не нужно
+    async with new_session() as session:
         try:
             yield session
         finally:
@@ -1,4 +1,5 @@
 import logging
+import math
 from typing import Any
 
 from fastapi import HTTPException, status
@@ -15,8 +16,9 @@ class BaseAPIException(HTTPException):
         detail: str,
         error_code: str | None = None,
         extra_data: dict[str, Any] | None = None,
+        headers: dict[str, str] | None = None,
     ):
-        super().__init__(status_code=status_code, detail=detail)
+        super().__init__(status_code=status_code, detail=detail, headers=headers)
         self.error_code = error_code or f"ERR_{status_code}"
         self.extra_data = extra_data or {}
 
@@ -95,6 +97,26 @@ class ForbiddenException(BaseAPIException):
         )
 
 
+class TooManyRequestsException(BaseAPIException):
+    def __init__(
+        self, detail: str = "Too many requests", retry_after: float | None = None
+    ):
+        headers = None
+        extra_data = {}
+        if retry_after is not None:
+            retry_after = max(1, math.ceil(retry_after))
+            headers = {"Retry-After": str(retry_after)}
+            extra_data["retry_after"] = retry_after
+
+        super().__init__(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=detail,
+            error_code="TOO_MANY_REQUESTS",
+            extra_data=extra_data,
+            headers=headers,
+        )
+
+
 class InternalServerErrorException(BaseAPIException):
     def __init__(self, detail: str = "Internal server error"):
         super().__init__(
@@ -114,9 +136,14 @@ async def global_exception_handler(request: Request, exc: Exception):
                 "error_code": exc.error_code,
                 **exc.extra_data,
             },
+            headers=exc.headers,
         )
     elif isinstance(exc, HTTPException):
-        return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail})
+        return JSONResponse(
+            status_code=exc.status_code,
+            content={"detail": exc.detail},
+            headers=exc.headers,
+        )
     else:
         logger.error(f"Unhandled exception: {exc}", exc_info=True)
 
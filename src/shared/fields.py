@@ -0,0 +1,135 @@
+from functools import lru_cache
+from typing import Annotated, Any, Callable
+
+from fastapi import Query, Response
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, ConfigDict, TypeAdapter, create_model
+from pydantic_core import to_json
+from sqlalchemy import inspect
+from sqlalchemy.orm import load_only, raiseload
+
+from src.shared.database import Base
+
+
+@lru_cache(maxsize=256)
+def subset_schema(schema: type[BaseModel], names: tuple[str, ...]) -> type[BaseModel]:
+    """Схема ответа только с полями `names`, с их типами и ограничениями"""
+    return create_model(
+        f"{schema.__name__}Fields",
+        __config__=ConfigDict(from_attributes=True),
+        **{
+            name: (field.annotation, field)
+            for name, field in schema.model_fields.items()
+            if name in names
+        },
+    )
+
+
+@lru_cache(maxsize=256)
+def _adapter(schema: type[BaseModel], names: tuple[str, ...], many: bool):
+    subset = subset_schema(schema, names)
+    return TypeAdapter(list[subset] if many else subset)
+
+
+class FieldSelection:
+    """
+    Поля ответа, выбранные клиентом в `?fields=`; `names` = None — все поля.
+
+    `options` сужает SELECT до колонок выбранных полей и запрещает загрузку
+    связей, которых в схеме ответа нет; `render` сериализует результат по
+    закэшированной схеме-подмножеству.
+    """
+
+    def __init__(
+        self,
+        schema: type[BaseModel],
+        model: type[Base],
+        names: tuple[str, ...] | None,
+        response: Response,
+    ):
+        self.schema = schema
+        self.model = model
+        self.names = names
+        self.response = response
+
+    def options(self) -> list:
+        names = self.names or tuple(self.schema.model_fields)
+        columns = inspect(self.model).column_attrs
+        loaded = [getattr(self.model, name) for name in names if name in columns]
+        return [load_only(*loaded), raiseload("*")]
+
+    def render(self, data: Any, extra: list[dict] | None = None) -> Any:
+        """
+        Объект или список ORM как есть (для response_model) или ответ по
+        полям; `extra` — дополнительные ключи для каждого элемента списка
+        """
+        if self.names is None and extra is None:
+            return data
+        names = self.names or tuple(self.schema.model_fields)
+        adapter = _adapter(self.schema, names, isinstance(data, list))
+        items = adapter.validate_python(data, from_attributes=True)
+        if extra is None:
+            content = adapter.dump_json(items)
+        else:
+            dumped = adapter.dump_python(items, mode="json")
+            for item, more in zip(dumped, extra, strict=True):
+                item.update(more)
+            content = to_json(dumped)
+        # Заголовки, выставленные зависимостями (X-Total-Count), переносятся
+        headers = {
+            name: value
+            for name, value in self.response.headers.items()
+            if name != "content-length"
+        }
+        return Response(content, media_type="application/json", headers=headers)
+
+
+def parse_names(value: str, allowed: tuple[str, ...], param: str) -> tuple[str, ...]:
+    """
+    Имена из списка через запятую в порядке `allowed`; неизвестные
+    или пустой список — ошибка валидации параметра запроса `param`
+    """
+    requested = {name.strip() for name in value.split(",") if name.strip()}
+    unknown = sorted(requested - set(allowed))
+    if not requested or unknown:
+        raise RequestValidationError(
+            [
+                {
+                    "type": "value_error",
+                    "loc": ("query", param),
+                    "msg": (
+                        f"Unknown {param}: {', '.join(unknown)}"
+                        if unknown
+                        else f"At least one of {param} is required"
+                    )
+                    + f"; allowed: {', '.join(allowed)}",
+                    "input": value,
+                }
+            ]
+        )
+    return tuple(name for name in allowed if name in requested)
+
+
+def sparse_fields(
+    schema: type[BaseModel], model: type[Base]
+) -> Callable[..., FieldSelection]:
+    """Зависимость FastAPI, читающая `?fields=` для ответов по схеме `schema`"""
+    allowed = tuple(schema.model_fields)
+
+    def dependency(
+        response: Response,
+        fields: Annotated[
+            str | None,
+            Query(
+                max_length=500,
+                description=f"Comma-separated fields to return: {', '.join(allowed)}",
+                examples=[",".join(allowed[:2])],
+            ),
+        ] = None,
+    ) -> FieldSelection:
+        if fields is None:
+            return FieldSelection(schema, model, None, response)
+        names = parse_names(fields, allowed, "fields")
+        return FieldSelection(schema, model, names, response)
+
+    return dependency
@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import time
+from abc import ABC, abstractmethod
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.shared.database import new_session
+
+logger = logging.getLogger("src")
+
+
+class InMemoryIndex(ABC):
+    """
+    Структура в памяти процесса, построенная по данным БД.
+
+    Загружается при прогреве или первом обращении, поддерживается
+    инкрементально из CRUD и периодически перестраивается целиком: так
+    каждый воркер догоняет изменения, сделанные другими воркерами.
+
+    Экземпляр — зависимость FastAPI: `Depends(index)` возвращает загруженный
+    индекс, не занимая соединение из пула, если индекс уже в памяти.
+
+    Индекс с `background = True` строится слишком долго для прогрева и
+    запроса: он загружается в фоновой задаче воркера, а до её окончания
+    зависимость сразу возвращает незагруженный индекс.
+    """
+
+    name: str
+    rebuild_interval: float
+    background = False
+
+    def __init__(self):
+        self.loaded = False
+        self.rebuilt_at = 0.0
+        self._load_lock = asyncio.Lock()
+        # Перестройки не перекрываются: периодическая, внеочередная и загрузка
+        self._rebuild_lock = asyncio.Lock()
+        self._load_task: asyncio.Task | None = None
+
+    async def ensure_loaded(self) -> None:
+        if self.loaded:
+            return
+        async with self._load_lock:
+            if not self.loaded:
+                async with new_session() as db:
+                    await self.rebuild(db)
+
+    def load_in_background(self) -> None:
+        """Запускает загрузку в фоне, если индекс не загружен и не загружается"""
+        if not self.loaded:
+            self._start_background(self.ensure_loaded)
+
+    def rebuild_in_background(self) -> None:
+        """Запускает внеочередную перестройку в фоне, не дожидаясь периодической"""
+        self._start_background(self._rebuild_now)
+
+    def _start_background(self, load) -> None:
+        if self._load_task is None:
+            self._load_task = asyncio.create_task(self._run_background(load))
+
+    async def _run_background(self, load) -> None:
+        try:
+            await load()
+        except Exception:
+            logger.exception("Index %s rebuild failed", self.name)
+        finally:
+            self._load_task = None
+
+    async def _rebuild_now(self) -> None:
+        async with new_session() as db:
+            await self.rebuild(db)
+
+    async def __call__(self):
+        if self.background:
+            self.load_in_background()
+        else:
+            await self.ensure_loaded()
+        return self
+
+    async def rebuild(self, db: AsyncSession) -> None:
+        async with self._rebuild_lock:
+            started = time.perf_counter()
+            await self._rebuild(db)
+            self.loaded = True
+            self.rebuilt_at = time.monotonic()
+        logger.info(
+            "Index %s rebuilt in %.1f ms",
+            self.name,
+            (time.perf_counter() - started) * 1000,
+        )
+
+    @abstractmethod
+    async def _rebuild(self, db: AsyncSession) -> None:
+        """Строит структуру заново и атомарно подменяет текущую"""
+
+    @abstractmethod
+    def reset(self) -> None:
+        """Очищает структуру; следующее обращение загрузит её заново"""
+
+
+index_registry: list[InMemoryIndex] = []
+
+
+def register_index(index: InMemoryIndex) -> InMemoryIndex:
+    index_registry.append(index)
+    return index
+
+
+def reset_indexes() -> None:
+    for index in index_registry:
+        if index._load_task is not None:
+            index._load_task.cancel()
+            index._load_task = None
+        index.reset()
+
+
+async def rebuild_indexes() -> None:
+    """Прогрев: строит индексы, фоновые — только запускает их загрузку"""
+    for index in index_registry:
+        if index.background:
+            index.load_in_background()
+            continue
+        async with new_session() as db:
+            await index.rebuild(db)
+
+
+async def run_periodic_rebuilds() -> None:
+    """Фоновая задача: перестраивает индексы по истечении их rebuild_interval"""
+    intervals = [index.rebuild_interval for index in index_registry]
+    period = max(1.0, min(intervals, default=60))
+    while True:
+        await asyncio.sleep(period)
+        now = time.monotonic()
+        for index in index_registry:
+            if not index.loaded or now - index.rebuilt_at < index.rebuild_interval:
+                continue
+            try:
+                async with new_session() as db:
+                    await index.rebuild(db)
+            except Exception:
+                logger.exception("Index %s rebuild failed", index.name)
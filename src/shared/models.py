@@ -0,0 +1,14 @@
+from sqlalchemy import String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.shared.database import Base
+
+
+class RateLimitWindowModel(Base):
+    __tablename__ = "rate_limit_windows"
+
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    window_start: Mapped[int] = mapped_column(primary_key=True)
+    count: Mapped[int] = mapped_column(default=0)
+    # Unix-время, после которого окно больше не участвует в подсчёте
+    expires_at: Mapped[float] = mapped_column(index=True)
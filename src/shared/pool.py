@@ -0,0 +1,217 @@
+import asyncio
+import bisect
+import logging
+import time
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+logger = logging.getLogger("src")
+
+# Закрытый атрибут QueuePool с лимитом overflow, который меняет PoolAutoscaler
+OVERFLOW_ATTRIBUTE = "_max_overflow"
+
+# Границы корзин гистограммы ожидания соединения, мс
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+
+class PoolWaitTracker:
+    """
+    Ожидание соединения из пула.
+
+    Для readiness хранит максимум текущего и предыдущего окна `window` секунд,
+    для настройки пула — накопительную гистограмму, сумму и число замеров.
+    Запись и чтение — O(1).
+    """
+
+    def __init__(self, window: float):
+        self.window = window
+        self.reset()
+
+    def _advance(self, now: float) -> None:
+        index = int(now // self.window)
+        if index != self._window_index:
+            self._previous = self._current if index == self._window_index + 1 else 0.0
+            self._current = 0.0
+            self._window_index = index
+
+    def record(self, wait: float) -> None:
+        self._advance(time.monotonic())
+        if wait > self._current:
+            self._current = wait
+        if wait > self._since_pop:
+            self._since_pop = wait
+        self.count += 1
+        self.total += wait
+        self.buckets[bisect.bisect_left(WAIT_BUCKETS_MS, wait * 1000)] += 1
+
+    @property
+    def recent_max(self) -> float:
+        self._advance(time.monotonic())
+        return max(self._current, self._previous)
+
+    def pop_max(self) -> float:
+        """Максимальное ожидание с прошлого вызова (для PoolAutoscaler)"""
+        wait, self._since_pop = self._since_pop, 0.0
+        return wait
+
+    def histogram(self) -> dict[str, int]:
+        labels = [f"le_{bound}ms" for bound in WAIT_BUCKETS_MS] + ["inf"]
+        return dict(zip(labels, self.buckets, strict=True))
+
+    def reset(self) -> None:
+        self._window_index = 0
+        self._current = self._previous = self._since_pop = 0.0
+        self.count = 0
+        self.total = 0.0
+        self.buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+
+
+def timed_queue_pool(tracker: PoolWaitTracker) -> type[AsyncAdaptedQueuePool]:
+    """
+    Класс пула (poolclass движка), который записывает в `tracker` ожидание
+    каждого checkout. В событиях пула есть только конец checkout, поэтому
+    замеряется публичный Pool.connect(), через который движок берёт
+    соединение: ожидание попадает в статистику только там, где соединение
+    действительно нужно
+    """
+
+    class TimedQueuePool(AsyncAdaptedQueuePool):
+        def connect(self):
+            started = time.perf_counter()
+            connection = super().connect()
+            tracker.record(time.perf_counter() - started)
+            return connection
+
+    return TimedQueuePool
+
+
+class PoolEventCounters:
+    """Счётчики событий пула SQLAlchemy (connect, checkout, checkin, ...)"""
+
+    EVENTS = (
+        "connect",
+        "checkout",
+        "checkin",
+        "invalidate",
+        "soft_invalidate",
+        "close",
+    )
+
+    def __init__(self):
+        self.counts = dict.fromkeys(self.EVENTS, 0)
+
+    def attach(self, engine: AsyncEngine) -> None:
+        for name in self.EVENTS:
+            event.listen(engine.sync_engine, name, self._listener(name))
+
+    def _listener(self, name: str):
+        def listener(*args):
+            self.counts[name] += 1
+
+        return listener
+
+    def reset(self) -> None:
+        self.counts = dict.fromkeys(self.EVENTS, 0)
+
+
+class PoolAutoscaler:
+    """
+    Адаптивный размер пула: увеличивает допустимый overflow, пока ожидание
+    соединения превышает `target_wait`, и возвращает его к исходному значению,
+    когда пул простаивает.
+
+    SQLAlchemy не даёт публичного способа менять размер пула на лету, поэтому
+    меняется `QueuePool._max_overflow` — пул читает его при каждом checkout.
+    Атрибут закрытый: если в установленной версии SQLAlchemy его нет,
+    автоподстройка отключается с предупреждением в логе, пул работает
+    с исходными лимитами.
+    """
+
+    def __init__(
+        self,
+        pool: Pool,
+        wait_tracker: PoolWaitTracker,
+        target_wait: float,
+        max_overflow: int,
+        step: int,
+        interval: float,
+    ):
+        self.pool = pool
+        self.wait_tracker = wait_tracker
+        self.target_wait = target_wait
+        self.min_overflow = getattr(pool, OVERFLOW_ATTRIBUTE, 0)
+        self.max_overflow = max(self.min_overflow, max_overflow)
+        self.step = step
+        self.interval = interval
+        self.resizes = 0
+        self._task: asyncio.Task | None = None
+
+    @property
+    def supported(self) -> bool:
+        return (
+            isinstance(self.pool, QueuePool)
+            and isinstance(getattr(self.pool, OVERFLOW_ATTRIBUTE, None), int)
+            and self.min_overflow >= 0
+        )
+
+    @property
+    def current_overflow(self) -> int:
+        return getattr(self.pool, OVERFLOW_ATTRIBUTE, self.min_overflow)
+
+    def adjust(self) -> int:
+        """Один шаг подстройки; возвращает новый лимит overflow"""
+        if not self.supported:
+            return self.current_overflow
+        current = getattr(self.pool, OVERFLOW_ATTRIBUTE)
+        wait = self.wait_tracker.pop_max()
+
+        if wait > self.target_wait and current < self.max_overflow:
+            new = min(self.max_overflow, current + self.step)
+        elif (
+            wait < self.target_wait / 4
+            and current > self.min_overflow
+            and self.pool.checkedout() < self.pool.size() + current - self.step
+        ):
+            new = max(self.min_overflow, current - self.step)
+        else:
+            return current
+
+        setattr(self.pool, OVERFLOW_ATTRIBUTE, new)
+        self.resizes += 1
+        logger.info(
+            "DB pool max_overflow %d -> %d (recent wait %.1f ms)",
+            current,
+            new,
+            wait * 1000,
+        )
+        return new
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            self.adjust()
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        if not self.supported:
+            if isinstance(self.pool, QueuePool):
+                logger.warning(
+                    "DB pool autoscaling disabled: %s has no integer %s "
+                    "in this SQLAlchemy version",
+                    type(self.pool).__name__,
+                    OVERFLOW_ATTRIBUTE,
+                )
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
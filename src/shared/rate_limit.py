@@ -0,0 +1,288 @@
+import json
+import math
+import re
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Callable
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects import postgresql, sqlite
+from starlette.routing import compile_path
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.shared.config import settings
+from src.shared.database import SessionFactory, new_session
+from src.shared.models import RateLimitWindowModel
+
+
+@dataclass(frozen=True, slots=True)
+class RateLimitPolicy:
+    """
+    Лимит запросов за скользящее окно `window` секунд для каждого типа клиента.
+    None — без ограничений.
+    """
+
+    name: str
+    window: int
+    anonymous: int | None
+    user: int | None
+    admin: int | None = None
+
+    def limit_for(self, principal_type: str) -> int | None:
+        if principal_type == "admin":
+            return self.admin
+        if principal_type == "user":
+            return self.user
+        return self.anonymous
+
+
+@dataclass(frozen=True, slots=True)
+class RateLimitRule:
+    method: str
+    path: str
+    policy: RateLimitPolicy
+
+
+class RateLimitBackend(ABC):
+    @abstractmethod
+    async def hit(self, key: str, limit: int, window: int) -> tuple[bool, int, float]:
+        """
+        Учитывает запрос по ключу, если лимит не превышен.
+        Возвращает (разрешён ли запрос, сколько запросов осталось, секунд до сброса).
+        """
+
+    @abstractmethod
+    async def reset(self) -> None:
+        """Удаляет все счётчики"""
+
+
+def _window_position(now: float, window: int) -> tuple[int, float, float]:
+    current = int(now // window)
+    elapsed = now / window - current
+    return current, elapsed, (current + 1) * window - now
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """
+    Счётчики скользящего окна в памяти процесса.
+    Для каждого ключа хранится изменяемый список [окно, предыдущее, текущее, длина],
+    поэтому повторные запросы не создают новых объектов.
+    """
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._windows: dict[str, list[int]] = {}
+
+    async def hit(self, key: str, limit: int, window: int) -> tuple[bool, int, float]:
+        now = time.time()
+        current, elapsed, reset = _window_position(now, window)
+
+        state = self._windows.get(key)
+        if state is None:
+            if len(self._windows) >= self.max_keys:
+                self._prune(now)
+            state = self._windows[key] = [current, 0, 0, window]
+        elif state[0] != current:
+            state[1] = state[2] if state[0] == current - 1 else 0
+            state[2] = 0
+            state[0] = current
+
+        estimate = state[1] * (1 - elapsed) + state[2] + 1
+        if estimate > limit:
+            return False, 0, reset
+
+        state[2] += 1
+        return True, int(limit - estimate), reset
+
+    def _prune(self, now: float) -> None:
+        stale = [
+            key
+            for key, (index, _, _, window) in self._windows.items()
+            if now // window > index + 1
+        ]
+        if not stale:
+            stale = list(self._windows)[: len(self._windows) // 2]
+        for key in stale:
+            del self._windows[key]
+
+    async def reset(self) -> None:
+        self._windows.clear()
+
+
+class DatabaseRateLimitBackend(RateLimitBackend):
+    """Счётчики в таблице rate_limit_windows — общие для всех воркеров"""
+
+    def __init__(self, session_factory: SessionFactory):
+        self.session_factory = session_factory
+
+    async def hit(self, key: str, limit: int, window: int) -> tuple[bool, int, float]:
+        now = time.time()
+        current, elapsed, reset = _window_position(now, window)
+        model = RateLimitWindowModel
+
+        async with self.session_factory() as db:
+            previous = await db.scalar(
+                select(model.count).where(
+                    model.key == key, model.window_start == current - 1
+                )
+            )
+
+            # Сначала атомарный инкремент, решение — по возвращённому значению:
+            # блокировка строки упорядочивает конкурентные запросы воркеров
+            dialect = postgresql if db.bind.dialect.name == "postgresql" else sqlite
+            stmt = dialect.insert(model).values(
+                key=key,
+                window_start=current,
+                count=1,
+                expires_at=(current + 2) * window,
+            )
+            count = await db.scalar(
+                stmt.on_conflict_do_update(
+                    index_elements=[model.key, model.window_start],
+                    set_={"count": model.count + 1},
+                ).returning(model.count)
+            )
+            estimate = (previous or 0) * (1 - elapsed) + count
+            if estimate > limit:
+                # Отклонённый запрос не расходует лимит
+                await db.rollback()
+                return False, 0, reset
+
+            await db.commit()
+            return True, int(limit - estimate), reset
+
+    async def prune(self) -> int:
+        async with self.session_factory() as db:
+            result = await db.execute(
+                delete(RateLimitWindowModel).where(
+                    RateLimitWindowModel.expires_at < time.time()
+                )
+            )
+            await db.commit()
+            return result.rowcount
+
+    async def reset(self) -> None:
+        async with self.session_factory() as db:
+            await db.execute(delete(RateLimitWindowModel))
+            await db.commit()
+
+
+# Возвращает ("user" | "admin", id) по заголовку Authorization или None
+PrincipalResolver = Callable[[str], tuple[str, str] | None]
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware, ограничивающее частоту запросов к выбранным маршрутам.
+
+    Ключ лимита — политика маршрута и клиент: id пользователя для запросов
+    с валидным токеном, иначе IP-адрес. Ответы на ограниченные маршруты
+    получают заголовки RateLimit-*; остальные запросы проходят без
+    дополнительной работы.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        rules: list[RateLimitRule],
+        backend: RateLimitBackend,
+        resolve_principal: PrincipalResolver | None = None,
+        enabled: bool = True,
+    ):
+        self.app = app
+        self.backend = backend
+        self.resolve_principal = resolve_principal
+        self.enabled = enabled
+
+        self._static: dict[str, dict[str, RateLimitPolicy]] = {}
+        self._dynamic: list[tuple[re.Pattern, dict[str, RateLimitPolicy]]] = []
+        for rule in rules:
+            regex, _, convertors = compile_path(rule.path)
+            if convertors:
+                self._dynamic.append((regex, {rule.method: rule.policy}))
+            else:
+                self._static.setdefault(rule.path, {})[rule.method] = rule.policy
+
+    def _match(self, method: str, path: str) -> RateLimitPolicy | None:
+        methods = self._static.get(path)
+        if methods is not None and method in methods:
+            return methods[method]
+        for regex, methods in self._dynamic:
+            if method in methods and regex.match(path):
+                return methods[method]
+        return None
+
+    def _principal(self, scope: Scope) -> tuple[str, str]:
+        if self.resolve_principal is not None:
+            for name, value in scope["headers"]:
+                if name == b"authorization":
+                    principal = self.resolve_principal(value.decode("latin-1"))
+                    if principal is not None:
+                        return principal
+                    break
+        client = scope.get("client")
+        return "anonymous", client[0] if client else "unknown"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.enabled:
+            return await self.app(scope, receive, send)
+
+        policy = self._match(scope["method"], scope["path"])
+        if policy is None:
+            return await self.app(scope, receive, send)
+
+        principal_type, principal_id = self._principal(scope)
+        limit = policy.limit_for(principal_type)
+        if limit is None:
+            return await self.app(scope, receive, send)
+
+        allowed, remaining, reset = await self.backend.hit(
+            f"{policy.name}:{principal_type}:{principal_id}", limit, policy.window
+        )
+        reset = max(1, math.ceil(reset))
+        headers = [
+            (b"ratelimit-limit", str(limit).encode()),
+            (b"ratelimit-remaining", str(remaining).encode()),
+            (b"ratelimit-reset", str(reset).encode()),
+            (b"ratelimit-policy", f"{limit};w={policy.window}".encode()),
+        ]
+
+        if not allowed:
+            body = json.dumps(
+                {
+                    "detail": "Too many requests",
+                    "error_code": "TOO_MANY_REQUESTS",
+                    "retry_after": reset,
+                }
+            ).encode()
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 429,
+                    "headers": [
+                        (b"content-type", b"application/json"),
+                        (b"content-length", str(len(body)).encode()),
+                        (b"retry-after", str(reset).encode()),
+                        *headers,
+                    ],
+                }
+            )
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", ()), *headers]
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+
+def create_rate_limit_backend() -> RateLimitBackend:
+    if settings.RATE_LIMIT_BACKEND == "database":
+        return DatabaseRateLimitBackend(new_session)
+    return MemoryRateLimitBackend(settings.RATE_LIMIT_MAX_KEYS)
+
+
+rate_limit_backend = create_rate_limit_backend()
@@ -1,15 +1,24 @@
-from sqlalchemy import select, update
+from sqlalchemy import bindparam, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.auth.utils import get_password_hash, verify_password
+from src.auth.utils import get_password_hash_async, verify_password_async
+from src.shared.counts import row_count
 from src.shared.crud_base import CRUDBase
 from src.users.models import UserModel
 from src.users.schemas import UserCreate, UserUpdate
 
+# GET /users/ показывает только активных, деактивация сбрасывает счётчик
+user_count = row_count("users", UserModel, UserModel.is_active)
+
+# Частые запросы собираются один раз (см. CRUDBase._get_by_id)
+_active_by_username = select(UserModel).where(
+    UserModel.username == bindparam("username"), UserModel.is_active
+)
+
 
 class CRUDUser(CRUDBase[UserModel, UserCreate, UserUpdate]):
     async def create(self, db: AsyncSession, obj_in: UserCreate) -> UserModel:
-        hashed_password = get_password_hash(obj_in.password)
+        hashed_password = await get_password_hash_async(obj_in.password)
         db_obj = UserModel(
             username=obj_in.username,
             email=obj_in.email,
@@ -20,6 +29,7 @@ class CRUDUser(CRUDBase[UserModel, UserCreate, UserUpdate]):
         db.add(db_obj)
         await db.commit()
         await db.refresh(db_obj)
+        await self._after_create(db, db_obj)
         return db_obj
 
     async def update_user(
@@ -31,7 +41,7 @@ class CRUDUser(CRUDBase[UserModel, UserCreate, UserUpdate]):
             update_data = obj_in.model_dump(exclude_unset=True)
 
         if "password" in update_data:
-            update_data["password_hash"] = get_password_hash(
+            update_data["password_hash"] = await get_password_hash_async(
                 update_data.pop("password")
             )
 
@@ -46,11 +56,7 @@ class CRUDUser(CRUDBase[UserModel, UserCreate, UserUpdate]):
     async def get_by_username(
         self, db: AsyncSession, username: str
     ) -> UserModel | None:
-        result = await db.execute(
-            select(self.model).where(
-                self.model.username == username, self.model.is_active
-            )
-        )
+        result = await db.execute(_active_by_username, {"username": username})
         return result.scalar_one_or_none()
 
     async def get_by_email(self, db: AsyncSession, email: str) -> UserModel | None:
@@ -70,11 +76,19 @@ class CRUDUser(CRUDBase[UserModel, UserCreate, UserUpdate]):
         )
         return result.all()
 
+    async def _after_create(self, db: AsyncSession, db_obj: UserModel) -> None:
+        # Новый пользователь всегда активен
+        user_count.adjust(1)
+
+    async def _after_delete(self, db: AsyncSession, db_obj: UserModel) -> None:
+        if db_obj.is_active:
+            user_count.adjust(-1)
+
     async def authenticate(
         self, db: AsyncSession, username: str, password: str
     ) -> UserModel | None:
         user = await self.get_by_username(db, username)
-        if not user or not verify_password(password, user.password_hash):
+        if not user or not await verify_password_async(password, user.password_hash):
             return None
 
         if not user.is_active or user.is_banned:
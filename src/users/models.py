@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import TYPE_CHECKING
 
-from sqlalchemy import Boolean, DateTime, String, func
+from sqlalchemy import Boolean, DateTime, Index, String, func, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.shared.database import Base
@@ -13,6 +13,42 @@ if TYPE_CHECKING:
 
 class UserModel(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # Частичные индексы под списки админки: в них попадает малая доля
+        # пользователей, и сразу в порядке id, нужном для курсора. SQLite
+        # применяет частичный индекс, только если условие запроса совпадает
+        # с условием индекса дословно, а булевы поля он сравнивает с 1/0
+        Index(
+            "ix_users_admins",
+            "id",
+            postgresql_where=text("is_admin"),
+            sqlite_where=text("is_admin = 1"),
+        ),
+        Index(
+            "ix_users_banned",
+            "id",
+            postgresql_where=text("is_banned"),
+            sqlite_where=text("is_banned = 1"),
+        ),
+        Index(
+            "ix_users_inactive",
+            "id",
+            postgresql_where=text("NOT is_active"),
+            sqlite_where=text("is_active = 0"),
+        ),
+        # LIKE 'prefix%' в Postgres использует B-tree только с text_pattern_ops
+        # (при сортировке не "C"); в SQLite хватает обычных индексов
+        Index(
+            "ix_users_username_pattern",
+            "username",
+            postgresql_ops={"username": "text_pattern_ops"},
+        ).ddl_if(dialect="postgresql"),
+        Index(
+            "ix_users_email_pattern",
+            "email",
+            postgresql_ops={"email": "text_pattern_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     username: Mapped[str] = mapped_column(String(50), unique=True, index=True)
@@ -30,7 +66,7 @@ class UserModel(Base):
     )
     ban_reason: Mapped[str | None] = mapped_column(String(500), nullable=True)
 
-    favorites: Mapped["FavoriteModel"] = relationship(
+    favorites: Mapped[list["FavoriteModel"]] = relationship(
         back_populates="user", cascade="all, delete-orphan"
     )
     reviews: Mapped[list["ReviewModel"]] = relationship(
@@ -1,4 +1,4 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 
 from src.admins.crud import admin as admin_crud
 from src.auth.dependencies import AdminDep, CurrentUserDep, OwnershipOrAdminDep
@@ -9,6 +9,7 @@ from src.shared.exceptions import (
 )
 from src.shared.pagination import PaginationDep
 from src.users.crud import user as user_crud
+from src.users.crud import user_count
 from src.users.schemas import User, UserCreate, UserUpdate
 
 router = APIRouter(prefix="/users", tags=["Users"])
@@ -78,6 +79,7 @@ async def read_current_user(current_user: CurrentUserDep):
 @router.get(
     "/",
     response_model=list[User],
+    dependencies=[Depends(user_count)],
     summary="Get paginated list of users",
     responses={
         200: {"description": "List of users retrieved successfully"},
@@ -95,6 +97,9 @@ async def read_users(
     - **skip**: Number of records to skip (min 0)
     - **limit**: Number of records to return (1-100), default: 10
 
+    **Response headers:**
+    - **X-Total-Count**: total number of users
+
     <u>Note: only admins can make this request.</u>
     """
     return await user_crud.get_all(db, pagination.skip, pagination.limit)
@@ -5,11 +5,22 @@ import pytest_asyncio
 from httpx import ASGITransport, AsyncClient
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 
-from src.main import app
-from src.shared.database import Base, get_db
+from src.auth.revocation import revocation_filter
+from src.auth.throttling import login_throttle
+from src.books.facets import book_facets
+from src.jobs.runner import job_runner
+from src.main import create_app
+from src.shared import database
+from src.shared.compression import compression_budget
+from src.shared.counts import reset_row_counts
+from src.shared.database import Base, pool_wait
+from src.shared.indexes import reset_indexes
+from src.shared.rate_limit import rate_limit_backend
 from src.users.crud import user as user_crud
 from src.users.schemas import UserCreate
 
+app = create_app()
+
 # Тестовая in-memory БД
 TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 
@@ -61,11 +72,8 @@ async def async_client(test_engine):
         bind=test_engine, expire_on_commit=False, autoflush=False
     )
 
-    async def override_get_db():
-        async with TestingSessionLocal() as session:
-            yield session
-
-    app.dependency_overrides[get_db] = override_get_db
+    # get_db и код вне запросов (индексы, лимиты) получают сессии через new_session()
+    database._session_factory = TestingSessionLocal
 
     async with AsyncClient(
         transport=ASGITransport(app=app), base_url="http://test"
@@ -73,6 +81,7 @@ async def async_client(test_engine):
         yield client
 
     app.dependency_overrides.clear()
+    database._session_factory = None
 
 
 @pytest_asyncio.fixture(autouse=True)
@@ -84,6 +93,29 @@ async def clean_tables(test_engine):
     yield
 
 
+@pytest_asyncio.fixture(autouse=True)
+async def reset_in_memory_state():
+    """Сброс состояния, которое хранится в памяти процесса"""
+    revocation_filter.reset()
+    await login_throttle.backend.reset()
+    await rate_limit_backend.reset()
+    pool_wait.reset()
+    reset_indexes()
+    reset_row_counts()
+    book_facets.clear()
+    compression_budget.reset()
+    job_runner.reset()
+    yield
+
+
+@pytest_asyncio.fixture()
+async def ready_app():
+    """Приложение, завершившее прогрев"""
+    app.state.ready = True
+    yield app
+    app.state.ready = False
+
+
 @pytest_asyncio.fixture()
 async def unique_timestamp():
     """Генерация уникального timestamp"""
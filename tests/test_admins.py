@@ -1,6 +1,13 @@
+import threading
+
 import pytest
 from httpx import AsyncClient
 
+import src.auth.utils
+from src.admins.crud import admin as admin_crud
+from src.admins.schemas import UserAdminUpdate
+from src.auth.utils import rate_limit_principal
+
 
 @pytest.mark.asyncio
 async def test_regular_user_cannot_create_book(
@@ -239,3 +246,262 @@ async def test_ban_and_unban_user_flow(async_client: AsyncClient, admin_token: s
     banned_users_after = banned_list_after_response.json()
     banned_user_ids_after = [user["id"] for user in banned_users_after]
     assert user_id not in banned_user_ids_after
+
+
+@pytest.mark.asyncio
+async def test_admin_bulk_ban_by_ids(
+    async_client: AsyncClient, admin_user, admin_token: str, regular_user
+):
+    """Тест массового бана по списку ID: себя пропускает, сессии отзывает"""
+    login = await async_client.post(
+        "/auth/login",
+        json={"username": regular_user["username"], "password": "password"},
+    )
+    user_token = login.json()["access_token"]
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    response = await async_client.post(
+        "/admin/users/bulk/ban",
+        json={
+            "user_ids": [regular_user["id"], admin_user.id, 999999],
+            "ban_reason": "spam",
+        },
+        headers=headers,
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["affected_ids"] == [regular_user["id"]]
+    assert data["count"] == 1
+    assert data["revoked_sessions"] == 1
+
+    me = await async_client.get(
+        "/users/me", headers={"Authorization": f"Bearer {user_token}"}
+    )
+    assert me.status_code == 401
+
+    # Повторный бан ничего не меняет
+    again = await async_client.post(
+        "/admin/users/bulk/ban",
+        json={"user_ids": [regular_user["id"]]},
+        headers=headers,
+    )
+    assert again.json()["count"] == 0
+
+    banned = await async_client.get("/admin/users/banned", headers=headers)
+    assert [user["ban_reason"] for user in banned.json()] == ["spam"]
+
+
+@pytest.mark.asyncio
+async def test_admin_demote_revokes_sessions(
+    async_client: AsyncClient, test_session, admin_token: str, regular_user
+):
+    """Тест что разжалование админа отзывает его сессии с claim adm"""
+    user = await admin_crud.get(test_session, regular_user["id"])
+    user.is_admin = True
+    await test_session.commit()
+    login = await async_client.post(
+        "/auth/login",
+        json={"username": regular_user["username"], "password": "password"},
+    )
+    demoted_token = login.json()["access_token"]
+    assert rate_limit_principal(f"Bearer {demoted_token}")[0] == "admin"
+
+    response = await async_client.post(
+        f"/admin/users/{regular_user['id']}/demote",
+        headers={"Authorization": f"Bearer {admin_token}"},
+    )
+    assert response.status_code == 200
+    assert response.json()["is_admin"] is False
+
+    me = await async_client.get(
+        "/users/me", headers={"Authorization": f"Bearer {demoted_token}"}
+    )
+    assert me.status_code == 401
+    assert rate_limit_principal(f"Bearer {demoted_token}")[0] == "user"
+
+
+@pytest.mark.asyncio
+async def test_admin_bulk_action_by_filter(async_client: AsyncClient, admin_token: str):
+    """Тест массовой деактивации по фильтру"""
+    created = {}
+    for name, domain in [
+        ("bulk_a", "example.com"),
+        ("bulk_b", "example.com"),
+        ("bulk_c", "example.org"),
+    ]:
+        response = await async_client.post(
+            "/users/",
+            json={
+                "username": name,
+                "email": f"{name}@{domain}",
+                "password": "password123",
+            },
+        )
+        created[name] = response.json()["id"]
+
+    response = await async_client.post(
+        "/admin/users/bulk/deactivate",
+        json={"filter": {"email_domain": "example.com", "username_prefix": "bulk_"}},
+        headers={"Authorization": f"Bearer {admin_token}"},
+    )
+    assert response.status_code == 200
+    assert sorted(response.json()["affected_ids"]) == sorted(
+        [created["bulk_a"], created["bulk_b"]]
+    )
+
+    login = await async_client.post(
+        "/auth/login", json={"username": "bulk_a", "password": "password123"}
+    )
+    assert login.status_code != 200
+
+
+@pytest.mark.asyncio
+async def test_admin_bulk_action_validation(
+    async_client: AsyncClient, admin_token: str, regular_token: str
+):
+    """Тест валидации массовых действий"""
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    both = await async_client.post(
+        "/admin/users/bulk/ban",
+        json={"user_ids": [1], "filter": {"is_active": True}},
+        headers=headers,
+    )
+    assert both.status_code == 422
+
+    empty_filter = await async_client.post(
+        "/admin/users/bulk/ban", json={"filter": {}}, headers=headers
+    )
+    assert empty_filter.status_code == 422
+
+    unknown = await async_client.post(
+        "/admin/users/bulk/delete", json={"user_ids": [1]}, headers=headers
+    )
+    assert unknown.status_code == 422
+
+    forbidden = await async_client.post(
+        "/admin/users/bulk/ban",
+        json={"user_ids": [1]},
+        headers={"Authorization": f"Bearer {regular_token}"},
+    )
+    assert forbidden.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_admin_search_users_keyset_pages(
+    async_client: AsyncClient, admin_token: str
+):
+    """Тест поиска пользователей: страницы по курсору и общий итог"""
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    ids = []
+    for i in range(5):
+        response = await async_client.post(
+            "/users/",
+            json={
+                "username": f"reader_{i}",
+                "email": f"reader_{i}@example.com",
+                "password": "password123",
+            },
+        )
+        ids.append(response.json()["id"])
+
+    params = {"username_prefix": "reader_", "limit": 2, "with_total": True}
+    seen = []
+    cursor = None
+    while True:
+        page = await async_client.get(
+            "/admin/users",
+            params={**params, **({"cursor": cursor} if cursor else {})},
+            headers=headers,
+        )
+        assert page.status_code == 200
+        data = page.json()
+        assert data["total"] == 5
+        seen.extend(user["id"] for user in data["items"])
+        cursor = data["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == sorted(ids, reverse=True)
+
+    no_total = await async_client.get(
+        "/admin/users", params={"username_prefix": "reader_"}, headers=headers
+    )
+    assert no_total.json()["total"] is None
+    assert no_total.json()["next_cursor"] is None
+
+
+@pytest.mark.asyncio
+async def test_admin_search_users_filters(
+    async_client: AsyncClient, admin_user, admin_token: str, regular_user
+):
+    """Тест комбинируемых фильтров поиска и списка неактивных"""
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    await async_client.post(
+        f"/admin/users/{regular_user['id']}/deactivate", headers=headers
+    )
+
+    admins = await async_client.get(
+        "/admin/users", params={"is_admin": True}, headers=headers
+    )
+    assert [user["id"] for user in admins.json()["items"]] == [admin_user.id]
+
+    inactive = await async_client.get(
+        "/admin/users",
+        params={"is_active": False, "email_prefix": "test_", "with_total": True},
+        headers=headers,
+    )
+    assert [user["id"] for user in inactive.json()["items"]] == [regular_user["id"]]
+    assert inactive.json()["total"] == 1
+
+    inactive_list = await async_client.get("/admin/users/inactive", headers=headers)
+    assert [user["id"] for user in inactive_list.json()] == [regular_user["id"]]
+
+    nothing = await async_client.get(
+        "/admin/users",
+        params={"is_admin": True, "is_banned": True, "with_total": True},
+        headers=headers,
+    )
+    assert nothing.json() == {"items": [], "next_cursor": None, "total": 0}
+
+
+@pytest.mark.asyncio
+async def test_admin_lists_total_count(
+    async_client: AsyncClient, admin_token: str, regular_user
+):
+    """Тест X-Total-Count у списков админки после изменения флагов"""
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    before = await async_client.get("/admin/users/banned", headers=headers)
+    assert before.headers["X-Total-Count"] == "0"
+
+    banned = await async_client.post(
+        f"/admin/users/{regular_user['id']}/ban",
+        json={"ban_reason": "spam"},
+        headers=headers,
+    )
+    assert banned.status_code == 200
+
+    after = await async_client.get("/admin/users/banned", headers=headers)
+    assert after.headers["X-Total-Count"] == "1"
+    admins = await async_client.get("/admin/users/admins", headers=headers)
+    assert admins.headers["X-Total-Count"] == "1"
+
+
+@pytest.mark.asyncio
+async def test_admin_password_update_hashes_off_event_loop(
+    test_session, regular_user, monkeypatch
+):
+    """Тест что смена пароля администратором не выполняет bcrypt в event loop"""
+    threads = []
+    get_password_hash = src.auth.utils.get_password_hash
+
+    def recording_hash(password):
+        threads.append(threading.current_thread())
+        return get_password_hash(password)
+
+    monkeypatch.setattr(src.auth.utils, "get_password_hash", recording_hash)
+    user = await admin_crud.update_user_admin(
+        test_session, regular_user["id"], UserAdminUpdate(password="new-password")
+    )
+
+    assert threads and threads[0] is not threading.main_thread()
+    assert src.auth.utils.verify_password("new-password", user.password_hash)
@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+import src.main
+from src.main import create_app
+from src.recommendations.index import co_favorites, rating_recommendations
+from src.shared import database
+
+
+@pytest.mark.asyncio
+async def test_lifespan_warm_up(monkeypatch, test_engine):
+    """Тест что lifespan прогревает приложение и отмечает его готовым"""
+    session_factory = async_sessionmaker(bind=test_engine, expire_on_commit=False)
+
+    async def prewarm_pool(connections: int):
+        async with test_engine.connect():
+            pass
+
+    monkeypatch.setattr(database, "_session_factory", session_factory)
+    monkeypatch.setattr(src.main, "prewarm_pool", prewarm_pool)
+    monkeypatch.setattr(src.main, "dispose_engine", lambda: asyncio.sleep(0))
+
+    app = create_app()
+    assert app.state.ready is False
+
+    async with app.router.lifespan_context(app):
+        assert app.state.ready is True
+        assert app.openapi_schema is not None
+        # Долгий индекс рекомендаций не задерживает готовность — он грузится в фоне
+        assert co_favorites.loaded
+        assert (
+            rating_recommendations.loaded
+            or rating_recommendations._load_task is not None
+        )
+
+    assert app.state.ready is False
+
+
+@pytest.mark.asyncio
+async def test_lifespan_cleans_up_after_failed_start(monkeypatch):
+    """Тест что при ошибке прогрева задачи останавливаются и движок закрывается"""
+    from src.health.monitor import loop_lag_monitor
+
+    disposed = []
+
+    async def warm_up(app):
+        raise RuntimeError("warm-up failed")
+
+    async def dispose_engine():
+        disposed.append(True)
+
+    monkeypatch.setattr(src.main, "warm_up", warm_up)
+    monkeypatch.setattr(src.main, "dispose_engine", dispose_engine)
+    monkeypatch.setattr(src.main.settings, "WARMUP_ENABLED", True)
+
+    app = create_app()
+    with pytest.raises(RuntimeError):
+        async with app.router.lifespan_context(app):
+            pass
+
+    assert not loop_lag_monitor.running
+    assert disposed == [True]
+    assert app.state.ready is False
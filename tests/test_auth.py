@@ -0,0 +1,177 @@
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.auth.config import auth_config
+from src.auth.revocation import BloomFilter
+from src.auth.throttling import DatabaseThrottleBackend, MemoryThrottleBackend
+
+
+async def _login(async_client, username: str, password: str = "password") -> dict:
+    response = await async_client.post(
+        "/auth/login", json={"username": username, "password": password}
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+@pytest.mark.asyncio
+async def test_login_returns_refresh_token(async_client, regular_user):
+    """Тест что логин возвращает refresh-токен"""
+    tokens = await _login(async_client, regular_user["username"])
+
+    assert tokens["access_token"]
+    assert tokens["refresh_token"]
+    assert tokens["token_type"] == "bearer"
+
+
+@pytest.mark.asyncio
+async def test_refresh_rotates_token(async_client, regular_user):
+    """Тест ротации refresh-токена"""
+    tokens = await _login(async_client, regular_user["username"])
+
+    response = await async_client.post(
+        "/auth/refresh", json={"refresh_token": tokens["refresh_token"]}
+    )
+    assert response.status_code == 200
+    new_tokens = response.json()
+    assert new_tokens["refresh_token"] != tokens["refresh_token"]
+
+    me_response = await async_client.get(
+        "/users/me", headers={"Authorization": f"Bearer {new_tokens['access_token']}"}
+    )
+    assert me_response.status_code == 200
+    assert me_response.json()["id"] == regular_user["id"]
+
+
+@pytest.mark.asyncio
+async def test_refresh_token_reuse_revokes_session(async_client, regular_user):
+    """Тест что повторное использование refresh-токена отзывает сессию"""
+    tokens = await _login(async_client, regular_user["username"])
+
+    first = await async_client.post(
+        "/auth/refresh", json={"refresh_token": tokens["refresh_token"]}
+    )
+    assert first.status_code == 200
+
+    reused = await async_client.post(
+        "/auth/refresh", json={"refresh_token": tokens["refresh_token"]}
+    )
+    assert reused.status_code == 401
+
+    rotated = await async_client.post(
+        "/auth/refresh", json={"refresh_token": first.json()["refresh_token"]}
+    )
+    assert rotated.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_access_token_cannot_be_used_as_refresh(async_client, regular_token):
+    """Тест что access-токен нельзя использовать для обновления"""
+    response = await async_client.post(
+        "/auth/refresh", json={"refresh_token": regular_token}
+    )
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_logout_revokes_access_token(async_client, regular_user):
+    """Тест что после выхода токены сессии перестают работать"""
+    tokens = await _login(async_client, regular_user["username"])
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+
+    assert (await async_client.get("/users/me", headers=headers)).status_code == 200
+
+    response = await async_client.post(
+        "/auth/logout", json={"refresh_token": tokens["refresh_token"]}
+    )
+    assert response.status_code == 204
+
+    assert (await async_client.get("/users/me", headers=headers)).status_code == 401
+    refresh_response = await async_client.post(
+        "/auth/refresh", json={"refresh_token": tokens["refresh_token"]}
+    )
+    assert refresh_response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_logout_does_not_affect_other_sessions(async_client, regular_user):
+    """Тест что выход из одной сессии не затрагивает другие"""
+    first = await _login(async_client, regular_user["username"])
+    second = await _login(async_client, regular_user["username"])
+
+    await async_client.post(
+        "/auth/logout", json={"refresh_token": first["refresh_token"]}
+    )
+
+    response = await async_client.get(
+        "/users/me", headers={"Authorization": f"Bearer {second['access_token']}"}
+    )
+    assert response.status_code == 200
+
+
+def test_bloom_filter_has_no_false_negatives():
+    """Тест что фильтр Блума не теряет добавленные ключи"""
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    keys = [f"jti-{i}" for i in range(1000)]
+    for key in keys:
+        bloom.add(key)
+
+    assert all(key in bloom for key in keys)
+    false_positives = sum(f"other-{i}" in bloom for i in range(10_000))
+    assert false_positives < 300
+
+
+@pytest.mark.asyncio
+async def test_login_throttled_by_username(async_client, regular_user):
+    """Тест что перебор пароля упирается в лимит до проверки bcrypt"""
+    login_data = {"username": regular_user["username"], "password": "wrong"}
+    for _ in range(auth_config.LOGIN_USERNAME_BURST):
+        response = await async_client.post("/auth/login", json=login_data)
+        assert response.status_code == 401
+
+    response = await async_client.post("/auth/login", json=login_data)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+
+    # Правильный пароль тоже отклоняется, пока корзина пуста
+    login_data["password"] = "password"
+    response = await async_client.post("/auth/login", json=login_data)
+    assert response.status_code == 429
+
+
+@pytest.mark.asyncio
+async def test_memory_throttle_refills():
+    """Тест пополнения корзины со временем"""
+    backend = MemoryThrottleBackend(shards=4, max_keys=100)
+
+    assert await backend.consume("key", capacity=2, refill_rate=1000) == 0
+    assert await backend.consume("key", capacity=2, refill_rate=1000) == 0
+    assert await backend.consume("other", capacity=2, refill_rate=1000) == 0
+
+    backend_slow = MemoryThrottleBackend(shards=4, max_keys=100)
+    await backend_slow.consume("key", capacity=1, refill_rate=0.01)
+    retry_after = await backend_slow.consume("key", capacity=1, refill_rate=0.01)
+    assert retry_after == pytest.approx(100, rel=0.01)
+
+
+@pytest.mark.asyncio
+async def test_memory_throttle_is_bounded():
+    """Тест что число хранимых корзин ограничено"""
+    backend = MemoryThrottleBackend(shards=2, max_keys=10)
+    for i in range(1000):
+        await backend.consume(f"key-{i}", capacity=5, refill_rate=0.001)
+
+    assert sum(len(shard) for shard in backend._shards) <= 10
+
+
+@pytest.mark.asyncio
+async def test_database_throttle_backend(test_engine):
+    """Тест общего для воркеров хранилища корзин в БД"""
+    backend = DatabaseThrottleBackend(
+        async_sessionmaker(bind=test_engine, expire_on_commit=False)
+    )
+
+    assert await backend.consume("user:bob", capacity=2, refill_rate=0.01) == 0
+    assert await backend.consume("user:bob", capacity=2, refill_rate=0.01) == 0
+    assert await backend.consume("user:bob", capacity=2, refill_rate=0.01) > 0
+    assert await backend.consume("user:alice", capacity=2, refill_rate=0.01) == 0
@@ -0,0 +1,123 @@
+import pytest
+
+import src.auth.dependencies
+import src.batch.dispatch
+from src.batch.dispatch import SessionLanes, dispatch
+from src.batch.schemas import SubRequest
+from src.shared.config import settings
+
+
+@pytest.mark.asyncio
+async def test_batch_runs_sub_requests(
+    async_client, regular_token, test_book, monkeypatch
+):
+    """Тест выполнения нескольких запросов за один вызов /batch"""
+    book_id = test_book["id"]
+    headers = {"Authorization": f"Bearer {regular_token}"}
+    await async_client.post(f"/favorites/books/{book_id}", headers=headers)
+
+    verified = []
+    verify_token = src.auth.dependencies.verify_token
+    monkeypatch.setattr(
+        src.auth.dependencies,
+        "verify_token",
+        lambda token: verified.append(token) or verify_token(token),
+    )
+    opened = []
+    new_session = src.batch.dispatch.new_session
+    monkeypatch.setattr(
+        src.batch.dispatch,
+        "new_session",
+        lambda: opened.append(1) or new_session(),
+    )
+
+    requests = [
+        {"id": "book", "url": f"/books/{book_id}"},
+        {"id": "books", "url": "/books/?limit=5"},
+        {"id": "favorite", "url": f"/favorites/books/{book_id}/status"},
+        {"id": "favorites", "url": "/favorites/me"},
+        {"id": "reviews", "url": f"/reviews/book/{book_id}"},
+        {"id": "rating", "url": f"/reviews/{book_id}/average_rating"},
+        {"id": "missing", "url": "/books/999999"},
+    ]
+    response = await async_client.post(
+        "/batch", json={"requests": requests}, headers=headers
+    )
+    assert response.status_code == 200
+    results = {item["id"]: item for item in response.json()["responses"]}
+    assert [item["id"] for item in response.json()["responses"]] == [
+        request["id"] for request in requests
+    ]
+
+    assert results["book"]["status"] == 200
+    assert results["book"]["body"]["id"] == book_id
+    assert results["books"]["headers"]["x-total-count"] == "1"
+    assert results["favorite"]["status"] == 200
+    assert [item["book_id"] for item in results["favorites"]["body"]] == [book_id]
+    assert results["reviews"]["body"] == []
+    assert results["missing"]["status"] == 404
+    assert results["missing"]["body"]["detail"] == "Book not found"
+    assert results["rating"]["body"] is None
+
+    # Токен проверен один раз на весь /batch, сессий не больше BATCH_CONCURRENCY
+    assert len(verified) == 1
+    assert len(opened) <= settings.BATCH_CONCURRENCY - 1
+
+
+@pytest.mark.asyncio
+async def test_batch_without_auth_and_invalid_requests(async_client, test_book):
+    """Тест подзапросов без авторизации и проверки списка подзапросов"""
+    response = await async_client.post(
+        "/batch",
+        json={
+            "requests": [
+                {"url": f"/books/{test_book['id']}"},
+                {"url": "/favorites/me"},
+            ]
+        },
+    )
+    assert response.status_code == 200
+    book, favorites = response.json()["responses"]
+    assert book["id"] is None and book["status"] == 200
+    assert favorites["status"] == 401
+
+    for requests in [
+        [{"url": "/batch"}],
+        [{"url": "https://example.com/books/"}],
+        [{"url": "/books/", "method": "POST"}],
+        [{"url": "/books/"}] * (settings.BATCH_MAX_REQUESTS + 1),
+        [],
+    ]:
+        response = await async_client.post("/batch", json={"requests": requests})
+        assert response.status_code == 422, requests
+
+
+@pytest.mark.asyncio
+async def test_batch_rolls_back_failed_sub_request_session():
+    """Тест что сессия упавшего подзапроса откатывается до следующего подзапроса"""
+
+    class Session:
+        rollbacks = 0
+
+        async def rollback(self):
+            self.rollbacks += 1
+
+    async def app(scope, receive, send):
+        if scope["path"] == "/broken":
+            raise RuntimeError("database error")
+        status = 503 if scope["path"] == "/unavailable" else 200
+        await send({"type": "http.response.start", "status": status})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    session = Session()
+    lanes = SessionLanes(session, 1)
+    parent = {"asgi": {}, "http_version": "1.1", "scheme": "http", "headers": []}
+
+    await dispatch(app, parent, SubRequest(url="/books/"), lanes)
+    assert session.rollbacks == 0
+    await dispatch(app, parent, SubRequest(url="/broken"), lanes)
+    assert session.rollbacks == 1
+    await dispatch(app, parent, SubRequest(url="/unavailable"), lanes)
+    assert session.rollbacks == 2
+    # Сессия вернулась в ленту и достаётся следующему подзапросу
+    assert await lanes.acquire() is session
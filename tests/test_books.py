@@ -1,4 +1,20 @@
+import time
+
 import pytest
+from sqlalchemy import event, select
+from sqlalchemy.dialects import sqlite
+
+from src.books.crud import book as book_crud
+from src.books.crud import book_count
+from src.books.facets import book_conditions, book_facets
+from src.books.fuzzy import BookTrigramIndex, book_trigrams, trigrams
+from src.books.leaderboard import RatingLeaderboard, leaderboard
+from src.books.models import UNRATED, BookModel
+from src.books.schemas import BookCreate, BookFilter, BookQuery
+from src.books.suggest import BookSuggestIndex
+from src.books.trending import TrendingIndex, trending
+from src.favorites.crud import favorite as favorite_crud
+from src.shared import database
 
 
 @pytest.mark.asyncio
@@ -250,3 +266,738 @@ async def test_get_top_rated_with_custom_limit(async_client, admin_token):
 
     assert response.status_code == 200
     assert len(response.json()) == 3
+
+
+@pytest.mark.asyncio
+async def test_top_rated_bayesian_ranking(
+    async_client, admin_token, regular_token, test_session
+):
+    """Тест рейтинга по байесовскому среднему и его инкрементального обновления"""
+    admin = {"Authorization": f"Bearer {admin_token}"}
+    regular = {"Authorization": f"Bearer {regular_token}"}
+    first, second = [
+        (
+            await async_client.post(
+                "/books/",
+                json={"title": title, "author": "Author", "pages": 100, "rating": 4.0},
+                headers=admin,
+            )
+        ).json()["id"]
+        for title in ("First", "Second")
+    ]
+
+    async def top_ids():
+        response = await async_client.get("/books/top_rated")
+        return [book["id"] for book in response.json()]
+
+    assert await top_ids() == [first, second]
+
+    # (4.0 * 5 + 5) / 6 > 4.0
+    review = await async_client.post(
+        "/reviews/",
+        json={"text": "Great", "rating": 5, "book_id": second},
+        headers=regular,
+    )
+    assert await top_ids() == [second, first]
+
+    # Одна пятёрка не перевешивает две
+    for headers in (admin, regular):
+        await async_client.post(
+            "/reviews/",
+            json={"text": "Great", "rating": 5, "book_id": first},
+            headers=headers,
+        )
+    assert await top_ids() == [first, second]
+
+    await async_client.put(
+        f"/reviews/{review.json()['id']}",
+        json={"text": "Bad", "rating": 1, "book_id": second},
+        headers=regular,
+    )
+    incremental = leaderboard._ranked.copy()
+    assert [book_id for _, book_id in incremental] == [first, second]
+
+    # Полный пересчёт даёт тот же порядок и те же значения
+    await leaderboard.rebuild(test_session)
+    assert leaderboard._ranked == pytest.approx(incremental)
+
+    await async_client.delete(f"/books/{first}", headers=admin)
+    assert await top_ids() == [second]
+
+
+@pytest.mark.asyncio
+async def test_leaderboard_rebuild_keeps_concurrent_changes(test_session, monkeypatch):
+    """Тест что отзывы и изменения книг во время перестройки не теряются"""
+    kept, removed = [
+        await book_crud.create(
+            test_session, BookCreate(title=title, author="Author", pages=10, rating=3)
+        )
+        for title in ("Kept", "Removed")
+    ]
+    index = RatingLeaderboard(min_reviews=1, rebuild_interval=60)
+    execute = test_session.execute
+
+    async def execute_with_changes(statement, *args, **kwargs):
+        # Изменения приходят, пока перестройка читает книги
+        if index._pending == []:
+            index.review_added(kept.id, 5)
+            index.book_saved(42, 1.0)
+            index.book_removed(removed.id)
+        return await execute(statement, *args, **kwargs)
+
+    monkeypatch.setattr(test_session, "execute", execute_with_changes)
+    await index.rebuild(test_session)
+
+    assert index._pending is None
+    assert index._stats == {kept.id: [3.0, 1, 5], 42: [1.0, 0, 0]}
+    assert index.page(0, 10) == [kept.id, 42]
+
+
+def test_leaderboard_prior_without_rating():
+    """Тест что книга без рейтинга (None или UNRATED) начинает со среднего"""
+    index = RatingLeaderboard(min_reviews=5, rebuild_interval=60)
+    index.loaded = True
+    index._global_mean = 3.0
+    index.book_saved(1, None)
+    index.book_saved(2, UNRATED)
+    index.book_saved(3, 2.5)
+
+    assert index._stats[1][0] == index._stats[2][0] == 3.0
+    assert index._stats[3][0] == 2.5
+    assert index.page(0, 3) == [1, 2, 3]
+
+
+@pytest.mark.asyncio
+async def test_trending_books(async_client, admin_token, regular_token):
+    """Тест популярных сейчас книг по избранному и отзывам"""
+    admin = {"Authorization": f"Bearer {admin_token}"}
+    regular = {"Authorization": f"Bearer {regular_token}"}
+    quiet, busy, reviewed = [
+        (
+            await async_client.post(
+                "/books/",
+                json={"title": title, "author": "Author", "pages": 100},
+                headers=admin,
+            )
+        ).json()["id"]
+        for title in ("Quiet", "Busy", "Reviewed")
+    ]
+
+    response = await async_client.get("/books/trending")
+    assert response.status_code == 200
+    assert response.json() == []
+
+    for headers in (admin, regular):
+        await async_client.post(f"/favorites/books/{busy}", headers=headers)
+    await async_client.post(
+        "/reviews/",
+        json={"text": "Nice", "rating": 4, "book_id": reviewed},
+        headers=regular,
+    )
+
+    response = await async_client.get("/books/trending")
+    assert [book["id"] for book in response.json()] == [busy, reviewed]
+
+    # Полная перестройка из БД даёт тот же порядок
+    trending.reset()
+    response = await async_client.get("/books/trending", params={"limit": 1})
+    assert [book["id"] for book in response.json()] == [busy]
+    assert quiet not in trending._scores
+
+
+def test_trending_index_decay_and_top_k():
+    """Тест затухания событий и вытеснения из top-K"""
+    index = TrendingIndex(half_life=3600, top_k=2, rebuild_interval=60)
+    index.loaded = True
+    now = time.time()
+
+    index.record(1, now - 2 * 3600)
+    index.record(2, now - 3600)
+    assert [book_id for book_id, _ in index.top(10)] == [2, 1]
+    assert index.top(10)[0][1] == pytest.approx(0.5, rel=1e-3)
+
+    # Свежее событие весит больше двух старых и вытесняет минимум top-K
+    index.record(3, now)
+    assert [book_id for book_id, _ in index.top(10)] == [3, 2]
+
+    index.book_removed(3)
+    assert [book_id for book_id, _ in index.top(10)] == [2, 1]
+
+
+@pytest.mark.asyncio
+async def test_trending_rebuild_keeps_concurrent_changes(
+    test_session, regular_user, monkeypatch
+):
+    """Тест что события и удаления книг во время перестройки не теряются"""
+    books = [
+        await book_crud.create(
+            test_session, BookCreate(title=f"Busy {i}", author="Author", pages=10)
+        )
+        for i in range(2)
+    ]
+    for book in books:
+        await favorite_crud.add_to_favorites(test_session, regular_user["id"], book.id)
+
+    index = TrendingIndex(half_life=3600, top_k=5, rebuild_interval=60)
+    stream = test_session.stream
+
+    async def stream_with_changes(statement):
+        # Изменения приходят, пока перестройка читает события
+        if index._pending == []:
+            index.record(42)
+            index.book_removed(books[0].id)
+        return await stream(statement)
+
+    monkeypatch.setattr(test_session, "stream", stream_with_changes)
+    await index.rebuild(test_session)
+
+    assert index._pending is None
+    assert sorted(index._scores) == [books[1].id, 42]
+    assert {book_id for book_id, _ in index.top(10)} == {books[1].id, 42}
+
+
+@pytest.mark.asyncio
+async def test_books_total_count_header(async_client, admin_token, monkeypatch):
+    """Тест заголовка X-Total-Count: счётчик обновляется без пересчёта"""
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    empty = await async_client.get("/books/")
+    assert empty.headers["X-Total-Count"] == "0"
+
+    book_ids = []
+    for i in range(3):
+        response = await async_client.post(
+            "/books/",
+            json={"title": f"Counted {i}", "author": "Author", "pages": 100},
+            headers=headers,
+        )
+        book_ids.append(response.json()["id"])
+    await async_client.delete(f"/books/{book_ids[0]}", headers=headers)
+
+    # Счётчик поддерживается из CRUD: COUNT(*) больше не выполняется
+    async def no_count(db):
+        raise AssertionError("COUNT(*) should be served from the counter")
+
+    monkeypatch.setattr(book_count, "_count", no_count)
+    page = await async_client.get("/books/", params={"limit": 1})
+    assert len(page.json()) == 1
+    assert page.headers["X-Total-Count"] == "2"
+    top = await async_client.get("/books/top_rated")
+    assert top.headers["X-Total-Count"] == "2"
+
+    # Список с фильтрами считается COUNT(*) по тем же условиям, без фасетов
+    async def no_facets(db, filters):
+        raise AssertionError("facets should not be computed for a list")
+
+    monkeypatch.setattr(book_facets, "get", no_facets)
+    filtered = await async_client.get("/books/", params={"pages_min": 100})
+    assert filtered.headers["X-Total-Count"] == "2"
+
+    # Итог с теми же фильтрами берётся из кэша до изменения книг
+    async def no_filtered_count(db, where):
+        raise AssertionError("filtered total should be cached")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(book_count, "_count_where", no_filtered_count)
+        cached = await async_client.get(
+            "/books/", params={"pages_min": 100, "sort": "-rating"}
+        )
+        assert cached.headers["X-Total-Count"] == "2"
+
+    await async_client.post(
+        "/books/",
+        json={"title": "Counted 3", "author": "Author", "pages": 100},
+        headers=headers,
+    )
+    filtered = await async_client.get("/books/", params={"pages_min": 100})
+    assert filtered.headers["X-Total-Count"] == "3"
+
+    monkeypatch.setattr(book_count, "mode", "off")
+    off = await async_client.get("/books/")
+    assert "X-Total-Count" not in off.headers
+    off = await async_client.get("/books/", params={"pages_min": 100})
+    assert "X-Total-Count" not in off.headers
+
+
+@pytest.mark.asyncio
+async def test_filtered_count_plan_uses_bound_parameters(test_session, monkeypatch):
+    """Тест что EXPLAIN для оценки получает значения фильтров параметрами"""
+    executed = []
+
+    class Result:
+        def scalar(self):
+            return [{"Plan": {"Plan Rows": 123}}]
+
+    class Connection:
+        async def exec_driver_sql(self, sql, params):
+            executed.append((sql, params))
+            return Result()
+
+    async def connection():
+        return Connection()
+
+    monkeypatch.setattr(test_session, "connection", connection)
+    filters = BookFilter(author="O'Brien'); DROP TABLE books; --", pages_min=10)
+    query = select(BookModel.id).where(*book_conditions(filters))
+
+    assert await book_count._plan_rows(test_session, query) == 123
+    [(sql, params)] = executed
+    assert sql.startswith("EXPLAIN (FORMAT JSON) SELECT")
+    assert "O'Brien" not in sql
+    assert params == (filters.author, 10)
+
+
+@pytest.mark.asyncio
+async def test_books_filter_and_sort(async_client, admin_token):
+    """Тест фильтров и сортировки каталога"""
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    books = [
+        ("Анна Каренина", "Лев Толстой", 864, 4.8),
+        ("Война и мир", "Лев Толстой", 1300, 4.9),
+        ("Детство", "Лев Толстой", 120, 3.9),
+        ("Идиот", "Фёдор Достоевский", 640, 4.7),
+    ]
+    for title, author, pages, rating in books:
+        await async_client.post(
+            "/books/",
+            json={"title": title, "author": author, "pages": pages, "rating": rating},
+            headers=headers,
+        )
+
+    response = await async_client.get(
+        "/books/",
+        params={"author": "Лев Толстой", "pages_min": 500, "sort": "-rating"},
+    )
+    assert response.status_code == 200
+    assert [book["title"] for book in response.json()] == [
+        "Война и мир",
+        "Анна Каренина",
+    ]
+    assert response.headers["X-Total-Count"] == "2"
+
+    by_pages = await async_client.get("/books/", params={"sort": "pages", "limit": 2})
+    assert [book["pages"] for book in by_pages.json()] == [120, 640]
+    assert by_pages.headers["X-Total-Count"] == "4"
+
+    invalid = await async_client.get("/books/", params={"sort": "author"})
+    assert invalid.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_book_facets(async_client, admin_token):
+    """Тест счётчиков по авторам и рейтингу и их сброса при изменении книг"""
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    books = [
+        ("Книга 1", "Автор А", 4.2),
+        ("Книга 2", "Автор А", 4.9),
+        ("Книга 3", "Автор Б", 3.5),
+    ]
+    for title, author, rating in books:
+        await async_client.post(
+            "/books/",
+            json={"title": title, "author": author, "pages": 100, "rating": rating},
+            headers=headers,
+        )
+
+    response = await async_client.get("/books/facets")
+    assert response.status_code == 200
+    assert response.json() == {
+        "total": 3,
+        "authors": [
+            {"author": "Автор А", "count": 2},
+            {"author": "Автор Б", "count": 1},
+        ],
+        "ratings": [{"rating": 3, "count": 1}, {"rating": 4, "count": 2}],
+    }
+
+    await async_client.post(
+        "/books/",
+        json={"title": "Книга 4", "author": "Автор Б", "pages": 100, "rating": 5.0},
+        headers=headers,
+    )
+    filtered = await async_client.get(
+        "/books/facets", params={"rating_min": 4.0, "authors": 1}
+    )
+    assert filtered.json() == {
+        "total": 3,
+        "authors": [{"author": "Автор А", "count": 2}],
+        "ratings": [{"rating": 4, "count": 2}, {"rating": 5, "count": 1}],
+    }
+
+
+async def _query_plan(test_engine, query: BookQuery) -> list[str]:
+    statement = book_crud.browse_statement(query).offset(100).limit(10)
+    sql = statement.compile(
+        dialect=sqlite.dialect(), compile_kwargs={"literal_binds": True}
+    )
+    async with test_engine.connect() as conn:
+        rows = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")
+        return [row[3] for row in rows]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("author", [None, "Лев Толстой"])
+@pytest.mark.parametrize(
+    "sort", ["title", "-title", "rating", "-rating", "pages", "-pages", "created_at"]
+)
+async def test_books_sort_uses_index(test_engine, sort, author):
+    """Тест что каждая сортировка (и внутри автора) читается из индекса"""
+    plan = await _query_plan(test_engine, BookQuery(sort=sort, author=author))
+    column = sort.lstrip("-")
+    index = f"ix_books_author_{column}_id" if author else f"ix_books_{column}_id"
+    assert any(f"USING INDEX {index}" in step for step in plan), plan
+    assert not any("TEMP B-TREE" in step for step in plan), plan
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("author", [None, "Лев Толстой"])
+async def test_books_range_filter_uses_index(test_engine, author):
+    """Тест что диапазон по полю сортировки ищется по тому же индексу"""
+    query = BookQuery(sort="-rating", rating_min=4.0, rating_max=4.5, author=author)
+    plan = await _query_plan(test_engine, query)
+    index = "ix_books_author_rating_id" if author else "ix_books_rating_id"
+    assert any(f"SEARCH books USING INDEX {index}" in step for step in plan), plan
+    assert not any("TEMP B-TREE" in step for step in plan), plan
+
+
+@pytest.mark.asyncio
+async def test_books_sparse_fields(async_client, admin_token, test_engine):
+    """Тест выбора полей: сужаются и SELECT, и ответ"""
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    created = await async_client.post(
+        "/books/",
+        json={"title": "Война и мир", "author": "Лев Толстой", "pages": 1300},
+        headers=headers,
+    )
+    book_id = created.json()["id"]
+
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(test_engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        page = await async_client.get("/books/", params={"fields": "title, id"})
+    finally:
+        event.remove(test_engine.sync_engine, "before_cursor_execute", capture)
+    assert page.status_code == 200
+    assert page.json() == [{"id": book_id, "title": "Война и мир"}]
+    assert page.headers["X-Total-Count"] == "1"
+    [select] = [sql for sql in statements if "FROM books ORDER BY" in sql]
+    assert select.startswith("SELECT books.id, books.title \nFROM books")
+    # Отзывы книги (selectin) не подгружаются
+    assert not any("FROM reviews" in sql for sql in statements)
+
+    detail = await async_client.get(f"/books/{book_id}", params={"fields": "pages"})
+    assert detail.json() == {"pages": 1300}
+    top = await async_client.get("/books/top_rated", params={"fields": "id"})
+    assert top.json() == [{"id": book_id}]
+    full = await async_client.get(f"/books/{book_id}")
+    assert set(full.json()) == {
+        "id",
+        "title",
+        "author",
+        "pages",
+        "rating",
+        "created_at",
+    }
+
+    for fields in ["id,isbn", "", ","]:
+        invalid = await async_client.get("/books/", params={"fields": fields})
+        assert invalid.status_code == 422
+        assert invalid.json()["detail"][0]["loc"] == ["query", "fields"]
+
+
+@pytest.mark.asyncio
+async def test_books_include_summaries(
+    async_client, admin_token, regular_token, test_engine
+):
+    """Тест сводок оценок и избранного в списках книг одним запросом на сводку"""
+    admin = {"Authorization": f"Bearer {admin_token}"}
+    reader = {"Authorization": f"Bearer {regular_token}"}
+    book_ids = []
+    for i in range(3):
+        response = await async_client.post(
+            "/books/",
+            json={"title": f"Summary {i}", "author": "Author", "pages": 100},
+            headers=admin,
+        )
+        book_ids.append(response.json()["id"])
+    for rating in (4, 5):
+        await async_client.post(
+            "/reviews/",
+            json={"text": "Good", "rating": rating, "book_id": book_ids[0]},
+            headers=reader,
+        )
+    await async_client.post(f"/favorites/books/{book_ids[1]}", headers=reader)
+
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(test_engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        response = await async_client.get(
+            "/books/", params={"include": "favorite_count,rating_summary"}
+        )
+    finally:
+        event.remove(test_engine.sync_engine, "before_cursor_execute", capture)
+    assert response.status_code == 200
+    books = {book["id"]: book for book in response.json()}
+    assert books[book_ids[0]]["rating_summary"] == {"average": 4.5, "count": 2}
+    assert books[book_ids[0]]["favorite_count"] == 0
+    assert books[book_ids[1]]["rating_summary"] == {"average": None, "count": 0}
+    assert books[book_ids[1]]["favorite_count"] == 1
+    assert books[book_ids[2]]["title"] == "Summary 2"
+    # По одному запросу на сводку; отзывы не просматриваются
+    assert len([sql for sql in statements if "FROM rating_histograms" in sql]) == 1
+    assert len([sql for sql in statements if "FROM favorites" in sql]) == 1
+    assert not any("FROM reviews" in sql for sql in statements)
+
+    top = await async_client.get(
+        "/books/top_rated", params={"include": "rating_summary", "fields": "id"}
+    )
+    assert top.json()[0] == {
+        "id": book_ids[0],
+        "rating_summary": {"average": 4.5, "count": 2},
+    }
+    plain = await async_client.get("/books/")
+    assert "rating_summary" not in plain.json()[0]
+
+    invalid = await async_client.get("/books/", params={"include": "reviews"})
+    assert invalid.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_book_full(
+    async_client, test_book, regular_token, admin_token, monkeypatch
+):
+    """Тест страницы книги одним запросом: книга, оценки, отзывы, избранное"""
+    reader = {"Authorization": f"Bearer {regular_token}"}
+    admin = {"Authorization": f"Bearer {admin_token}"}
+    for text, rating in [("Good", 4), ("Great", 5), ("Fine", 3)]:
+        await async_client.post(
+            "/reviews/",
+            json={"text": text, "rating": rating, "book_id": test_book["id"]},
+            headers=reader,
+        )
+    await async_client.post(f"/favorites/books/{test_book['id']}", headers=reader)
+
+    response = await async_client.get(
+        f"/books/{test_book['id']}/full", params={"reviews": 2}, headers=reader
+    )
+    assert response.status_code == 200
+    page = response.json()
+    assert page["book"]["title"] == test_book["title"]
+    assert page["rating_summary"] == {"average": 4.0, "count": 3}
+    assert page["favorite_count"] == 1
+    assert page["is_favorite"] is True
+    assert [review["text"] for review in page["reviews"]] == ["Fine", "Great"]
+
+    other = await async_client.get(f"/books/{test_book['id']}/full", headers=admin)
+    assert other.json()["is_favorite"] is False
+    # Оба запроса идут в сессии запроса: второе соединение из пула не берётся
+    sessions = []
+    factory = database.get_session_factory()
+    monkeypatch.setattr(
+        database, "_session_factory", lambda: sessions.append(1) or factory()
+    )
+    anonymous = await async_client.get(f"/books/{test_book['id']}/full")
+    assert anonymous.json()["is_favorite"] is None
+    assert len(anonymous.json()["reviews"]) == 3
+    assert len(sessions) == 1
+
+    missing = await async_client.get("/books/999999/full")
+    assert missing.status_code == 404
+    invalid_token = await async_client.get(
+        f"/books/{test_book['id']}/full", headers={"Authorization": "Bearer bad"}
+    )
+    assert invalid_token.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_suggest_books(async_client, admin_token):
+    """Тест подсказок по началу слов названия и автора"""
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    ids = {}
+    for title, author in [
+        ("Война и мир", "Лев Толстой"),
+        ("Воскресение", "Лев Толстой"),
+        ("Идиот", "Фёдор Достоевский"),
+    ]:
+        response = await async_client.post(
+            "/books/",
+            json={"title": title, "author": author, "pages": 100},
+            headers=headers,
+        )
+        ids[title] = response.json()["id"]
+
+    async def suggest(q: str) -> list[str]:
+        response = await async_client.get("/books/suggest", params={"q": q})
+        assert response.status_code == 200
+        return [book["title"] for book in response.json()]
+
+    assert await suggest("во") == ["Война и мир", "Воскресение"]
+    assert await suggest("ТОЛСТ ми") == ["Война и мир"]
+    assert await suggest("федор") == ["Идиот"]
+    assert await suggest("чехов") == []
+
+    await async_client.put(
+        f"/books/{ids['Идиот']}", json={"title": "Бесы"}, headers=headers
+    )
+    await async_client.delete(f"/books/{ids['Воскресение']}", headers=headers)
+    assert await suggest("идиот") == []
+    assert await suggest("бес") == ["Бесы"]
+    assert await suggest("во") == ["Война и мир"]
+
+    invalid = await async_client.get("/books/suggest", params={"q": ""})
+    assert invalid.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_suggest_index_keeps_changes_made_during_rebuild(monkeypatch):
+    """Тест что изменения во время перестройки не теряются"""
+    index = BookSuggestIndex(rebuild_interval=60)
+    index.loaded = True
+    index.book_saved(1, "Старое название", "Автор")
+
+    build = BookSuggestIndex._build
+
+    def slow_build(books):
+        # Пока индекс строится в потоке, приходят изменения из CRUD
+        index.book_saved(2, "Новая книга", "Автор")
+        index.book_removed(1)
+        return build(books)
+
+    class FakeResult:
+        def all(self):
+            return [(1, "Старое название", "Автор")]
+
+    class FakeSession:
+        async def execute(self, statement):
+            return FakeResult()
+
+    monkeypatch.setattr(index, "_build", slow_build)
+    await index.rebuild(FakeSession())
+
+    assert [book["id"] for book in index.suggest("автор", 10)] == [2]
+
+    class InFlightSession:
+        async def execute(self, statement):
+            # Книга сохранена, пока выполняется SELECT, и в выборку не попала
+            index.book_saved(3, "Свежая книга", "Автор")
+            return FakeResult()
+
+    monkeypatch.setattr(index, "_build", build)
+    await index.rebuild(InFlightSession())
+    assert [book["id"] for book in index.suggest("свежая", 10)] == [3]
+
+
+@pytest.mark.asyncio
+async def test_suggest_index_rebuilds_early_on_dead_rows(monkeypatch):
+    """Тест что накопление старых версий книг запускает перестройку раньше срока"""
+    index = BookSuggestIndex(rebuild_interval=60, max_dead_rows=2)
+    index.loaded = True
+    requested = []
+    monkeypatch.setattr(index, "rebuild_in_background", lambda: requested.append(1))
+
+    index.book_saved(1, "Книга", "Автор")
+    index.book_saved(1, "Книга, второе издание", "Автор")
+    index.book_removed(1)
+    assert index._store.dead == 2
+    assert not requested
+
+    index.book_saved(2, "Другая книга", "Автор")
+    index.book_saved(2, "Другая книга", "Автор")
+    assert requested
+
+
+@pytest.mark.asyncio
+async def test_search_books_tolerates_typos(async_client, admin_token):
+    """Тест нечёткого поиска по названию и автору с опечатками"""
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    ids = {}
+    for title, author in [
+        ("Преступление и наказание", "Фёдор Достоевский"),
+        ("Идиот", "Фёдор Достоевский"),
+        ("Война и мир", "Лев Толстой"),
+    ]:
+        response = await async_client.post(
+            "/books/",
+            json={"title": title, "author": author, "pages": 100},
+            headers=headers,
+        )
+        ids[title] = response.json()["id"]
+
+    # Индекс не загружен: запрос не строит его сам, а запускает загрузку в фоне
+    response = await async_client.get("/books/search", params={"q": "идиот"})
+    assert response.json() == {"items": [], "complete": False}
+    await book_trigrams._load_task
+
+    async def search(q: str) -> list[str]:
+        response = await async_client.get("/books/search", params={"q": q})
+        assert response.status_code == 200
+        assert response.json()["complete"] is True
+        return [book["title"] for book in response.json()["items"]]
+
+    # Оценки одинаковые (совпал автор), порядок по id
+    assert await search("Достаевский") == ["Преступление и наказание", "Идиот"]
+    assert await search("преступленье") == ["Преступление и наказание"]
+    assert await search("война и миръ") == ["Война и мир"]
+    assert await search("чехов") == []
+
+    await async_client.put(
+        f"/books/{ids['Идиот']}",
+        json={"author": "Фёдор Михайлович Достоевский"},
+        headers=headers,
+    )
+    await async_client.delete(
+        f"/books/{ids['Преступление и наказание']}", headers=headers
+    )
+    response = await async_client.get("/books/search", params={"q": "достоевский"})
+    [hit] = response.json()["items"]
+    assert hit["title"] == "Идиот"
+    assert 0.3 <= hit["score"] < 1
+
+    invalid = await async_client.get("/books/search", params={"q": ""})
+    assert invalid.status_code == 422
+
+
+def test_trigram_index_matches_pg_trgm_and_respects_budget():
+    """Тест сходства как в pg_trgm и прерывания поиска по бюджету времени"""
+    assert trigrams("Cat!") == {"  c", " ca", "cat", "at "}
+
+    index = BookTrigramIndex(rebuild_interval=60)
+    index._store = index._build([(1, "Идиот", "Фёдор Достоевский")])
+    # similarity('достоевкий', 'Фёдор Достоевский') в pg_trgm — 0.45
+    hits, complete = index.search("достоевкий", 10, threshold=0.3, budget=1)
+    assert complete
+    assert [(hit["id"], hit["score"]) for hit in hits] == [(1, 0.45)]
+    assert index.search("достоевкий", 10, threshold=0.5, budget=1) == ([], True)
+
+    hits, complete = index.search("достоевкий", 10, threshold=0.3, budget=-1)
+    assert not complete
+    assert hits == []
+
+
+@pytest.mark.asyncio
+async def test_trigram_index_keeps_changes_made_during_select():
+    """Тест что книга, сохранённая во время чтения книг перестройкой, не теряется"""
+    index = BookTrigramIndex(rebuild_interval=60)
+    index.loaded = True
+
+    class FakeResult:
+        def all(self):
+            return [(1, "Идиот", "Фёдор Достоевский")]
+
+    class InFlightSession:
+        bind = type("Bind", (), {"dialect": type("Dialect", (), {"name": "sqlite"})})
+
+        async def execute(self, statement):
+            index.book_saved(2, "Бесы", "Фёдор Достоевский")
+            return FakeResult()
+
+    await index.rebuild(InFlightSession())
+    hits, _ = index.search("бесы", 10, threshold=0.3, budget=1)
+    assert [hit["id"] for hit in hits] == [2]
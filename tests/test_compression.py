@@ -0,0 +1,145 @@
+import zlib
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from httpx import ASGITransport, AsyncClient
+
+from src.shared.compression import CompressionMiddleware, CpuBudget, negotiate
+
+ROWS = [{"id": i, "title": f"Книга {i}", "author": "Лев Толстой"} for i in range(200)]
+
+
+def _make_client(budget: CpuBudget) -> AsyncClient:
+    app = FastAPI()
+
+    @app.get("/items")
+    async def list_items():
+        return ROWS
+
+    @app.get("/small")
+    async def small():
+        return {"status": "ok"}
+
+    @app.get("/export")
+    async def export():
+        async def lines():
+            for row in ROWS:
+                yield f"{row['id']},{row['title']},{row['author']}\n"
+
+        return StreamingResponse(lines(), media_type="text/csv")
+
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=500,
+        gzip_level=6,
+        zstd_level=3,
+        budget=budget,
+    )
+    return AsyncClient(transport=ASGITransport(app=app), base_url="http://test")
+
+
+def test_negotiate_encoding():
+    """Тест выбора кодировки по Accept-Encoding"""
+    available = ("zstd", "gzip")
+    assert negotiate("gzip, deflate, br, zstd", available) == "zstd"
+    assert negotiate("gzip;q=0.5, zstd;q=0", available) == "gzip"
+    assert negotiate("*", ("gzip",)) == "gzip"
+    assert negotiate("identity", available) is None
+    assert negotiate("", available) is None
+
+
+@pytest.mark.asyncio
+async def test_compresses_large_json_responses():
+    """Тест сжатия больших JSON-ответов и пропуска маленьких"""
+    async with _make_client(CpuBudget(share=1.0)) as client:
+        response = await client.get("/items", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert response.headers["Vary"] == "Accept-Encoding"
+        assert int(response.headers["Content-Length"]) < len(response.content) / 4
+        assert response.json() == ROWS
+
+        # Ответы без сжатия тоже зависят от Accept-Encoding
+        response = await client.get("/small", headers={"Accept-Encoding": "gzip"})
+        assert "Content-Encoding" not in response.headers
+        assert response.headers["Vary"] == "Accept-Encoding"
+        assert response.json() == {"status": "ok"}
+
+        response = await client.get("/items", headers={"Accept-Encoding": "br"})
+        assert "Content-Encoding" not in response.headers
+        assert response.headers["Vary"] == "Accept-Encoding"
+
+
+@pytest.mark.asyncio
+async def test_compresses_streaming_responses_chunk_by_chunk():
+    """Тест потокового сжатия: каждая часть уходит и разжимается сразу"""
+
+    async def lines():
+        for row in ROWS:
+            yield f"{row['id']},{row['title']},{row['author']}\n"
+
+    middleware = CompressionMiddleware(
+        StreamingResponse(lines(), media_type="text/csv"),
+        minimum_size=500,
+        gzip_level=6,
+        zstd_level=3,
+        budget=CpuBudget(share=1.0),
+    )
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/export",
+        "headers": [(b"accept-encoding", b"gzip")],
+    }
+    messages = []
+
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        messages.append(message)
+
+    await middleware(scope, receive, send)
+
+    start, *bodies = messages
+    headers = dict(start["headers"])
+    assert headers[b"content-encoding"] == b"gzip"
+    assert b"content-length" not in headers
+    assert len(bodies) > len(ROWS)
+    decompressor = zlib.decompressobj(31)
+    # Z_SYNC_FLUSH: часть разжимается, не дожидаясь следующих
+    first = decompressor.decompress(bodies[0]["body"]).decode()
+    assert first == "0,Книга 0,Лев Толстой\n"
+    rest = b"".join(body["body"] for body in bodies[1:])
+    assert (first + decompressor.decompress(rest).decode()).count("\n") == len(ROWS)
+    assert decompressor.eof
+
+
+@pytest.mark.asyncio
+async def test_skips_compression_when_cpu_budget_is_exhausted():
+    """Тест что под нагрузкой ответы отдаются без сжатия"""
+    budget = CpuBudget(share=0.1, window=60)
+    async with _make_client(budget) as client:
+        headers = {"Accept-Encoding": "gzip"}
+        response = await client.get("/items", headers=headers)
+        assert response.headers["Content-Encoding"] == "gzip"
+
+        budget.spend(10)
+        response = await client.get("/items", headers=headers)
+        assert "Content-Encoding" not in response.headers
+        assert response.headers["Vary"] == "Accept-Encoding"
+        assert response.json() == ROWS
+
+        budget.reset()
+        response = await client.get("/items", headers=headers)
+        assert response.headers["Content-Encoding"] == "gzip"
+
+
+@pytest.mark.asyncio
+async def test_app_compresses_responses(async_client):
+    """Тест что приложение сжимает ответы"""
+    response = await async_client.get(
+        "/openapi.json", headers={"Accept-Encoding": "gzip"}
+    )
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.json()["info"]["title"] == "Books API"
@@ -0,0 +1,60 @@
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine.default import CACHE_HIT
+
+from src.books.crud import book as book_crud
+from src.books.schemas import BookCreate
+from src.favorites.crud import _favorite_exists
+from src.favorites.crud import favorite as favorite_crud
+from src.users.crud import _active_by_username
+from src.users.crud import user as user_crud
+from src.users.schemas import UserCreate
+
+
+@pytest.mark.asyncio
+async def test_hot_queries_hit_compiled_cache(test_engine, test_session):
+    """Тест что частые запросы берут SQL из кэша компиляции"""
+    user = await user_crud.create(
+        test_session,
+        UserCreate(username="cached", email="cached@example.com", password="secret"),
+    )
+    book = await book_crud.create(
+        test_session, BookCreate(title="Cached", author="Author", pages=10)
+    )
+    await favorite_crud.add_to_favorites(test_session, user.id, book.id)
+
+    cache_hits = []
+    statements = []
+
+    def after_execute(conn, cursor, statement, parameters, context, executemany):
+        cache_hits.append(context.cache_hit is CACHE_HIT)
+
+    def on_orm_execute(state):
+        if not state.is_relationship_load:
+            statements.append(state.statement)
+
+    event.listen(test_engine.sync_engine, "after_cursor_execute", after_execute)
+    event.listen(test_session.sync_session, "do_orm_execute", on_orm_execute)
+    try:
+        for _ in range(2):
+            # Первый проход компилирует запросы, второй должен попасть в кэш
+            cache_hits.clear()
+            assert (await book_crud.get(test_session, book.id)).id == book.id
+            assert (await user_crud.get_by_username(test_session, "cached")).id
+            assert await favorite_crud.is_book_in_favorites(
+                test_session, user.id, book.id
+            )
+        assert not await favorite_crud.is_book_in_favorites(
+            test_session, user.id, book.id + 1
+        )
+    finally:
+        event.remove(test_engine.sync_engine, "after_cursor_execute", after_execute)
+        event.remove(test_session.sync_session, "do_orm_execute", on_orm_execute)
+
+    assert cache_hits and all(cache_hits)
+    # Запросы не собираются заново: каждый вызов исполняет тот же объект,
+    # поэтому ключ кэша не вычисляется повторно
+    hot = [book_crud._get_by_id, _active_by_username, _favorite_exists]
+    assert [id(stmt) for stmt in statements] == [id(stmt) for stmt in hot * 2] + [
+        id(_favorite_exists)
+    ]
@@ -0,0 +1,119 @@
+import asyncio
+import time
+
+import pytest
+from sqlalchemy.pool import QueuePool
+
+from src.health.monitor import LoopLagMonitor
+from src.shared.config import settings
+from src.shared.database import pool_wait
+from src.shared.pool import PoolAutoscaler, PoolWaitTracker
+
+
+@pytest.mark.asyncio
+async def test_live(async_client):
+    """Тест проверки живости"""
+    response = await async_client.get("/health/live")
+    assert response.status_code == 200
+    assert response.json() == {"status": "ok"}
+
+
+@pytest.mark.asyncio
+async def test_not_ready_until_warm_up(async_client):
+    """Тест что до окончания прогрева воркер не готов"""
+    response = await async_client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.json()["reasons"] == ["warming up"]
+
+
+@pytest.mark.asyncio
+async def test_ready(async_client, ready_app):
+    """Тест готовности и статистики пула"""
+    response = await async_client.get("/health/ready")
+    assert response.status_code == 200
+
+    data = response.json()
+    assert data["status"] == "ready"
+    assert set(data["pool"]) == {"size", "checkedout", "overflow", "recent_wait_ms"}
+    assert data["bcrypt_queue_depth"] == 0
+
+
+@pytest.mark.asyncio
+async def test_not_ready_when_pool_saturated(async_client, ready_app):
+    """Тест что долгое ожидание соединения делает воркер неготовым"""
+    pool_wait.record(settings.HEALTH_POOL_WAIT_THRESHOLD_MS / 1000 * 2)
+
+    response = await async_client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.json()["reasons"] == ["database pool saturated"]
+
+
+@pytest.mark.asyncio
+async def test_loop_lag_monitor():
+    """Тест измерения задержки event loop"""
+    monitor = LoopLagMonitor(interval=0.01)
+    monitor.start()
+    await asyncio.sleep(0.02)
+
+    time.sleep(0.1)  # блокируем event loop
+    await asyncio.sleep(0.02)
+    await monitor.stop()
+
+    assert monitor.max_lag >= 0.05
+    assert not monitor.running
+
+
+@pytest.mark.asyncio
+async def test_pool_stats(async_client):
+    """Тест статистики пула соединений"""
+    pool_wait.record(0.003)
+
+    response = await async_client.get("/health/pool")
+    assert response.status_code == 200
+
+    data = response.json()
+    assert data["adaptive"] is False
+    assert data["checkout_wait_count"] == 1
+    assert data["checkout_wait_histogram"]["le_5ms"] == 1
+    assert set(data["events"]) >= {"connect", "checkout", "checkin"}
+
+
+def test_pool_autoscaler_grows_and_shrinks():
+    """Тест что адаптивный пул растёт при ожидании и сжимается в простое"""
+    pool = QueuePool(lambda: None, pool_size=2, max_overflow=1)
+    tracker = PoolWaitTracker(window=10)
+    autoscaler = PoolAutoscaler(
+        pool, tracker, target_wait=0.05, max_overflow=8, step=3, interval=1
+    )
+
+    tracker.record(0.2)
+    assert autoscaler.adjust() == 4
+    tracker.record(0.2)
+    assert autoscaler.adjust() == 7
+    tracker.record(0.2)
+    assert autoscaler.adjust() == 8
+    assert pool._max_overflow == 8
+
+    # Ожиданий нет — лимит возвращается к исходному
+    assert autoscaler.adjust() == 5
+    assert autoscaler.adjust() == 2
+    assert autoscaler.adjust() == 1
+    assert autoscaler.resizes == 6
+
+
+@pytest.mark.asyncio
+async def test_pool_autoscaler_disabled_without_overflow_attribute(caplog):
+    """Тест что без закрытого лимита overflow автоподстройка выключается"""
+    pool = QueuePool(lambda: None, pool_size=2, max_overflow=1)
+    del pool._max_overflow
+    autoscaler = PoolAutoscaler(
+        pool, PoolWaitTracker(window=10), 0.05, max_overflow=8, step=3, interval=1
+    )
+
+    with caplog.at_level("WARNING", logger="src"):
+        autoscaler.start()
+    assert not autoscaler.supported
+    assert "autoscaling disabled" in caplog.text
+    autoscaler.wait_tracker.record(0.2)
+    assert autoscaler.adjust() == 0
+    assert autoscaler.resizes == 0
@@ -0,0 +1,126 @@
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import select
+
+from src.jobs.cron import CronSchedule
+from src.jobs.models import JobModel
+from src.jobs.runner import JobSpec, enqueue, job_registry, job_runner
+
+
+@pytest.fixture
+def handled(monkeypatch):
+    """Тестовые обработчики задач: успешный и падающий"""
+    calls = []
+
+    async def record(payload):
+        calls.append(payload)
+
+    async def explode(payload):
+        raise RuntimeError("boom")
+
+    monkeypatch.setitem(job_registry, "test.record", JobSpec("test.record", record, 3))
+    monkeypatch.setitem(
+        job_registry, "test.explode", JobSpec("test.explode", explode, 2)
+    )
+    return calls
+
+
+@pytest.mark.asyncio
+async def test_enqueue_and_run(async_client, test_session, handled):
+    """Тест постановки задачи в очередь и её выполнения"""
+    job_id = await enqueue(test_session, "test.record", {"book_id": 1})
+
+    assert await job_runner.run_once() == 1
+    assert handled == [{"book_id": 1}]
+
+    job = await test_session.get(JobModel, job_id)
+    assert job.status == "done"
+    assert job.attempts == 1
+    assert job.finished_at is not None
+
+    # Выполненная задача больше не забирается
+    assert await job_runner.run_once() == 0
+    assert job_runner.metrics["test.record"].succeeded == 1
+
+    response = await async_client.get("/health/jobs")
+    assert response.status_code == 200
+    assert response.json()["jobs"]["test.record"]["succeeded"] == 1
+    assert response.json()["jobs"]["jobs.cleanup"]["schedule"] == "17 * * * *"
+
+
+@pytest.mark.asyncio
+async def test_failed_job_retries_with_backoff(
+    async_client, test_session, handled, monkeypatch
+):
+    """Тест повтора упавшей задачи с задержкой и окончательного отказа"""
+    monkeypatch.setattr(job_runner, "backoff", 0)
+    job_id = await enqueue(test_session, "test.explode")
+
+    assert await job_runner.run_once() == 1
+    job = await test_session.get(JobModel, job_id, populate_existing=True)
+    assert job.status == "queued"
+    assert job.last_error == "RuntimeError: boom"
+
+    assert await job_runner.run_once() == 1
+    job = await test_session.get(JobModel, job_id, populate_existing=True)
+    assert job.status == "failed"
+    assert job.attempts == 2
+
+    metrics = job_runner.metrics["test.explode"]
+    assert (metrics.retried, metrics.failed) == (1, 1)
+
+
+def test_retry_delay_is_capped():
+    """Тест экспоненциальной задержки повторов с ограничением сверху"""
+    assert job_runner.retry_delay(1) == job_runner.backoff
+    assert job_runner.retry_delay(2) == job_runner.backoff * 2
+    assert job_runner.retry_delay(50) == job_runner.backoff_max
+
+
+@pytest.mark.asyncio
+async def test_claim_is_bounded_and_exclusive(async_client, test_session, handled):
+    """Тест что задача забирается один раз и не больше числа слотов"""
+    for number in range(5):
+        await enqueue(test_session, "test.record", {"number": number})
+
+    first = await job_runner.claim(3)
+    second = await job_runner.claim(3)
+    assert len(first) == 3
+    assert len(second) == 2
+    assert not {job.id for job in first} & {job.id for job in second}
+    assert await job_runner.claim(3) == []
+
+
+@pytest.mark.asyncio
+async def test_scheduled_job_enqueued_once(async_client, test_session, monkeypatch):
+    """Тест что срабатывание по расписанию ставится в очередь один раз"""
+    fire = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    monkeypatch.setitem(job_runner._next_fire, "jobs.cleanup", fire)
+    await job_runner.schedule_due()
+    # Другой воркер планирует то же срабатывание
+    monkeypatch.setitem(job_runner._next_fire, "jobs.cleanup", fire)
+    await job_runner.schedule_due()
+
+    result = await test_session.scalars(
+        select(JobModel.dedupe_key).where(JobModel.name == "jobs.cleanup")
+    )
+    assert result.all() == [f"jobs.cleanup@{fire.isoformat()}"]
+
+
+def test_cron_schedule():
+    """Тест вычисления следующего срабатывания cron"""
+    moment = datetime(2026, 3, 6, 10, 7, 30, tzinfo=timezone.utc)  # пятница
+
+    assert CronSchedule("*/15 * * * *").next_after(moment) == moment.replace(
+        minute=15, second=0
+    )
+    assert CronSchedule("0 3 * * *").next_after(moment) == datetime(
+        2026, 3, 7, 3, 0, tzinfo=timezone.utc
+    )
+    # Рабочие дни: после пятницы — понедельник
+    assert CronSchedule("30 9 * * 1-5").next_after(moment) == datetime(
+        2026, 3, 9, 9, 30, tzinfo=timezone.utc
+    )
+    with pytest.raises(ValueError):
+        CronSchedule("61 * * * *")
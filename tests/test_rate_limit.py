@@ -0,0 +1,160 @@
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.auth.revocation import revocation_filter
+from src.auth.utils import create_access_token, rate_limit_principal
+from src.shared.models import RateLimitWindowModel
+from src.shared.rate_limit import (
+    DatabaseRateLimitBackend,
+    MemoryRateLimitBackend,
+    RateLimitMiddleware,
+    RateLimitPolicy,
+    RateLimitRule,
+)
+
+tight_policy = RateLimitPolicy("tight", window=60, anonymous=2, user=3)
+
+
+def _make_client(backend) -> AsyncClient:
+    app = FastAPI()
+
+    @app.get("/items/")
+    async def list_items():
+        return []
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int):
+        return {"id": item_id}
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    app.add_middleware(
+        RateLimitMiddleware,
+        rules=[
+            RateLimitRule("GET", "/items/", tight_policy),
+            RateLimitRule("GET", "/items/{item_id}", tight_policy),
+        ],
+        backend=backend,
+        resolve_principal=rate_limit_principal,
+    )
+    return AsyncClient(transport=ASGITransport(app=app), base_url="http://test")
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_anonymous():
+    """Тест ограничения анонимных запросов по IP"""
+    async with _make_client(MemoryRateLimitBackend(max_keys=100)) as client:
+        first = await client.get("/items/")
+        assert first.status_code == 200
+        assert first.headers["RateLimit-Limit"] == "2"
+        assert first.headers["RateLimit-Remaining"] == "1"
+        assert first.headers["RateLimit-Policy"] == "2;w=60"
+
+        # Маршрут с параметром делит лимит той же политики
+        assert (await client.get("/items/1")).status_code == 200
+
+        response = await client.get("/items/")
+        assert response.status_code == 429
+        assert response.json()["error_code"] == "TOO_MANY_REQUESTS"
+        assert int(response.headers["Retry-After"]) >= 1
+        assert response.headers["RateLimit-Remaining"] == "0"
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_principals():
+    """Тест отдельных лимитов для пользователя и администратора"""
+    user_token = create_access_token({"sub": "1", "adm": False})
+    admin_token = create_access_token({"sub": "2", "jti": "admin", "adm": True})
+
+    async with _make_client(MemoryRateLimitBackend(max_keys=100)) as client:
+        for _ in range(2):
+            await client.get("/items/")
+        assert (await client.get("/items/")).status_code == 429
+
+        headers = {"Authorization": f"Bearer {user_token}"}
+        for _ in range(3):
+            response = await client.get("/items/", headers=headers)
+            assert response.status_code == 200
+            assert response.headers["RateLimit-Limit"] == "3"
+        assert (await client.get("/items/", headers=headers)).status_code == 429
+
+        headers = {"Authorization": f"Bearer {admin_token}"}
+        for _ in range(10):
+            response = await client.get("/items/", headers=headers)
+            assert response.status_code == 200
+            assert "RateLimit-Limit" not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_admin_tier_requires_live_session():
+    """Тест что токен отозванной сессии админа получает лимит пользователя"""
+    revoked_token = create_access_token({"sub": "2", "jti": "gone", "adm": True})
+    legacy_token = create_access_token({"sub": "3", "adm": True})
+    revocation_filter.add("gone")
+
+    assert rate_limit_principal(f"Bearer {revoked_token}") == ("user", "2")
+    assert rate_limit_principal(f"Bearer {legacy_token}") == ("user", "3")
+
+    async with _make_client(MemoryRateLimitBackend(max_keys=100)) as client:
+        headers = {"Authorization": f"Bearer {revoked_token}"}
+        for _ in range(3):
+            assert (await client.get("/items/", headers=headers)).status_code == 200
+        assert (await client.get("/items/", headers=headers)).status_code == 429
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_skips_unmatched_routes():
+    """Тест что маршруты без политики не ограничиваются"""
+    async with _make_client(MemoryRateLimitBackend(max_keys=100)) as client:
+        for _ in range(5):
+            response = await client.get("/health")
+            assert response.status_code == 200
+            assert "RateLimit-Limit" not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_applied_to_app_routes(async_client):
+    """Тест заголовков лимита на списке книг"""
+    response = await async_client.get("/books/")
+    assert response.status_code == 200
+    assert "RateLimit-Remaining" in response.headers
+
+
+@pytest.mark.asyncio
+async def test_memory_rate_limit_is_bounded():
+    """Тест что число хранимых окон ограничено"""
+    backend = MemoryRateLimitBackend(max_keys=10)
+    for i in range(1000):
+        await backend.hit(f"key-{i}", limit=5, window=60)
+
+    assert len(backend._windows) <= 10
+
+
+@pytest.mark.asyncio
+async def test_database_rate_limit_backend(test_engine):
+    """Тест общего для воркеров хранилища окон в БД"""
+    backend = DatabaseRateLimitBackend(
+        async_sessionmaker(bind=test_engine, expire_on_commit=False)
+    )
+
+    assert (await backend.hit("list:anonymous:ip", limit=2, window=60))[0]
+    assert (await backend.hit("list:anonymous:ip", limit=2, window=60))[0]
+    allowed, remaining, reset = await backend.hit(
+        "list:anonymous:ip", limit=2, window=60
+    )
+    assert not allowed and remaining == 0 and 0 < reset <= 60
+    assert (await backend.hit("list:anonymous:other", limit=2, window=60))[0]
+
+    # Отклонённые запросы не увеличивают счётчик окна
+    async with backend.session_factory() as db:
+        counts = await db.scalars(
+            select(RateLimitWindowModel.count).where(
+                RateLimitWindowModel.key == "list:anonymous:ip"
+            )
+        )
+        assert counts.all() == [2]
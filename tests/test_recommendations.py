@@ -0,0 +1,213 @@
+import pytest
+
+from src.jobs.runner import job_runner
+from src.recommendations.index import (
+    RATING_REBUILD_JOB,
+    CoFavoriteIndex,
+    RatingRecommendationIndex,
+    co_favorites,
+    rating_recommendations,
+)
+from src.shared.database import new_session
+
+
+async def _create_user(async_client, name: str) -> dict:
+    await async_client.post(
+        "/users/",
+        json={"username": name, "email": f"{name}@example.com", "password": "password"},
+    )
+    response = await async_client.post(
+        "/auth/login", json={"username": name, "password": "password"}
+    )
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def _create_book(async_client, admin_token: str, title: str) -> int:
+    response = await async_client.post(
+        "/books/",
+        json={"title": title, "author": "Author", "pages": 100},
+        headers={"Authorization": f"Bearer {admin_token}"},
+    )
+    return response.json()["id"]
+
+
+@pytest.mark.asyncio
+async def test_similar_books(async_client, admin_token):
+    """Тест похожих книг по совместному добавлению в избранное"""
+    first, second, third = [
+        await _create_book(async_client, admin_token, f"Book {i}") for i in range(3)
+    ]
+    alice = await _create_user(async_client, "alice_reader")
+    bob = await _create_user(async_client, "bob_reader")
+
+    for book_id in (first, second, third):
+        await async_client.post(f"/favorites/books/{book_id}", headers=alice)
+    for book_id in (first, second):
+        await async_client.post(f"/favorites/books/{book_id}", headers=bob)
+
+    response = await async_client.get(f"/books/{first}/similar")
+    assert response.status_code == 200
+    similar = response.json()["similar"]
+    assert [item["book_id"] for item in similar] == [second, third]
+    assert similar[0]["co_favorites"] == 2
+    assert similar[0]["score"] == pytest.approx(1.0)
+    assert similar[1]["score"] == pytest.approx(1 / 2**0.5)
+
+    # Индекс загружен — дальше он обновляется инкрементально
+    assert co_favorites.loaded
+    await async_client.delete(f"/favorites/books/{second}", headers=bob)
+    await async_client.post(f"/favorites/books/{third}", headers=bob)
+
+    response = await async_client.get(f"/books/{first}/similar", params={"limit": 1})
+    assert [item["book_id"] for item in response.json()["similar"]] == [third]
+
+    await async_client.delete(
+        f"/books/{third}", headers={"Authorization": f"Bearer {admin_token}"}
+    )
+    response = await async_client.get(f"/books/{first}/similar")
+    assert [item["book_id"] for item in response.json()["similar"]] == [second]
+
+
+@pytest.mark.asyncio
+async def test_similar_books_without_favorites(async_client, admin_token):
+    """Тест что у книги без избранного нет похожих, а несуществующей книги нет"""
+    book_id = await _create_book(async_client, admin_token, "Lonely book")
+    response = await async_client.get(f"/books/{book_id}/similar")
+    assert response.status_code == 200
+    assert response.json() == {"book_id": book_id, "similar": []}
+
+    response = await async_client.get("/books/999/similar")
+    assert response.status_code == 404
+
+
+def test_co_favorite_index_keeps_top_k():
+    """Тест что инкрементальные обновления поддерживают top-K"""
+    index = CoFavoriteIndex(top_k=2, rebuild_interval=60)
+    index.favorite_added(1, [])
+    index.favorite_added(2, [1])
+    index.favorite_added(3, [1, 2])
+    index.favorite_added(4, [1, 2, 3])
+    index.favorite_added(4, [1])
+
+    assert [item.book_id for item in index.similar(1, 10)] == [4, 2]
+
+    # Книга 4 теряет позиции — её место занимает следующий сосед
+    index.favorite_removed(4, [1])
+    index.favorite_removed(4, [1, 2, 3])
+    assert [item.book_id for item in index.similar(1, 10)] == [2, 3]
+
+
+def test_co_favorite_index_bounds_pairs():
+    """Тест что индекс держит не больше candidates соседей и max_pairs пар"""
+    index = CoFavoriteIndex(top_k=1, rebuild_interval=60, candidates=2, max_pairs=5)
+    index.favorite_added(1, [2, 3, 4])
+    assert len(index._counts[1]) == 2
+    assert index._pairs == 5
+    assert 4 not in index._counts[1]
+
+    index.favorite_added(3, [1])
+    assert [item.book_id for item in index.similar(1, 10)] == [3]
+
+    # У книги 4 пара с 1 осталась односторонней — она не попадает в выдачу
+    index.book_removed(1)
+    assert index._pairs == 1
+    assert index.similar(4, 10) == []
+
+
+@pytest.mark.asyncio
+async def test_co_favorite_changes_during_rebuild(
+    async_client, admin_token, monkeypatch
+):
+    """Тест что изменение избранного во время перестройки не теряется"""
+    first, second, third = [
+        await _create_book(async_client, admin_token, f"Pair {i}") for i in range(3)
+    ]
+    alice = await _create_user(async_client, "alice_pair")
+    for book_id in (first, third):
+        await async_client.post(f"/favorites/books/{book_id}", headers=alice)
+
+    collect = co_favorites._collect_candidates
+
+    def collect_with_change(heaps, total, partition):
+        # Изменение приходит, пока перестройка читает пары из БД
+        co_favorites.favorite_added(second, [first])
+        return collect(heaps, total, partition)
+
+    monkeypatch.setattr(co_favorites, "_collect_candidates", collect_with_change)
+    async with new_session() as db:
+        await co_favorites.rebuild(db)
+
+    similar = co_favorites.similar(first, 10)
+    assert [item.book_id for item in similar] == [second, third]
+
+
+@pytest.mark.asyncio
+async def test_personal_recommendations(async_client, admin_token):
+    """Тест персональных рекомендаций по оценкам и запасного списка популярных"""
+    a, b, c, d = [
+        await _create_book(async_client, admin_token, f"Rated {i}") for i in range(4)
+    ]
+    alice = await _create_user(async_client, "alice_rater")
+    bob = await _create_user(async_client, "bob_rater")
+    carol = await _create_user(async_client, "carol_rater")
+    dave = await _create_user(async_client, "dave_rater")
+
+    ratings = [
+        (alice, a, 5),
+        (alice, b, 5),
+        (alice, c, 1),
+        (bob, a, 5),
+        (bob, b, 4),
+        (bob, d, 5),
+        (carol, a, 5),
+    ]
+    for headers, book_id, rating in ratings:
+        await async_client.post(
+            "/reviews/",
+            json={"book_id": book_id, "text": "Review", "rating": rating},
+            headers=headers,
+        )
+
+    # Индекс грузится в фоне — запрос не ждёт его загрузки. Снимка ещё нет,
+    # поэтому загрузка только ставит его расчёт в очередь задач
+    response = await async_client.get("/users/me/recommendations", headers=carol)
+    assert response.status_code == 200
+    assert response.json() == {"personalized": False, "books": []}
+    await rating_recommendations._load_task
+    assert rating_recommendations.loaded
+    response = await async_client.get("/users/me/recommendations", headers=carol)
+    assert response.json() == {"personalized": False, "books": []}
+
+    assert await job_runner.run_once() == 1
+    assert job_runner.metrics[RATING_REBUILD_JOB].succeeded == 1
+
+    response = await async_client.get("/users/me/recommendations", headers=carol)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["personalized"] is True
+    # C не понравилась тем, кому понравилась A, — она только добирает список
+    assert [item["book_id"] for item in body["books"]] == [b, d, c]
+    assert body["books"][0]["score"] > body["books"][1]["score"] > 0
+    assert body["books"][2]["score"] == 0
+
+    response = await async_client.get(
+        "/users/me/recommendations", params={"limit": 2}, headers=dave
+    )
+    body = response.json()
+    assert body["personalized"] is False
+    assert [item["book_id"] for item in body["books"]] == [a, b]
+
+    # Другой воркер читает готовый снимок и ничего не пересчитывает
+    worker = RatingRecommendationIndex(top_n=50, neighbours=50, rebuild_interval=60)
+    worker._build = None
+    async with new_session() as db:
+        await worker.rebuild(db)
+    assert worker.for_user(3, 10) == rating_recommendations.for_user(3, 10)
+    assert worker.for_user(999, 2) == rating_recommendations.for_user(999, 2)
+
+
+@pytest.mark.asyncio
+async def test_personal_recommendations_requires_auth(async_client):
+    """Тест что рекомендации доступны только авторизованному пользователю"""
+    response = await async_client.get("/users/me/recommendations")
+    assert response.status_code == 401
@@ -1,5 +1,10 @@
+import asyncio
+
 import pytest
 
+from src.books.leaderboard import leaderboard
+from src.reviews.models import RatingHistogramModel
+
 
 @pytest.mark.asyncio
 async def test_create_review(async_client, regular_user, regular_token, test_book):
@@ -61,6 +66,31 @@ async def test_get_reviews_by_user(
     assert response.json()[0]["user_id"] == regular_user["id"]
 
 
+@pytest.mark.asyncio
+async def test_get_reviews_sparse_fields(async_client, regular_token, test_book):
+    """Тест выбора полей отзывов"""
+    created = await async_client.post(
+        "/reviews/",
+        json={"text": "Good", "rating": 4, "book_id": test_book["id"]},
+        headers={"Authorization": f"Bearer {regular_token}"},
+    )
+    review_id = created.json()["id"]
+
+    response = await async_client.get(
+        f"/reviews/book/{test_book['id']}", params={"fields": "rating,id"}
+    )
+    assert response.status_code == 200
+    assert response.json() == [{"id": review_id, "rating": 4}]
+
+    response = await async_client.get(
+        f"/reviews/{review_id}", params={"fields": "text"}
+    )
+    assert response.json() == {"text": "Good"}
+
+    response = await async_client.get("/reviews/", params={"fields": "id,book"})
+    assert response.status_code == 422
+
+
 @pytest.mark.asyncio
 async def test_get_average_rating(async_client, regular_token, test_book):
     reviews_data = [
@@ -136,3 +166,65 @@ async def test_update_own_review(async_client, regular_token, test_book):
     assert response.status_code == 200
     assert response.json()["text"] == "Updated text"
     assert response.json()["rating"] == 5
+
+
+@pytest.mark.asyncio
+async def test_rating_distribution_follows_review_writes(
+    async_client, regular_user, regular_token, admin_token, test_book, test_engine
+):
+    """Тест гистограммы оценок: обновляется при каждой записи отзыва"""
+    headers = {"Authorization": f"Bearer {regular_token}"}
+    url = f"/books/{test_book['id']}/rating_distribution"
+
+    async def post(rating: int) -> int:
+        response = await async_client.post(
+            "/reviews/",
+            json={"text": "Text", "rating": rating, "book_id": test_book["id"]},
+            headers=headers,
+        )
+        return response.json()["id"]
+
+    empty = await async_client.get(url)
+    assert empty.json()["count"] == 0 and empty.json()["average"] is None
+
+    review_ids = await asyncio.gather(*(post(rating) for rating in (5, 5, 4, 2)))
+    await async_client.put(
+        f"/reviews/{review_ids[0]}",
+        json={"text": "Changed", "rating": 1, "book_id": test_book["id"]},
+        headers=headers,
+    )
+    # Проверка владельца отзыва берёт user_id из параметра запроса
+    deleted = await async_client.delete(
+        f"/reviews/{review_ids[3]}",
+        params={"user_id": regular_user["id"]},
+        headers=headers,
+    )
+    assert deleted.status_code == 200
+
+    response = await async_client.get(url)
+    assert response.status_code == 200
+    assert response.json() == {
+        "average": 10 / 3,
+        "count": 3,
+        "ratings": [
+            {"rating": 1, "count": 1},
+            {"rating": 2, "count": 0},
+            {"rating": 3, "count": 0},
+            {"rating": 4, "count": 1},
+            {"rating": 5, "count": 1},
+        ],
+    }
+
+    # Перестройка рейтинга берёт число и сумму оценок из гистограммы
+    leaderboard.reset()
+    await leaderboard.ensure_loaded()
+    assert leaderboard._stats[test_book["id"]][1:] == [3, 10]
+
+    await async_client.delete(
+        f"/books/{test_book['id']}",
+        headers={"Authorization": f"Bearer {admin_token}"},
+    )
+    assert (await async_client.get(url)).status_code == 404
+    async with test_engine.connect() as conn:
+        rows = await conn.execute(RatingHistogramModel.__table__.select())
+        assert rows.all() == []
@@ -0,0 +1,57 @@
+from src.shared.config import Settings
+from src.shared.database import engine_options
+
+
+def test_db_pool_limits_fit_max_connections():
+    """Тест что пулы всех воркеров вместе не превышают max_connections"""
+    config = Settings(
+        APP_ENV="production",
+        WORKERS=8,
+        DB_POOL_SIZE=20,
+        DB_MAX_OVERFLOW=10,
+        POSTGRES_MAX_CONNECTIONS=100,
+        DB_RESERVED_CONNECTIONS=10,
+    )
+
+    pool_size, max_overflow = config.DB_POOL_LIMITS
+    assert (pool_size, max_overflow) == (7, 4)
+    assert (pool_size + max_overflow) * config.WORKER_COUNT <= 90
+
+
+def test_db_pool_limits_unchanged_when_budget_allows():
+    """Тест что лимиты пула не меняются, если соединений хватает"""
+    config = Settings(APP_ENV="production", WORKERS=2, POSTGRES_MAX_CONNECTIONS=100)
+    assert config.DB_POOL_LIMITS == (20, 10)
+
+    # В режиме разработки всегда один процесс
+    assert Settings(APP_ENV="development", WORKERS=8).WORKER_COUNT == 1
+
+
+def test_engine_options_postgres():
+    """Тест параметров движка PostgreSQL"""
+    config = Settings(
+        DB_TYPE="postgres",
+        APP_ENV="development",
+        DB_POOL_TIMEOUT=5,
+        DB_STATEMENT_CACHE_SIZE=0,
+        DB_STATEMENT_TIMEOUT_MS=3000,
+        DB_POOL_PRE_PING=True,
+    )
+
+    options = engine_options(config)
+    assert options["pool_size"] == 20
+    assert options["max_overflow"] == 10
+    assert options["pool_timeout"] == 5
+    assert options["pool_pre_ping"] is True
+    assert options["connect_args"] == {
+        "statement_cache_size": 0,
+        "prepared_statement_cache_size": 0,
+        "server_settings": {"statement_timeout": "3000"},
+    }
+
+
+def test_engine_options_sqlite_memory():
+    """Тест что для in-memory SQLite размер пула не задаётся"""
+    options = engine_options(Settings(DB_TYPE="sqlite", SQLITE_DB_PATH=":memory:"))
+    assert "pool_size" not in options
+    assert options["connect_args"] == {"check_same_thread": False}
@@ -134,6 +134,28 @@ async def test_get_users(async_client, admin_token):
     assert isinstance(response.json(), list)
 
 
+@pytest.mark.asyncio
+async def test_get_users_total_count(async_client, admin_token, regular_user):
+    """Тест что X-Total-Count списка пользователей считает только активных"""
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = await async_client.get("/users/", headers=headers)
+    assert response.headers["X-Total-Count"] == str(len(response.json()))
+
+    await async_client.delete(f"/users/{regular_user['id']}", headers=headers)
+    after = await async_client.get("/users/", headers=headers)
+    assert after.headers["X-Total-Count"] == str(len(after.json()))
+    assert (
+        int(after.headers["X-Total-Count"])
+        == int(response.headers["X-Total-Count"]) - 1
+    )
+
+    await async_client.post(
+        f"/admin/users/{regular_user['id']}/activate", headers=headers
+    )
+    restored = await async_client.get("/users/", headers=headers)
+    assert restored.headers["X-Total-Count"] == response.headers["X-Total-Count"]
+
+
 @pytest.mark.asyncio
 async def test_update_user(async_client, admin_token):
     """Тест обновления пользователя"""